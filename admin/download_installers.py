@@ -93,7 +93,33 @@ PATTERNS = {
     (OSS_MASTER, ),
     'tests/test_dcos_e2e/backends/docker/test_distributions.py::TestUbuntu1604::test_enterprise':  # noqa: E501
     (EE_MASTER, ),
-    'tests/test_dcos_e2e/backends/docker/test_docker.py':
+    'tests/test_dcos_e2e/backends/docker/test_docker.py::TestDockerBackend':
+    (),
+    'tests/test_dcos_e2e/backends/docker/test_docker.py::TestDockerVersion':
+    (),
+    'tests/test_dcos_e2e/backends/docker/test_docker.py::TestDockerStorageDriver':  # noqa: E501
+    (),
+    'tests/test_dcos_e2e/backends/docker/test_docker.py::TestLabels':
+    (),
+    'tests/test_dcos_e2e/backends/docker/test_docker.py::TestNetworks':
+    (),
+    'tests/test_dcos_e2e/backends/docker/test_docker.py::TestOneMasterHostPortMap':  # noqa: E501
+    (),
+    'tests/test_dcos_e2e/backends/docker/test_docker.py::TestMaxParallelNodes':
+    (),
+    'tests/test_dcos_e2e/backends/docker/test_docker.py::TestOverlapInstallRoles':  # noqa: E501
+    (OSS_MASTER, ),
+    'tests/test_dcos_e2e/backends/docker/test_docker.py::TestSharedPackageStore':  # noqa: E501
+    (OSS_MASTER, ),
+    'tests/test_dcos_e2e/backends/docker/test_docker.py::TestWarmPool':
+    (),
+    'tests/test_dcos_e2e/backends/docker/test_docker.py::TestSnapshot':
+    (OSS_MASTER, ),
+    'tests/test_dcos_e2e/backends/docker/test_docker.py::TestDestroy':
+    (),
+    'tests/test_dcos_e2e/backends/docker/test_genconf_cache.py':
+    (),
+    'tests/test_dcos_e2e/backends/docker/test_package_store.py':
     (),
     'tests/test_dcos_e2e/backends/vagrant':
     (),
@@ -113,8 +139,18 @@ PATTERNS = {
     (OSS_MASTER, ),
     'tests/test_dcos_e2e/test_cluster.py::TestMultipleClusters':
     (),
+    'tests/test_dcos_e2e/test_cluster.py::TestRunOnNodes':
+    (),
     'tests/test_dcos_e2e/test_cluster.py::TestDestroyNode':
     (),
+    'tests/test_dcos_e2e/test_cluster.py::TestWaitForSSH':
+    (),
+    'tests/test_dcos_e2e/test_common.py':
+    (),
+    'tests/test_dcos_e2e/test_docker_exec_transport.py':
+    (),
+    'tests/test_dcos_e2e/test_download_cache.py':
+    (),
     'tests/test_dcos_e2e/test_enterprise.py::TestCopyFiles::test_copy_directory_to_installer':  # noqa: E501
     (EE_MASTER, ),
     'tests/test_dcos_e2e/test_enterprise.py::TestCopyFiles::test_copy_files_to_installer':  # noqa: E501
@@ -151,6 +187,8 @@ PATTERNS = {
     (OSS_MASTER, ),
     'tests/test_dcos_e2e/test_node_install.py::TestCopyFiles::test_install_from_path_with_genconf_files':  # noqa: E501
     (OSS_MASTER, ),
+    'tests/test_dcos_e2e/test_readiness.py':
+    (),
 }  # type: Dict[str, Tuple]
 
 
@@ -2,10 +2,24 @@
 Common utilities for end to end tests.
 """
 
+import asyncio
+import hashlib
 import logging
 import subprocess
+import tempfile
+from collections import deque
+from functools import partial
+from pathlib import Path
 from subprocess import PIPE, STDOUT, CompletedProcess, Popen
-from typing import Dict, List, Optional, Union
+from typing import (  # noqa: F401
+    IO,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Union,
+)
 
 
 def get_logger(name: str) -> logging.Logger:
@@ -42,6 +56,43 @@ def get_logger(name: str) -> logging.Logger:
 
 LOGGER = get_logger(__name__)
 
+# The number of bytes read at a time from files which are given to the
+# standard input of asynchronous subprocesses.
+_STDIN_CHUNK_SIZE = 64 * 1024
+
+# The size above which spooled output is moved from memory to disk.
+_SPOOL_MAX_MEMORY_BYTES = 8 * 1024 * 1024
+
+# The number of bytes read from each end of an installer to identify it.
+_INSTALLER_SAMPLE_SIZE = 1024 * 1024
+
+
+def installer_cache_key(installer: Path) -> str:
+    """
+    Return a key which identifies an installer without reading all of it.
+
+    The key is made from the size and modification time of the installer and
+    a hash of its first and last bytes.
+
+    Args:
+        installer: The path to a DC/OS installer.
+    """
+    installer_stat = installer.stat()
+    hasher = hashlib.sha256()
+    hasher.update(
+        '{size}:{mtime}:'.format(
+            size=installer_stat.st_size,
+            mtime=installer_stat.st_mtime_ns,
+        ).encode(),
+    )
+    with installer.open('rb') as installer_file:
+        hasher.update(installer_file.read(_INSTALLER_SAMPLE_SIZE))
+        installer_file.seek(
+            max(installer_stat.st_size - _INSTALLER_SAMPLE_SIZE, 0),
+        )
+        hasher.update(installer_file.read(_INSTALLER_SAMPLE_SIZE))
+    return hasher.hexdigest()
+
 
 def _safe_decode(output_bytes: bytes) -> str:
     """
@@ -59,12 +110,158 @@ def _safe_decode(output_bytes: bytes) -> str:
         )
 
 
+class _OutputBuffer:
+    """
+    A buffer for output which is read from a subprocess in chunks.
+
+    Chunks are kept in a list and joined once, when the output is first
+    needed, rather than being concatenated as they are read.
+
+    If ``max_bytes`` is given, at most that many bytes are kept in memory.
+    The first half and the last half of the output are kept, and a marker
+    replaces the output in between.
+    If ``spool`` is ``True``, all output is also written to a temporary file,
+    which is kept in memory until it becomes large.
+    """
+
+    def __init__(self, max_bytes: Optional[int], spool: bool) -> None:
+        """
+        Args:
+            max_bytes: The maximum number of bytes of output to keep in memory,
+                or ``None`` to keep all output.
+            spool: Whether to write all output to a temporary file.
+
+        Raises:
+            ValueError: ``max_bytes`` is less than one.
+        """
+        if max_bytes is not None and max_bytes < 1:
+            message = (
+                'The output limit must be at least one byte, not {max_bytes}.'
+            ).format(max_bytes=max_bytes)
+            raise ValueError(message)
+
+        self._max_bytes = max_bytes
+        self._head = []  # type: List[bytes]
+        self._head_size = 0
+        self._tail = deque()  # type: deque
+        self._tail_size = 0
+        self._omitted_size = 0
+        self._value = None  # type: Optional[bytes]
+        self.file = None  # type: Optional[IO[bytes]]
+        if spool:
+            self.file = tempfile.SpooledTemporaryFile(
+                max_size=_SPOOL_MAX_MEMORY_BYTES,
+            )
+
+    def append(self, chunk: bytes) -> None:
+        """
+        Add a chunk of output to the buffer.
+        """
+        self._value = None
+        if self.file is not None:
+            self.file.write(chunk)
+
+        if self._max_bytes is None:
+            self._head.append(chunk)
+            return
+
+        head_room = self._max_bytes // 2 - self._head_size
+        if head_room > 0:
+            self._head.append(chunk[:head_room])
+            self._head_size += len(chunk[:head_room])
+            chunk = chunk[head_room:]
+
+        if not chunk:
+            return
+
+        self._tail.append(chunk)
+        self._tail_size += len(chunk)
+        tail_max_bytes = self._max_bytes - self._max_bytes // 2
+        while self._tail_size - len(self._tail[0]) >= tail_max_bytes:
+            removed = self._tail.popleft()
+            self._tail_size -= len(removed)
+            self._omitted_size += len(removed)
+
+        # Trim the oldest chunk so that the tail is exactly the last bytes.
+        excess = self._tail_size - tail_max_bytes
+        if excess > 0:
+            self._tail[0] = self._tail[0][excess:]
+            self._tail_size -= excess
+            self._omitted_size += excess
+
+    def getvalue(self) -> bytes:
+        """
+        Return the output which has been kept in memory.
+        """
+        if self._value is None:
+            chunks = list(self._head)
+            if self._omitted_size:
+                chunks.append(
+                    '\n[... {size} bytes omitted ...]\n'.format(
+                        size=self._omitted_size,
+                    ).encode(),
+                )
+            chunks.extend(self._tail)
+            self._value = b''.join(chunks)
+        return self._value
+
+
+class _StreamedCompletedProcess(CompletedProcess):
+    """
+    A ``CompletedProcess`` whose ``stdout`` is taken from an output buffer
+    when it is first used.
+
+    Attributes:
+        stdout_file: A temporary file with all output, if output was spooled.
+    """
+
+    def __init__(
+        self,
+        args: List[str],
+        returncode: int,
+        stdout_buffer: _OutputBuffer,
+        stderr: bytes,
+    ) -> None:
+        self._stdout = None  # type: Optional[bytes]
+        self._stdout_buffer = stdout_buffer
+        self.stdout_file = stdout_buffer.file
+        super().__init__(
+            args=args,
+            returncode=returncode,
+            stdout=None,
+            stderr=stderr,
+        )
+
+    @property
+    def stdout(self) -> bytes:
+        """
+        The output of the process.
+        """
+        if self._stdout is None:
+            self._stdout = self._stdout_buffer.getvalue()
+        return self._stdout
+
+    @stdout.setter
+    def stdout(self, value: Optional[bytes]) -> None:
+        self._stdout = value
+
+
+def _log_line(line: bytes) -> None:
+    """
+    Log a line of output from a subprocess.
+    """
+    LOGGER.debug(_safe_decode(line.rstrip()))
+
+
 def run_subprocess(
     args: List[str],
     log_output_live: bool,
     cwd: Optional[Union[bytes, str]] = None,
     env: Optional[Dict[str, str]] = None,
     pipe_output: bool = True,
+    output_limit: Optional[int] = None,
+    spool_output: bool = False,
+    line_callback: Callable[[bytes], Any] = _log_line,
 ) -> CompletedProcess:
     """
     Run a command in a subprocess.
@@ -81,12 +278,21 @@ def run_subprocess(
             sent to a logger, given ``log_output_live``.
             If ``False``, no output is sent to a logger and the values are
             not returned.
+        output_limit: When logging output live, the maximum number of bytes
+            of output to keep in memory. The start and the end of the output
+            are kept. If ``None``, all output is kept.
+        spool_output: When logging output live, whether to also write all
+            output to a temporary file. This file is given as the
+            ``stdout_file`` attribute of the returned process.
+        line_callback: When logging output live, a function which is called
+            with each line of output. By default, each line is logged.
 
     Returns:
         See :py:func:`subprocess.run`.
 
     Raises:
         subprocess.CalledProcessError: See :py:func:`subprocess.run`.
+        ValueError: ``output_limit`` is less than one.
         Exception: An exception was raised in getting the output from the call.
     """
     process_stdout = PIPE if pipe_output else None
@@ -97,6 +303,10 @@ def run_subprocess(
     # See http://stackoverflow.com/a/18423003.
     if log_output_live:
         process_stderr = STDOUT
+        stdout_buffer = _OutputBuffer(
+            max_bytes=output_limit,
+            spool=spool_output,
+        )
 
     with Popen(
         args=args,
@@ -107,12 +317,10 @@ def run_subprocess(
     ) as process:
         try:
             if log_output_live:
-                stdout = b''
                 stderr = b''
                 for line in process.stdout:
-                    log_message = _safe_decode(line.rstrip())
-                    LOGGER.debug(log_message)
-                    stdout += line
+                    line_callback(line)
+                    stdout_buffer.append(line)
                 # stderr/stdout are not readable anymore which usually means
                 # that the child process has exited. However, the child
                 # process has not been wait()ed for yet, i.e. it has not yet
@@ -146,7 +354,161 @@ def run_subprocess(
             raise subprocess.CalledProcessError(
                 returncode=process.returncode,
                 cmd=args,
-                output=stdout,
+                output=stdout_buffer.getvalue() if log_output_live else stdout,
                 stderr=stderr,
             )
+    if not log_output_live:
+        return CompletedProcess(args, process.returncode, stdout, stderr)
+    return _StreamedCompletedProcess(
+        args=args,
+        returncode=process.returncode,
+        stdout_buffer=stdout_buffer,
+        stderr=stderr,
+    )
+
+
+async def _write_stdin(
+    writer: asyncio.StreamWriter,
+    stdin: IO[bytes],
+) -> None:
+    """
+    Write the contents of a file to the standard input of a process, and then
+    close the process's standard input.
+
+    The file is read in the default executor, as reading may block, for
+    example if the file is a pipe.
+    """
+    loop = asyncio.get_event_loop()
+    read_chunk = partial(stdin.read, _STDIN_CHUNK_SIZE)
+    try:
+        while True:
+            chunk = await loop.run_in_executor(None, read_chunk)
+            if not chunk:
+                break
+            writer.write(chunk)
+            await writer.drain()
+    except (BrokenPipeError, ConnectionResetError):
+        # The process exited before reading all of its input.
+        # Any failure is reported by its exit code.
+        pass
+    finally:
+        writer.close()
+
+
+async def _read_lines(
+    reader: asyncio.StreamReader,
+    stdout_buffer: _OutputBuffer,
+) -> None:
+    """
+    Log each line of the standard output of a process and add it to a buffer.
+    """
+    while True:
+        line = await reader.readline()
+        if not line:
+            return
+        _log_line(line)
+        stdout_buffer.append(line)
+
+
+async def _read_all(
+    stream: Optional[asyncio.StreamReader],
+) -> Optional[bytes]:
+    """
+    Read a stream until it ends, or return ``None`` if there is no stream.
+    """
+    if stream is None:
+        return None
+    return await stream.read()
+
+
+async def run_subprocess_async(
+    args: List[str],
+    log_output_live: bool,
+    pipe_output: bool = True,
+    stdin: Optional[IO[bytes]] = None,
+) -> CompletedProcess:
+    """
+    Run a command in a subprocess without blocking the event loop.
+
+    Args:
+        args: The command to run.
+        log_output_live: If `True`, log output live. If `True`, stderr is
+            merged into stdout in the return value.
+        pipe_output: If ``True``, pipes are opened to stdout and stderr.
+            See :py:func:`run_subprocess`.
+        stdin: A file to send to the standard input of the command, or
+            ``None``.
+
+    Returns:
+        See :py:func:`subprocess.run`.
+
+    Raises:
+        subprocess.CalledProcessError: See :py:func:`subprocess.run`.
+    """
+    process_stdout = PIPE if pipe_output else None
+    process_stderr = PIPE if pipe_output else None
+
+    # See ``run_subprocess`` for why stderr is merged into stdout.
+    if log_output_live:
+        process_stderr = STDOUT
+
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        stdin=PIPE if stdin is not None else None,
+        stdout=process_stdout,
+        stderr=process_stderr,
+    )
+
+    try:
+        stdout_buffer = _OutputBuffer(max_bytes=None, spool=False)
+        stderr = b''  # type: Optional[bytes]
+        tasks = []
+        if stdin is not None:
+            assert process.stdin is not None
+            tasks.append(_write_stdin(writer=process.stdin, stdin=stdin))
+
+        if log_output_live:
+            assert process.stdout is not None
+            tasks.append(
+                _read_lines(
+                    reader=process.stdout,
+                    stdout_buffer=stdout_buffer,
+                ),
+            )
+            await asyncio.gather(*tasks)
+            await process.wait()
+            stdout = stdout_buffer.getvalue()  # type: Optional[bytes]
+        else:
+            # ``communicate`` is not used as it closes the standard input.
+            results = await asyncio.gather(
+                _read_all(stream=process.stdout),
+                _read_all(stream=process.stderr),
+                *tasks,
+            )
+            stdout, stderr = results[0], results[1]
+            await process.wait()
+    except BaseException:
+        # This includes the task being cancelled.
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        raise
+
+    assert process.returncode is not None
+    if stderr:
+        if process.returncode == 0:
+            log = LOGGER.warning
+            log(repr(args))
+        else:
+            log = LOGGER.error
+        for line in stderr.rstrip().split(b'\n'):
+            log(_safe_decode(line.rstrip()))
+
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(
+            returncode=process.returncode,
+            cmd=args,
+            output=stdout,
+            stderr=stderr,
+        )
     return CompletedProcess(args, process.returncode, stdout, stderr)
@@ -0,0 +1,388 @@
+"""
+A cache of files downloaded from URLs.
+
+Files are stored by the SHA-256 hash of their contents, so a file which is
+served from many URLs is stored once.
+What each URL served when it was last downloaded is recorded with the server's
+validator for it, so that a URL is only served from the cache while the server
+reports the same validator.
+
+The cache may be shared by many processes at the same time.
+A lock file makes sure that entries are not removed while they are being used.
+It is held only to look up and add entries, not while downloading.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import requests
+
+from ._common import get_logger
+
+LOGGER = get_logger(__name__)
+
+# The number of bytes read from a response or a file at a time.
+_CHUNK_SIZE = 1024 * 1024
+
+# The number of seconds to wait for a server to respond.
+_TIMEOUT = 60
+
+
+def validator(headers: Any) -> str:
+    """
+    Return a value which changes when a served file changes, from the
+    ``ETag`` or ``Last-Modified`` headers of a response, or an empty string.
+
+    Weak ``ETag`` values are not used as they cannot be given in an
+    ``If-Range`` header.
+    """
+    etag = headers.get('ETag', '')
+    if etag and not etag.startswith('W/'):
+        return str(etag)
+    return str(headers.get('Last-Modified', ''))
+
+
+def content_length(headers: Any) -> Optional[int]:
+    """
+    Return the ``Content-Length`` of a response, if the server gives it.
+    """
+    length = headers.get('Content-Length')
+    return None if length is None else int(length)
+
+
+def file_sha256(path: Path) -> str:
+    """
+    Return the SHA-256 hash of the contents of a file.
+    """
+    hasher = hashlib.sha256()
+    with path.open('rb') as file_descriptor:
+        for chunk in iter(lambda: file_descriptor.read(_CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def copy_file(src: Path, dst: Path) -> None:
+    """
+    Put a copy of ``src`` at ``dst``, replacing anything there.
+
+    The file is hard linked where possible, and copied otherwise.
+    A hard link stays usable if ``src`` is later removed.
+    """
+    tmp_path = dst.parent / '.{name}.{unique}.tmp'.format(
+        name=dst.name,
+        unique=uuid.uuid4().hex,
+    )
+    try:
+        os.link(str(src), str(tmp_path))
+    except OSError:
+        shutil.copy2(src=str(src), dst=str(tmp_path))
+    os.replace(str(tmp_path), str(dst))
+
+
+class DownloadCache:
+    """
+    Downloaded files, by the SHA-256 hash of their contents.
+
+    Each file is stored in an entry directory with the name of its hash.
+    The modification time of the entry directory is used to find the least
+    recently used entries.
+    Files themselves are not touched, as the modification time of an
+    installer is a part of the key for cached ``genconf`` output.
+    """
+
+    def __init__(self, directory: Path, max_entries: int) -> None:
+        """
+        Args:
+            directory: The directory which holds the cache.
+            max_entries: The maximum number of files to keep in the cache.
+        """
+        self._directory = directory
+        self._entries_dir = directory / 'entries'
+        self._urls_dir = directory / 'urls'
+        self._max_entries = max_entries
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        """
+        Hold a lock on the cache which is shared by all processes on this
+        host.
+
+        Files returned by the cache must only be used while the lock is held,
+        as another process may otherwise remove them.
+        """
+        self._directory.mkdir(parents=True, exist_ok=True)
+        with (self._directory / 'lock').open('a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _url_record_path(self, url: str) -> Path:
+        """
+        Return the path to the record of what was last downloaded from a URL.
+        """
+        url_hash = hashlib.sha256(url.encode()).hexdigest()
+        return self._urls_dir / (url_hash + '.json')
+
+    def _url_record(self, url: str) -> Dict[str, Any]:
+        """
+        Return the record of what was last downloaded from a URL, or an empty
+        record.
+        """
+        try:
+            record = json.loads(self._url_record_path(url=url).read_text())
+        except (OSError, ValueError):
+            return {}
+        return dict(record)
+
+    def get(self, sha256: str) -> Optional[Path]:
+        """
+        Return the cached file with the given hash, if there is one.
+        """
+        entry = self._entries_dir / sha256
+        path = entry / 'file'
+        if not path.is_file():
+            return None
+
+        os.utime(str(entry))
+        return path
+
+    def get_for_url(
+        self,
+        url: str,
+        remote_validator: str,
+        length: Optional[int],
+    ) -> Optional[Path]:
+        """
+        Return the cached file which the given URL served, if it has not
+        changed since.
+
+        Args:
+            url: The URL of the file.
+            remote_validator: The validator which the server now reports for
+                the file, from ``validator``.
+            length: The size which the server now reports for the file.
+        """
+        if not remote_validator:
+            return None
+
+        record = self._url_record(url=url)
+        recorded = (record.get('validator'), record.get('length'))
+        if recorded != (remote_validator, length):
+            return None
+
+        return self.get(sha256=record['sha256'])
+
+    def get_last_for_url(self, url: str) -> Optional[Path]:
+        """
+        Return the cached file which the given URL last served, whether or not
+        it has changed since.
+
+        This is for when the server cannot be reached to check.
+        """
+        sha256 = self._url_record(url=url).get('sha256')
+        if sha256 is None:
+            return None
+        return self.get(sha256=sha256)
+
+    def add(
+        self,
+        path: Path,
+        sha256: str,
+        url: str,
+        remote_validator: str,
+        length: Optional[int],
+    ) -> Path:
+        """
+        Add a downloaded file to the cache, and remove the least recently used
+        files so that there are at most ``max_entries``.
+
+        Args:
+            path: The downloaded file.
+            sha256: The SHA-256 hash of the contents of the file.
+            url: The URL which the file was downloaded from.
+            remote_validator: The validator which the server reported for the
+                file, from ``validator``.
+            length: The size which the server reported for the file.
+
+        Returns:
+            The cached file.
+
+        Raises:
+            OSError: The file could not be added to the cache.
+        """
+        entry = self._entries_dir / sha256
+        entry.mkdir(parents=True, exist_ok=True)
+        cached = entry / 'file'
+        # The same file may already be cached for another URL.
+        # It is not replaced, so that its modification time stays the same.
+        if not cached.exists():
+            copy_file(src=path, dst=cached)
+        os.utime(str(entry))
+
+        self._urls_dir.mkdir(exist_ok=True)
+        record = {
+            'url': url,
+            'sha256': sha256,
+            'validator': remote_validator,
+            'length': length,
+        }
+        record_path = self._url_record_path(url=url)
+        tmp_record_path = record_path.with_name(
+            '.{name}.{unique}'.format(
+                name=record_path.name,
+                unique=uuid.uuid4().hex,
+            ),
+        )
+        tmp_record_path.write_text(json.dumps(record))
+        os.replace(str(tmp_record_path), str(record_path))
+
+        self._evict()
+        return cached
+
+    def _evict(self) -> None:
+        """
+        Remove the least recently used entries so that there are at most
+        ``max_entries``, and forget URLs whose entries have been removed.
+        """
+        entries = list(self._entries_dir.iterdir())
+        entries.sort(key=lambda path: path.stat().st_mtime, reverse=True)
+        for old_entry in entries[self._max_entries:]:
+            LOGGER.info(
+                'Removing cached download {entry}.'.format(entry=old_entry),
+            )
+            shutil.rmtree(path=str(old_entry), ignore_errors=True)
+
+        for record_path in self._urls_dir.glob('*.json'):
+            try:
+                sha256 = json.loads(record_path.read_text())['sha256']
+            except (OSError, ValueError, KeyError):
+                sha256 = None
+            if sha256 is None or not (self._entries_dir / sha256).is_dir():
+                record_path.unlink()
+
+
+def _download(url: str, path: Path) -> Tuple[str, Any]:
+    """
+    Download a file over one connection.
+
+    Args:
+        url: The URL of the file.
+        path: The path to download the file to.
+
+    Returns:
+        The SHA-256 hash of the contents of the file, and the headers of the
+        response.
+
+    Raises:
+        requests.RequestException: The file could not be downloaded, or fewer
+            or more bytes were received than the server said it would send.
+    """
+    LOGGER.info('Downloading {url}.'.format(url=url))
+    hasher = hashlib.sha256()
+    size = 0
+    response = requests.get(url, stream=True, timeout=_TIMEOUT)
+    response.raise_for_status()
+    with response, path.open('wb') as file_descriptor:
+        for chunk in response.iter_content(chunk_size=_CHUNK_SIZE):
+            hasher.update(chunk)
+            file_descriptor.write(chunk)
+            size += len(chunk)
+
+    # A dropped connection can end a response early without an error.
+    length = content_length(headers=response.headers)
+    if length is not None and size != length:
+        message = (
+            'Downloaded {size} bytes from {url}. Expected {length} bytes.'
+        ).format(size=size, url=url, length=length)
+        raise requests.ConnectionError(message)
+
+    return hasher.hexdigest(), response.headers
+
+
+def fetch_file(
+    url: str,
+    destination: Path,
+    cache_dir: Path,
+    max_entries: int,
+) -> None:
+    """
+    Put the file at a URL at the given destination, downloading it only if it
+    is not in the cache or it has changed.
+
+    If the server cannot be reached, the file which the URL last served is
+    used if it is in the cache.
+
+    Args:
+        url: The URL of the file.
+        destination: The path to put the file at.
+        cache_dir: The directory which holds cached files.
+        max_entries: The maximum number of files to keep in the cache.
+
+    Raises:
+        requests.RequestException: The file could not be downloaded.
+    """
+    cache = DownloadCache(directory=cache_dir, max_entries=max_entries)
+    try:
+        response = requests.head(url, allow_redirects=True, timeout=_TIMEOUT)
+        response.raise_for_status()
+    except requests.RequestException as exc:
+        with cache.lock():
+            cached = cache.get_last_for_url(url=url)
+            if cached is not None:
+                LOGGER.warning(
+                    'Could not check whether {url} has changed, so the '
+                    'cached file is used: {exception}'.format(
+                        url=url,
+                        exception=exc,
+                    ),
+                )
+                copy_file(src=cached, dst=destination)
+                return
+        raise
+
+    with cache.lock():
+        cached = cache.get_for_url(
+            url=url,
+            remote_validator=validator(headers=response.headers),
+            length=content_length(headers=response.headers),
+        )
+        if cached is not None:
+            LOGGER.info(
+                'Using cached download of {url} from {cached}.'.format(
+                    url=url,
+                    cached=cached,
+                ),
+            )
+            copy_file(src=cached, dst=destination)
+            return
+
+    # The lock is not held while downloading, so that downloads of other
+    # URLs are not held up.
+    # Processes which fetch the same URL at the same time may each download
+    # it, and the cache then keeps one copy.
+    tmp_path = cache_dir / '.download.{unique}'.format(
+        unique=uuid.uuid4().hex,
+    )
+    try:
+        sha256, headers = _download(url=url, path=tmp_path)
+        with cache.lock():
+            cached = cache.add(
+                path=tmp_path,
+                sha256=sha256,
+                url=url,
+                remote_validator=validator(headers=headers),
+                length=content_length(headers=headers),
+            )
+            copy_file(src=cached, dst=destination)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
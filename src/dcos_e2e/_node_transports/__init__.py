@@ -3,11 +3,13 @@ Classes to communicate with nodes.
 """
 
 from ._base_classes import NodeTransport
-from ._docker_exec_transport import DockerExecTransport
-from ._ssh_transport import SSHTransport
+from ._docker_exec_transport import DockerExecTransport, forget_container
+from ._ssh_transport import SSHTransport, close_ssh_connections
 
 __all__ = [
     'SSHTransport',
     'DockerExecTransport',
     'NodeTransport',
+    'close_ssh_connections',
+    'forget_container',
 ]
@@ -6,7 +6,7 @@ import abc
 import subprocess
 from ipaddress import IPv4Address
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import IO, Any, Dict, List, Optional
 
 
 class NodeTransport(abc.ABC):
@@ -25,6 +25,8 @@ class NodeTransport(abc.ABC):
         ssh_key_path: Path,
         public_ip_address: IPv4Address,
         capture_output: bool,
+        output_limit: Optional[int],
+        spool_output: bool,
     ) -> subprocess.CompletedProcess:
         """
         Run a command on this node the given user.
@@ -43,6 +45,12 @@ class NodeTransport(abc.ABC):
                 the node as the ``user`` user.
             public_ip_address: The public IP address of the node.
             capture_output: Whether to capture output in the result.
+            output_limit: When logging output live, the maximum number of
+                bytes of output to keep in memory. The start and the end of
+                the output are kept. If ``None``, all output is kept.
+            spool_output: When logging output live, whether to also write all
+                output to a temporary file, given as the ``stdout_file``
+                attribute of the result.
 
         Returns:
             The representation of the finished process.
@@ -53,44 +61,65 @@ class NodeTransport(abc.ABC):
         """
 
     @abc.abstractmethod
-    def popen(
+    async def run_async(
         self,
         args: List[str],
         user: str,
+        log_output_live: bool,
         env: Dict[str, Any],
         ssh_key_path: Path,
         public_ip_address: IPv4Address,
-    ) -> subprocess.Popen:
+        capture_output: bool,
+        stdin: Optional[IO[bytes]] = None,
+    ) -> subprocess.CompletedProcess:
         """
-        Open a pipe to a command run on a node as the given user.
+        Run a command on this node the given user, without blocking the event
+        loop.
 
         Args:
             args: The command to run on the node.
-            user: The user to open a pipe for a command for over.
+            user: The username to communicate as.
+            log_output_live: If ``True``, log output live. If ``True``, stderr
+                is merged into stdout in the return value.
             env: Environment variables to be set on the node before running
-                the command. A mapping of environment variable names to values.
+                the command. A mapping of environment variable names to
+                values.
             ssh_key_path: The path to an SSH key which can be used to SSH to
                 the node as the ``user`` user.
             public_ip_address: The public IP address of the node.
+            capture_output: Whether to capture output in the result.
+            stdin: A file to send to the standard input of the command, or
+                ``None``.
+
+        Returns:
+            The representation of the finished process.
+
+        Raises:
+            subprocess.CalledProcessError: The process exited with a non-zero
+                code.
         """
 
     @abc.abstractmethod
-    def send_file(
+    def popen(
         self,
-        local_path: Path,
-        remote_path: Path,
+        args: List[str],
         user: str,
+        env: Dict[str, Any],
         ssh_key_path: Path,
         public_ip_address: IPv4Address,
-    ) -> None:
+        pipe_stdin: bool = False,
+    ) -> subprocess.Popen:
         """
-        Copy a file to this node.
+        Open a pipe to a command run on a node as the given user.
 
         Args:
-            local_path: The path on the host of the file to send.
-            remote_path: The path on the node to place the file.
-            user: The name of the remote user to send the file.
+            args: The command to run on the node.
+            user: The user to open a pipe for a command for over.
+            env: Environment variables to be set on the node before running
+                the command. A mapping of environment variable names to values.
             ssh_key_path: The path to an SSH key which can be used to SSH to
                 the node as the ``user`` user.
             public_ip_address: The public IP address of the node.
+            pipe_stdin: If ``True``, data written to the ``stdin`` of the
+                returned pipe object is sent to the command.
         """
@@ -2,20 +2,23 @@
 Utilities to connect to nodes with Docker exec.
 """
 
-import io
-import os
+import asyncio
 import subprocess
 import sys
-import tarfile
-import uuid
+import threading
+import time
+from functools import partial
 from ipaddress import IPv4Address
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import IO, Any, Dict, List, Optional  # noqa: F401
 
 import docker
-from docker.models.containers import Container
 
-from dcos_e2e._common import get_logger, run_subprocess
+from dcos_e2e._common import (
+    get_logger,
+    run_subprocess,
+    run_subprocess_async,
+)
 from dcos_e2e._node_transports._base_classes import NodeTransport
 
 LOGGER = get_logger(__name__)
@@ -27,6 +30,7 @@ def _compose_docker_command(
     env: Dict[str, Any],
     tty: bool,
     public_ip_address: IPv4Address,
+    interactive: bool = False,
 ) -> List[str]:
     """
     Return a command to run ``args`` on a node using ``docker exec``. We do not
@@ -42,11 +46,13 @@ def _compose_docker_command(
         tty: If ``True``, allocate a pseudo-tty. This means that the users
             terminal is attached to the streams of the process.
         public_ip_address: The public IP address of the node.
+        interactive: If ``True``, keep the standard input of the command open
+            even if the standard input of this process is not a terminal.
 
     Returns:
         The full ``docker exec`` command to be run.
     """
-    container = _get_container_from_ip_address(public_ip_address)
+    container_id = _CONTAINER_INDEX.container_id(ip_address=public_ip_address)
 
     docker_exec_args = [
         'docker',
@@ -57,7 +63,7 @@ def _compose_docker_command(
 
     # Do not cover this because there is currently no test for
     # using this in a terminal in the CI.
-    if sys.stdin.isatty():  # pragma: no cover
+    if interactive or sys.stdin.isatty():  # pragma: no cover
         docker_exec_args.append('--interactive')
 
     if tty:
@@ -67,7 +73,7 @@ def _compose_docker_command(
         set_env = ['--env', '{key}={value}'.format(key=key, value=str(value))]
         docker_exec_args += set_env
 
-    docker_exec_args.append(container.id)
+    docker_exec_args.append(container_id)
     docker_exec_args += args
 
     return docker_exec_args
@@ -88,6 +94,8 @@ class DockerExecTransport(NodeTransport):
         ssh_key_path: Path,
         public_ip_address: IPv4Address,
         capture_output: bool,
+        output_limit: Optional[int],
+        spool_output: bool,
     ) -> subprocess.CompletedProcess:
         """
         Run a command on this node the given user.
@@ -106,6 +114,12 @@ class DockerExecTransport(NodeTransport):
                 the node as the ``user`` user.
             public_ip_address: The public IP address of the node.
             capture_output: Whether to capture output in the result.
+            output_limit: When logging output live, the maximum number of
+                bytes of output to keep in memory. The start and the end of
+                the output are kept. If ``None``, all output is kept.
+            spool_output: When logging output live, whether to also write all
+                output to a temporary file, given as the ``stdout_file``
+                attribute of the result.
 
         Returns:
             The representation of the finished process.
@@ -126,6 +140,68 @@ class DockerExecTransport(NodeTransport):
             args=docker_exec_args,
             log_output_live=log_output_live,
             pipe_output=capture_output,
+            output_limit=output_limit,
+            spool_output=spool_output,
+        )
+
+    async def run_async(
+        self,
+        args: List[str],
+        user: str,
+        log_output_live: bool,
+        env: Dict[str, Any],
+        ssh_key_path: Path,
+        public_ip_address: IPv4Address,
+        capture_output: bool,
+        stdin: Optional[IO[bytes]] = None,
+    ) -> subprocess.CompletedProcess:
+        """
+        Run a command on this node the given user, without blocking the event
+        loop.
+
+        Args:
+            args: The command to run on the node.
+            user: The username to communicate as.
+            log_output_live: If ``True``, log output live. If ``True``, stderr
+                is merged into stdout in the return value.
+            env: Environment variables to be set on the node before running
+                the command. A mapping of environment variable names to
+                values.
+            ssh_key_path: The path to an SSH key which can be used to SSH to
+                the node as the ``user`` user.
+            public_ip_address: The public IP address of the node.
+            capture_output: Whether to capture output in the result.
+            stdin: A file to send to the standard input of the command, or
+                ``None``.
+
+        Returns:
+            The representation of the finished process.
+
+        Raises:
+            subprocess.CalledProcessError: The process exited with a non-zero
+                code.
+        """
+        # Looking up the container may use the Docker API, which blocks, so
+        # it is done in a thread.
+        loop = asyncio.get_event_loop()
+        docker_exec_args = await loop.run_in_executor(
+            None,
+            partial(
+                _compose_docker_command,
+                args=args,
+                user=user,
+                env=env,
+                public_ip_address=public_ip_address,
+                tty=False,
+                interactive=stdin is not None,
+            ),
+        )
+
+        return await run_subprocess_async(
+            args=docker_exec_args,
+            log_output_live=log_output_live,
+            pipe_output=capture_output,
+            stdin=stdin,
         )
 
     def popen(
@@ -135,6 +211,7 @@ class DockerExecTransport(NodeTransport):
         env: Dict[str, Any],
         ssh_key_path: Path,
         public_ip_address: IPv4Address,
+        pipe_stdin: bool = False,
     ) -> subprocess.Popen:
         """
         Open a pipe to a command run on a node as the given user.
@@ -147,6 +224,8 @@ class DockerExecTransport(NodeTransport):
             ssh_key_path: The path to an SSH key which can be used to SSH to
                 the node as the ``user`` user.
             public_ip_address: The public IP address of the node.
+            pipe_stdin: If ``True``, data written to the ``stdin`` of the
+                returned pipe object is sent to the command.
 
         Returns:
             The pipe object attached to the specified process.
@@ -157,121 +236,148 @@ class DockerExecTransport(NodeTransport):
             env=env,
             public_ip_address=public_ip_address,
             tty=False,
+            interactive=pipe_stdin,
         )
 
         return subprocess.Popen(
             args=docker_exec_args,
+            stdin=subprocess.PIPE if pipe_stdin else None,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
         )
 
-    def send_file(
-        self,
-        local_path: Path,
-        remote_path: Path,
-        user: str,
-        ssh_key_path: Path,
-        public_ip_address: IPv4Address,
-    ) -> None:
-        """
-        Copy a file to this node.
 
+class _ContainerIndex:
+    """
+    An index of IP addresses to the IDs of running containers, shared by all
+    Docker exec transports.
+
+    Containers are looked up by IP address for every command.
+    Listing all containers for each lookup is slow when there are many
+    containers on the host.
+    Instead, the index is refreshed with a single listing when it is older
+    than ``ttl_seconds`` or when a lookup misses.
+    A container found in the index is inspected before it is used, as it may
+    have been removed by another process.
+    """
+
+    def __init__(self, ttl_seconds: float) -> None:
+        """
         Args:
-            local_path: The path on the host of the file to send.
-            remote_path: The path on the node to place the file.
-            user: The name of the remote user to send the file.
-            ssh_key_path: The path to an SSH key which can be used to SSH to
-                the node as the ``user`` user.
-            public_ip_address: The public IP address of the node.
+            ttl_seconds: The age after which the index is refreshed.
         """
-        # `remote_path` may be a tmpfs mount.
-        # At the time of writing, for example, `/tmp` is a tmpfs mount.
-        # Copying files to tmpfs mounts fails silently.
-        # See https://github.com/moby/moby/issues/22020.
-
-        # Therefore, we create a temporary directory within our home directory,
-        # and we put the file there.
-        # We then move the file from the temporary directory to the intended
-        # destination.
-        # We then remove the temporary directory.
-
-        home_path = self.run(
-            args=['bash', '-c', 'echo $HOME'],
-            user=user,
-            log_output_live=False,
-            env={},
-            tty=False,
-            ssh_key_path=ssh_key_path,
-            public_ip_address=public_ip_address,
-            capture_output=True,
-        ).stdout.strip().decode()
+        self._ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._client = None  # type: Optional[docker.DockerClient]
+        self._container_ids = {}  # type: Dict[IPv4Address, List[str]]
+        self._updated = float('-inf')
+
+    @property
+    def client(self) -> docker.DockerClient:
+        """
+        A Docker client which is reused between lookups.
+        """
+        with self._lock:
+            if self._client is None:
+                self._client = docker.from_env(version='auto')
+            return self._client
 
-        tmp_path = '{home}/dcos-docker-{uuid}'.format(
-            home=home_path,
-            uuid=uuid.uuid4().hex,
-        )
+    def _refresh(self) -> None:
+        """
+        Replace the index with the IP addresses of all running containers.
 
-        self.run(
-            args=['mkdir', tmp_path],
-            user=user,
-            log_output_live=False,
-            env={},
-            tty=False,
-            ssh_key_path=ssh_key_path,
-            public_ip_address=public_ip_address,
-            capture_output=True,
-        )
+        This uses one request to the Docker daemon rather than one request per
+        container.
+        """
+        containers = self.client.containers.list(sparse=True)
+        container_ids = {}  # type: Dict[IPv4Address, List[str]]
+        for container in containers:
+            networks = container.attrs['NetworkSettings']['Networks']
+            for net in networks:
+                ip_address = networks[net]['IPAddress']
+                if ip_address:
+                    container_ids.setdefault(
+                        IPv4Address(ip_address),
+                        [],
+                    ).append(container.id)
+
+        with self._lock:
+            self._container_ids = container_ids
+            self._updated = time.monotonic()
+
+    def forget(self, ip_address: IPv4Address) -> None:
+        """
+        Remove the container with the given IP address from the index.
+        """
+        with self._lock:
+            self._container_ids.pop(ip_address, None)
 
-        container = _get_container_from_ip_address(public_ip_address)
-        tarstream = io.BytesIO()
-        with tarfile.TarFile(
-            fileobj=tarstream,
-            mode='w',
-            dereference=True,
-        ) as tar:
-            tar.add(name=str(local_path), arcname='/' + remote_path.name)
-        tarstream.seek(0)
-
-        container.put_archive(path=tmp_path, data=tarstream)
-        self.run(
-            args=[
-                'mv',
-                os.path.join(tmp_path, remote_path.name),
-                str(remote_path.parent),
-            ],
-            user=user,
-            log_output_live=False,
-            env={},
-            tty=False,
-            ssh_key_path=ssh_key_path,
-            public_ip_address=public_ip_address,
-            capture_output=True,
-        )
+    def _is_current(self, container_id: str, ip_address: IPv4Address) -> bool:
+        """
+        Return whether the container with the given ID is running and has the
+        given IP address.
 
-        self.run(
-            args=['rm', '-rf', tmp_path],
-            user=user,
-            log_output_live=False,
-            env={},
-            tty=False,
-            ssh_key_path=ssh_key_path,
-            public_ip_address=public_ip_address,
-            capture_output=True,
-        )
+        Another process may have removed the container since the index was
+        refreshed, and Docker may have given its IP address to a new
+        container.
+        """
+        try:
+            attrs = self.client.api.inspect_container(container_id)
+        except docker.errors.NotFound:
+            return False
+
+        if not attrs['State']['Running']:
+            return False
+
+        networks = attrs['NetworkSettings']['Networks']
+        ip_addresses = {network['IPAddress'] for network in networks.values()}
+        return str(ip_address) in ip_addresses
+
+    def container_id(self, ip_address: IPv4Address) -> str:
+        """
+        Return the ID of the container with the given IP address.
+
+        Raises:
+            ValueError: There is not exactly one running container with the
+                given IP address.
+        """
+        with self._lock:
+            expired = time.monotonic() - self._updated > self._ttl_seconds
+            container_ids = self._container_ids.get(ip_address, [])
+
+        # A hit is checked with one request for the container, which is much
+        # cheaper than listing every container.
+        if len(container_ids) == 1 and not expired and self._is_current(
+            container_id=container_ids[0],
+            ip_address=ip_address,
+        ):
+            return container_ids[0]
+
+        self._refresh()
+        with self._lock:
+            container_ids = self._container_ids.get(ip_address, [])
+
+        if len(container_ids) != 1:
+            message = (
+                'Expected one running container with the IP address '
+                '{ip_address}, found {count}.'
+            ).format(ip_address=ip_address, count=len(container_ids))
+            raise ValueError(message)
+
+        return container_ids[0]
 
 
-def _get_container_from_ip_address(ip_address: IPv4Address) -> Container:
+_CONTAINER_INDEX = _ContainerIndex(ttl_seconds=30)
+
+
+def forget_container(ip_address: IPv4Address) -> None:
     """
-    Return the ``Container`` with the given ``ip_address``.
+    Remove the container with the given IP address from the container index.
+
+    This should be called when a container is destroyed, as its IP address may
+    be given to a new container.
+
+    Args:
+        ip_address: The IP address of the container.
     """
-    client = docker.from_env(version='auto')
-    containers = client.containers.list()
-    matching_containers = []
-    for container in containers:
-        networks = container.attrs['NetworkSettings']['Networks']
-        for net in networks:
-            if networks[net]['IPAddress'] == str(ip_address):
-                matching_containers.append(container)
-
-    assert len(matching_containers) == 1
-    return matching_containers[0]
+    _CONTAINER_INDEX.forget(ip_address=ip_address)
@@ -1,51 +1,51 @@
 """
 Utilities to connect to nodes with SSH.
+
+Commands share one SSH connection per node, user and key.
+This uses OpenSSH connection multiplexing, so that each command does not pay
+for a new TCP connection and key exchange.
 """
 
+import asyncio
+import hashlib
 import subprocess
+import threading
+from functools import partial
 from ipaddress import IPv4Address
 from pathlib import Path
 from shlex import quote
-from typing import Any, Dict, List
-
-import paramiko
+from tempfile import gettempdir
+from typing import IO, Any, Dict, List, Optional, Set  # noqa: F401
 
-from dcos_e2e._common import run_subprocess
+from dcos_e2e._common import run_subprocess, run_subprocess_async
 from dcos_e2e._node_transports._base_classes import NodeTransport
 
+# A shared connection is closed after it has been unused for this long.
+_CONTROL_PERSIST_SECONDS = 60
 
-def _compose_ssh_command(
-    args: List[str],
+# Guards ``_CONTROL_PATHS`` and ``_CONTROL_PATH_LOCKS``.
+_CONTROL_PATHS_LOCK = threading.Lock()
+
+# Control sockets of shared connections started by this process, by node.
+_CONTROL_PATHS = {}  # type: Dict[IPv4Address, Set[Path]]
+
+# Locks which stop two threads from starting the same shared connection.
+_CONTROL_PATH_LOCKS = {}  # type: Dict[Path, threading.Lock]
+
+
+def _ssh_options(
     user: str,
-    env: Dict[str, Any],
-    tty: bool,
     ssh_key_path: Path,
-    public_ip_address: IPv4Address,
 ) -> List[str]:
     """
-    Return a command to run ``args`` on a node over SSH.
+    Return options for connecting to a node over SSH.
 
     Args:
-        args: The command to run on a node.
-        user: The user that the command will be run for over SSH.
-        env: Environment variables to be set on the node before running
-            the command. A mapping of environment variable names to
-            values.
-        tty: If ``True``, allocate a pseudo-tty. This means that the users
-            terminal is attached to the streams of the process.
-        public_ip_address: The public IP address of the node.
+        user: The user to connect as.
         ssh_key_path: The path to an SSH key which can be used to SSH to
             the node as the ``user`` user.
-
-    Returns:
-        The full SSH command to be run.
     """
-    ssh_args = ['ssh']
-
-    if tty:
-        ssh_args.append('-t')
-
-    ssh_args += [
+    return [
         # This makes sure that only keys passed with the -i option are
         # used. Needed when there are already keys present in the SSH
         # key chain, which cause `Error: Too many Authentication
@@ -72,6 +72,170 @@ def _compose_ssh_command(
         # Also ignore "Connection to <IP-ADDRESS> closed".
         '-o',
         'LogLevel=QUIET',
+    ]
+
+
+def _control_path(
+    user: str,
+    ssh_key_path: Path,
+    public_ip_address: IPv4Address,
+) -> Path:
+    """
+    Return the path to the control socket of the shared connection for the
+    given node, user and key.
+
+    The name is a digest because socket paths have a short maximum length.
+    """
+    key = '{user}@{address}:{key_path}'.format(
+        user=user,
+        address=public_ip_address,
+        key_path=ssh_key_path.resolve(),
+    )
+    digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+    return Path(gettempdir()) / 'dcos-e2e-ssh-{digest}'.format(digest=digest)
+
+
+def _ensure_control_master(
+    user: str,
+    ssh_key_path: Path,
+    public_ip_address: IPv4Address,
+) -> Path:
+    """
+    Start a shared connection to the given node, if one is not running.
+
+    If the connection cannot be started, commands which use the returned
+    control path connect without it.
+
+    Returns:
+        The path to the control socket of the shared connection.
+    """
+    control_path = _control_path(
+        user=user,
+        ssh_key_path=ssh_key_path,
+        public_ip_address=public_ip_address,
+    )
+
+    with _CONTROL_PATHS_LOCK:
+        control_path_lock = _CONTROL_PATH_LOCKS.setdefault(
+            control_path,
+            threading.Lock(),
+        )
+
+    with control_path_lock:
+        if control_path.exists():
+            return control_path
+
+        # We start the shared connection in its own process with all streams
+        # closed.
+        # If instead a command started the connection, the backgrounded
+        # connection could keep that command's output pipes open.
+        master_args = [
+            'ssh',
+            *_ssh_options(user=user, ssh_key_path=ssh_key_path),
+            '-o',
+            'ControlMaster=yes',
+            '-o',
+            'ControlPath={control_path}'.format(control_path=control_path),
+            '-o',
+            'ControlPersist={seconds}'.format(
+                seconds=_CONTROL_PERSIST_SECONDS,
+            ),
+            '-o',
+            'ConnectTimeout=10',
+            # Go to the background after authentication, without running a
+            # command.
+            '-f',
+            '-N',
+            str(public_ip_address),
+        ]
+        result = subprocess.run(
+            args=master_args,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+    if result.returncode == 0:
+        with _CONTROL_PATHS_LOCK:
+            _CONTROL_PATHS.setdefault(public_ip_address, set())
+            _CONTROL_PATHS[public_ip_address].add(control_path)
+
+    return control_path
+
+
+def close_ssh_connections(public_ip_address: IPv4Address) -> None:
+    """
+    Close all shared SSH connections which this process started to the node
+    with the given IP address.
+
+    Args:
+        public_ip_address: The public IP address of the node.
+    """
+    with _CONTROL_PATHS_LOCK:
+        control_paths = _CONTROL_PATHS.pop(public_ip_address, set())
+
+    for control_path in control_paths:
+        subprocess.run(
+            args=[
+                'ssh',
+                '-o',
+                'ControlPath={control_path}'.format(
+                    control_path=control_path,
+                ),
+                '-O',
+                'exit',
+                str(public_ip_address),
+            ],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+
+def _compose_ssh_command(
+    args: List[str],
+    user: str,
+    env: Dict[str, Any],
+    tty: bool,
+    ssh_key_path: Path,
+    public_ip_address: IPv4Address,
+) -> List[str]:
+    """
+    Return a command to run ``args`` on a node over SSH.
+
+    Args:
+        args: The command to run on a node.
+        user: The user that the command will be run for over SSH.
+        env: Environment variables to be set on the node before running
+            the command. A mapping of environment variable names to
+            values.
+        tty: If ``True``, allocate a pseudo-tty. This means that the users
+            terminal is attached to the streams of the process.
+        public_ip_address: The public IP address of the node.
+        ssh_key_path: The path to an SSH key which can be used to SSH to
+            the node as the ``user`` user.
+
+    Returns:
+        The full SSH command to be run.
+    """
+    control_path = _ensure_control_master(
+        user=user,
+        ssh_key_path=ssh_key_path,
+        public_ip_address=public_ip_address,
+    )
+
+    ssh_args = ['ssh']
+
+    if tty:
+        ssh_args.append('-t')
+
+    ssh_args += _ssh_options(user=user, ssh_key_path=ssh_key_path) + [
+        # Use the shared connection if it is available.
+        # Otherwise, connect directly.
+        '-o',
+        'ControlMaster=no',
+        '-o',
+        'ControlPath={control_path}'.format(control_path=control_path),
         str(public_ip_address),
     ] + [
         '{key}={value}'.format(key=k, value=quote(str(v)))
@@ -96,6 +260,8 @@ class SSHTransport(NodeTransport):
         ssh_key_path: Path,
         public_ip_address: IPv4Address,
         capture_output: bool,
+        output_limit: Optional[int],
+        spool_output: bool,
     ) -> subprocess.CompletedProcess:
         """
         Run a command on this node the given user.
@@ -116,6 +282,12 @@ class SSHTransport(NodeTransport):
                 the node as the ``user`` user.
             public_ip_address: The public IP address of the node.
             capture_output: Whether to capture output in the result.
+            output_limit: When logging output live, the maximum number of
+                bytes of output to keep in memory. The start and the end of
+                the output are kept. If ``None``, all output is kept.
+            spool_output: When logging output live, whether to also write all
+                output to a temporary file, given as the ``stdout_file``
+                attribute of the result.
 
         Returns:
             The representation of the finished process.
@@ -137,6 +309,67 @@ class SSHTransport(NodeTransport):
             args=ssh_args,
             log_output_live=log_output_live,
             pipe_output=capture_output,
+            output_limit=output_limit,
+            spool_output=spool_output,
+        )
+
+    async def run_async(
+        self,
+        args: List[str],
+        user: str,
+        log_output_live: bool,
+        env: Dict[str, Any],
+        ssh_key_path: Path,
+        public_ip_address: IPv4Address,
+        capture_output: bool,
+        stdin: Optional[IO[bytes]] = None,
+    ) -> subprocess.CompletedProcess:
+        """
+        Run a command on this node the given user, without blocking the event
+        loop.
+
+        Args:
+            args: The command to run on the node.
+            user: The username to communicate as.
+            log_output_live: If ``True``, log output live. If ``True``, stderr
+                is merged into stdout in the return value.
+            env: Environment variables to be set on the node before running
+                the command. A mapping of environment variable names to
+                values.
+            ssh_key_path: The path to an SSH key which can be used to SSH to
+                the node as the ``user`` user.
+            public_ip_address: The public IP address of the node.
+            capture_output: Whether to capture output in the result.
+            stdin: A file to send to the standard input of the command, or
+                ``None``.
+
+        Returns:
+            The representation of the finished process.
+
+        Raises:
+            subprocess.CalledProcessError: The process exited with a non-zero
+                code.
+        """
+        # Starting a shared connection blocks, so it is done in a thread.
+        loop = asyncio.get_event_loop()
+        ssh_args = await loop.run_in_executor(
+            None,
+            partial(
+                _compose_ssh_command,
+                args=args,
+                user=user,
+                env=env,
+                tty=False,
+                ssh_key_path=ssh_key_path,
+                public_ip_address=public_ip_address,
+            ),
+        )
+
+        return await run_subprocess_async(
+            args=ssh_args,
+            log_output_live=log_output_live,
+            pipe_output=capture_output,
+            stdin=stdin,
         )
 
     def popen(
@@ -146,6 +379,7 @@ class SSHTransport(NodeTransport):
         env: Dict[str, Any],
         ssh_key_path: Path,
         public_ip_address: IPv4Address,
+        pipe_stdin: bool = False,
     ) -> subprocess.Popen:
         """
         Open a pipe to a command run on a node as the given user.
@@ -158,6 +392,8 @@ class SSHTransport(NodeTransport):
             ssh_key_path: The path to an SSH key which can be used to SSH to
                 the node as the ``user`` user.
             public_ip_address: The public IP address of the node.
+            pipe_stdin: If ``True``, data written to the ``stdin`` of the
+                returned pipe object is sent to the command.
 
         Returns:
             The pipe object attached to the specified process.
@@ -172,39 +408,7 @@ class SSHTransport(NodeTransport):
         )
         return subprocess.Popen(
             args=ssh_args,
+            stdin=subprocess.PIPE if pipe_stdin else None,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
         )
-
-    def send_file(
-        self,
-        local_path: Path,
-        remote_path: Path,
-        user: str,
-        ssh_key_path: Path,
-        public_ip_address: IPv4Address,
-    ) -> None:
-        """
-        Copy a file to this node.
-
-        Args:
-            local_path: The path on the host of the file to send.
-            remote_path: The path on the node to place the file.
-            user: The name of the remote user to send the file.
-            ssh_key_path: The path to an SSH key which can be used to SSH to
-                the node as the ``user`` user.
-            public_ip_address: The public IP address of the node.
-        """
-        with paramiko.SSHClient() as ssh_client:
-            ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            ssh_client.connect(
-                str(public_ip_address),
-                username=user,
-                key_filename=str(ssh_key_path),
-            )
-
-            with ssh_client.open_sftp() as sftp:
-                sftp.put(
-                    localpath=str(local_path),
-                    remotepath=str(remote_path),
-                )
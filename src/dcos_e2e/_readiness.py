@@ -0,0 +1,296 @@
+"""
+Tools for waiting until parts of a DC/OS cluster are ready.
+"""
+
+import json
+import random
+import subprocess
+import threading
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from functools import partial
+from typing import Any, Callable, Dict, List, Union  # noqa: F401
+
+import requests
+import retrying
+
+from ._common import get_logger
+from ._vendor.dcos_test_utils.dcos_api import DcosApiSession
+from ._vendor.dcos_test_utils.enterprise import EnterpriseApiSession
+
+LOGGER = get_logger(__name__)
+
+# A check passes when it returns anything but ``False`` without raising an
+# exception.
+Check = Callable[[], Any]
+
+# Exceptions which checks raise while a part of a cluster is not ready.
+# Other exceptions are bugs, and so they are raised rather than retried.
+_NOT_READY_EXCEPTIONS = (
+    # Commands run on nodes fail.
+    subprocess.CalledProcessError,
+    # DC/OS Test Utils requests time out.
+    retrying.RetryError,
+    # Connections are refused, or endpoints respond with error statuses.
+    requests.exceptions.RequestException,
+    # Responses are not yet JSON.
+    json.JSONDecodeError,
+)
+
+
+def _wait_for_check(
+    name: str,
+    check: Check,
+    stop: threading.Event,
+    initial_delay: float,
+    max_delay: float,
+) -> None:
+    """
+    Run a check until it passes, backing off exponentially with jitter between
+    attempts.
+
+    Args:
+        name: The name of the check, used in logs.
+        check: The check to run.
+        stop: An event which, when set, stops waiting for the check.
+        initial_delay: The maximum number of seconds to wait after the first
+            failed attempt.
+        max_delay: The maximum number of seconds to wait between attempts.
+
+    Raises:
+        Exception: The check raised an exception which does not mean that
+            a part of the cluster is not ready.
+    """
+    start_time = time.monotonic()
+    attempts = 0
+    while not stop.is_set():
+        attempts += 1
+        try:
+            result = check()
+        except _NOT_READY_EXCEPTIONS as exc:
+            LOGGER.debug(
+                '{name} is not ready: {exception}'.format(
+                    name=name,
+                    exception=exc,
+                ),
+            )
+        else:
+            if result is not False:
+                LOGGER.info(
+                    '{name} was ready after {seconds:.1f} seconds '
+                    '({attempts} attempts).'.format(
+                        name=name,
+                        seconds=time.monotonic() - start_time,
+                        attempts=attempts,
+                    ),
+                )
+                return
+
+        # "Full jitter" spreads out retries of checks which started at the
+        # same time.
+        backoff = min(max_delay, initial_delay * 2**(attempts - 1))
+        stop.wait(timeout=random.uniform(0, backoff))
+
+
+def wait_for_checks(
+    checks: Dict[str, Check],
+    initial_delay: float = 1,
+    max_delay: float = 10,
+) -> None:
+    """
+    Wait until all of the given checks pass.
+
+    Each check is run in its own thread, and retried independently of the
+    others until it passes.
+    Checks which have passed are not run again.
+
+    If this is interrupted, for example by a timeout, the checks stop.
+
+    Args:
+        checks: Checks which do not depend on each other, by name.
+        initial_delay: The maximum number of seconds to wait after the first
+            failed attempt of a check.
+        max_delay: The maximum number of seconds to wait between attempts of a
+            check.
+
+    Raises:
+        Exception: A check raised an exception which does not mean that a
+            part of the cluster is not ready.
+    """
+    if not checks:
+        return
+
+    stop = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=len(checks))
+    try:
+        futures = [
+            executor.submit(
+                _wait_for_check,
+                name=name,
+                check=check,
+                stop=stop,
+                initial_delay=initial_delay,
+                max_delay=max_delay,
+            ) for name, check in checks.items()
+        ]
+        # A check which raises an unexpected exception stops the others
+        # rather than waiting for them to pass.
+        done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+        for future in [*done, *futures]:
+            future.result()
+    finally:
+        stop.set()
+        executor.shutdown(wait=True)
+
+
+def sequence(*checks: Check) -> Check:
+    """
+    Return a check which passes when each of the given checks has passed, in
+    order.
+
+    Checks which have passed are not run again.
+
+    Args:
+        checks: Checks which each depend on the checks before them.
+    """
+    passed = []  # type: List[Check]
+
+    def check() -> bool:
+        """
+        Run the checks which have not yet passed, in order, until one fails.
+        """
+        for remaining_check in checks[len(passed):]:
+            if remaining_check() is False:
+                return False
+            passed.append(remaining_check)
+        return True
+
+    return check
+
+
+def _session_check(
+    session: Union[DcosApiSession, EnterpriseApiSession],
+    method_name: str,
+) -> Check:
+    """
+    Return a check which calls the given method of a DC/OS Test Utils API
+    session once.
+
+    The waiting methods of DC/OS Test Utils are wrapped in retries with fixed
+    delays.
+    We call the wrapped functions so that the delays are controlled by
+    ``wait_for_checks``.
+    """
+    method = getattr(type(session), method_name)
+    function = getattr(method, '__wrapped__', method)
+    return partial(function, session)
+
+
+def _asserting_session_check(
+    session: Union[DcosApiSession, EnterpriseApiSession],
+    method_name: str,
+) -> Check:
+    """
+    Return a check which calls the given method of a DC/OS Test Utils API
+    session once, for a method which asserts on responses while a part of the
+    cluster is not ready.
+
+    An ``AssertionError`` from the method means that the check has not
+    passed.
+    ``AssertionError`` is not retried for other checks, as it is usually a
+    bug.
+    """
+    function = _session_check(session, method_name)
+
+    def check() -> bool:
+        """
+        Call the method, and return whether it did not fail an assertion.
+        """
+        try:
+            function()
+        except AssertionError as exc:
+            LOGGER.debug(
+                '{method_name} failed an assertion: {exception}'.format(
+                    method_name=method_name,
+                    exception=exc,
+                ),
+            )
+            return False
+        return True
+
+    return check
+
+
+def admin_router_check(
+    session: Union[DcosApiSession, EnterpriseApiSession],
+) -> Check:
+    """
+    Return a check which passes when Admin Router accepts connections.
+
+    Args:
+        session: A DC/OS Test Utils API session for the cluster.
+    """
+    return _session_check(session, '_wait_for_adminrouter_up')
+
+
+def login_check(
+    session: Union[DcosApiSession, EnterpriseApiSession],
+) -> Check:
+    """
+    Return a check which passes when the session's user has logged in.
+
+    Args:
+        session: A DC/OS Test Utils API session for the cluster.
+    """
+    return sequence(
+        _session_check(session, 'login_default_user'),
+        session.set_node_lists_if_unset,
+    )
+
+
+def service_checks(
+    session: Union[DcosApiSession, EnterpriseApiSession],
+) -> Dict[str, Check]:
+    """
+    Return checks, by name, which together are equivalent to the waits in
+    ``wait_for_dcos`` of DC/OS Test Utils after logging in.
+
+    These can be run concurrently.
+
+    Args:
+        session: A DC/OS Test Utils API session for the cluster, which has
+            logged in.
+    """
+    checks = {
+        'Marathon': _session_check(session, '_wait_for_marathon_up'),
+        'ZooKeeper quorum': _asserting_session_check(
+            session,
+            '_wait_for_zk_quorum',
+        ),
+        'Agents': sequence(
+            _session_check(session, '_wait_for_slaves_to_join'),
+            # Admin Router agent endpoints are only checked for agents which
+            # have joined.
+            _asserting_session_check(
+                session,
+                '_wait_for_srouter_slaves_endpoints',
+            ),
+        ),
+        'DC/OS History': sequence(
+            _session_check(session, '_wait_for_dcos_history_up'),
+            _session_check(session, '_wait_for_dcos_history_data'),
+        ),
+        'Metronome': _asserting_session_check(
+            session,
+            '_wait_for_metronome',
+        ),
+        'Healthy services': _session_check(
+            session,
+            '_wait_for_all_healthy_services',
+        ),
+    }
+
+    if isinstance(session, EnterpriseApiSession):
+        checks['IAM'] = session.set_initial_resource_ids
+
+    return checks
@@ -211,6 +211,10 @@ class AWSCluster(ClusterManager):
         self.cluster_backend = cluster_backend
         self.dcos_launcher = None  # type: Optional[AbstractLauncher]
         self.cluster_info = {}  # type: Dict[str, Any]
+        # Nodes by ``cluster_info`` key.
+        # This is filled when nodes are first requested, after the cluster is
+        # created, and it is cleared when the cluster is destroyed.
+        self._node_sets = {}  # type: Dict[str, Set[Node]]
 
         aws_distros = {
             Distribution.CENTOS_7: 'cent-os-7-dcos-prereqs',
@@ -423,59 +427,52 @@ class AWSCluster(ClusterManager):
         # destroying a cluster because the generated AWS KeyPair persists.
         # https://jira.mesosphere.com/browse/DCOS-21893
         self.launcher.delete()
+        self._node_sets = {}
 
         rmtree(path=str(self._path), ignore_errors=True)
 
+    def _nodes(self, cluster_info_key: str) -> Set[Node]:
+        """
+        Args:
+            cluster_info_key: The key in ``cluster_info`` which lists the
+                nodes, e.g. ``masters``.
+
+        Returns: ``Node``s corresponding to the nodes listed under
+            ``cluster_info_key`` in ``cluster_info``.
+        """
+        if cluster_info_key not in self._node_sets:
+            nodes = set([])
+            for node_info in list(self.cluster_info[cluster_info_key]):
+                node = Node(
+                    public_ip_address=IPv4Address(node_info.get('public_ip')),
+                    private_ip_address=IPv4Address(
+                        node_info.get('private_ip'),
+                    ),
+                    default_user=self._default_user,
+                    ssh_key_path=self._ssh_key_path,
+                )
+                nodes.add(node)
+            self._node_sets[cluster_info_key] = nodes
+
+        return set(self._node_sets[cluster_info_key])
+
     @property
     def masters(self) -> Set[Node]:
         """
         Return all DC/OS master :class:`.node.Node` s.
         """
-        nodes = set([])
-        cluster_masters = list(self.cluster_info['masters'])
-        for master in cluster_masters:
-            node = Node(
-                public_ip_address=IPv4Address(master.get('public_ip')),
-                private_ip_address=IPv4Address(master.get('private_ip')),
-                default_user=self._default_user,
-                ssh_key_path=self._ssh_key_path,
-            )
-            nodes.add(node)
-
-        return nodes
+        return self._nodes(cluster_info_key='masters')
 
     @property
     def agents(self) -> Set[Node]:
         """
         Return all DC/OS agent :class:`.node.Node` s.
         """
-        nodes = set([])
-        cluster_agents = list(self.cluster_info['private_agents'])
-        for priv_agent in cluster_agents:
-            node = Node(
-                public_ip_address=IPv4Address(priv_agent.get('public_ip')),
-                private_ip_address=IPv4Address(priv_agent.get('private_ip')),
-                default_user=self._default_user,
-                ssh_key_path=self._ssh_key_path,
-            )
-            nodes.add(node)
-
-        return nodes
+        return self._nodes(cluster_info_key='private_agents')
 
     @property
     def public_agents(self) -> Set[Node]:
         """
         Return all DC/OS public agent :class:`.node.Node` s.
         """
-        nodes = set([])
-        cluster_public_agents = list(self.cluster_info['public_agents'])
-        for pub_agent in cluster_public_agents:
-            node = Node(
-                public_ip_address=IPv4Address(pub_agent.get('public_ip')),
-                private_ip_address=IPv4Address(pub_agent.get('private_ip')),
-                default_user=self._default_user,
-                ssh_key_path=self._ssh_key_path,
-            )
-            nodes.add(node)
-
-        return nodes
+        return self._nodes(cluster_info_key='public_agents')
@@ -100,6 +100,19 @@ class ClusterManager(abc.ABC):
         Destroy all nodes in the cluster.
         """
 
+    def snapshot(self, snapshot_dir: Path) -> None:
+        """
+        Take a snapshot of the cluster which new clusters can be created from.
+
+        Args:
+            snapshot_dir: A directory, which does not exist, to create the
+                snapshot in.
+
+        Raises:
+            NotImplementedError: The backend does not support snapshots.
+        """
+        raise NotImplementedError
+
     @property
     @abc.abstractmethod
     def masters(self) -> Set[Node]:
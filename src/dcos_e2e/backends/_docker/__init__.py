@@ -5,12 +5,25 @@ Helpers for creating and interacting with clusters on Docker.
 import socket
 import stat
 import subprocess
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from ipaddress import IPv4Address
 from pathlib import Path
 from shutil import copyfile, copytree, rmtree
 from tempfile import gettempdir
-from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Type
+from typing import (  # noqa: F401
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+)
 
 import docker
 import yaml
@@ -20,17 +33,56 @@ from cryptography.hazmat.primitives.asymmetric import rsa
 from docker.types import Mount
 
 from dcos_e2e._common import get_logger, run_subprocess
+from dcos_e2e._download_cache import fetch_file
+from dcos_e2e._node_transports import forget_container
 from dcos_e2e.backends._base_classes import ClusterBackend, ClusterManager
 from dcos_e2e.distributions import Distribution
 from dcos_e2e.docker_storage_drivers import DockerStorageDriver
 from dcos_e2e.docker_versions import DockerVersion
 from dcos_e2e.node import Node, Output, Transport
 
-from ._containers import start_dcos_container
+from ._containers import (
+    BOOTSTRAP_TMP_PATH,
+    NODE_TMPFS_MOUNTS,
+    add_authorized_key,
+    node_mounts,
+    remove_containers,
+    start_dcos_container,
+)
 from ._docker_build import build_docker_image
+from ._genconf_cache import (
+    genconf_cache_key,
+    link_tree,
+    restore_genconf_output,
+    store_genconf_output,
+)
+from ._package_store import (
+    PACKAGE_STORE_INSTALL_SCRIPT,
+    mount_package_store,
+    package_store_mount,
+    prepare_package_store,
+)
+from ._snapshot import Snapshot, create_snapshot, restore_dcos_container
+from ._warm_pool import PooledContainer  # noqa: F401
+from ._warm_pool import WarmPool
 
 LOGGER = get_logger(__name__)
 
+# The number of sets of ``genconf`` output to keep for reuse by later clusters.
+_GENCONF_CACHE_ENTRIES = 3
+
+# The number of installers downloaded from URLs to keep for reuse by later
+# clusters.
+_INSTALLER_CACHE_ENTRIES = 3
+
+# The number of clusters whose extracted bootstrap tarball and packages are
+# kept for reuse by later clusters.
+_PACKAGE_STORE_ENTRIES = 3
+
+# The maximum number of bytes of output from ``--genconf`` to keep in memory.
+# This output is logged, and it is only kept for errors.
+_GENCONF_OUTPUT_LIMIT = 1024 * 1024
+
 
 def _write_key_pair(public_key_path: Path, private_key_path: Path) -> None:
     """
@@ -63,6 +115,70 @@ def _write_key_pair(public_key_path: Path, private_key_path: Path) -> None:
     private_key_path.chmod(mode=stat.S_IRUSR)
 
 
+def _run_dcos_install_script(
+    node: Node,
+    role: str,
+    dcos_install_path: Path,
+    package_store: bool,
+) -> None:
+    """
+    Run ``dcos_install.sh`` on a node, and log its output and how long it
+    took.
+
+    Args:
+        node: The node to install DC/OS on.
+        role: The role to install, as given to ``dcos_install.sh``.
+        dcos_install_path: The path to ``dcos_install.sh`` on the node.
+        package_store: Whether to mount the package store on the node first.
+
+    Raises:
+        CalledProcessError: There was an error installing DC/OS on the node.
+    """
+    dcos_install_args = [
+        '/bin/bash',
+        str(dcos_install_path),
+        '--no-block-dcos-setup',
+        role,
+    ]
+
+    start_time = time.monotonic()
+    try:
+        if package_store:
+            mount_package_store(node=node)
+        result = node.run(args=dcos_install_args)
+    except subprocess.CalledProcessError as ex:  # pragma: no cover
+        LOGGER.error(
+            'Installing DC/OS ({role}) on {node} failed after {seconds:.1f} '
+            'seconds.'.format(
+                role=role,
+                node=node,
+                seconds=time.monotonic() - start_time,
+            ),
+        )
+        LOGGER.error(ex.stdout)
+        LOGGER.error(ex.stderr)
+        raise
+
+    LOGGER.info(
+        'Installed DC/OS ({role}) on {node} in {seconds:.1f} seconds.'.format(
+            role=role,
+            node=node,
+            seconds=time.monotonic() - start_time,
+        ),
+    )
+    LOGGER.debug(result.stdout)
+
+
+def _container_number(
+    container: docker.models.containers.Container,
+    prefix: str,
+) -> int:
+    """
+    Return the number at the end of the name of a node container.
+    """
+    return int(container.name[len(prefix):])
+
+
 def _get_open_port() -> int:
     """
     Return a free port.
@@ -128,6 +244,13 @@ class Docker(ClusterBackend):
         transport: Transport = Transport.DOCKER_EXEC,
         network: Optional[docker.models.networks.Network] = None,
         one_master_host_port_map: Optional[Dict[str, int]] = None,
+        max_parallel_nodes: int = 8,
+        docker_tarball_dir: Optional[Path] = None,
+        warm_pool_size: int = 0,
+        snapshot_dir: Optional[Path] = None,
+        kill_on_destroy: bool = False,
+        overlap_install_roles: bool = False,
+        shared_package_store: bool = False,
     ) -> None:
         """
         Create a configuration for a Docker cluster backend.
@@ -140,6 +263,9 @@ class Docker(ClusterBackend):
                 created. These files will be deleted when the cluster is
                 destroyed.
                 This is equivalent to `dir` in :py:func:`tempfile.mkstemp`.
+                Files generated by DC/OS installers are also cached in this
+                directory, so that later clusters with the same installer and
+                configuration can reuse them.
             custom_container_mounts: Custom mounts add to all node containers.
                 See `mounts` in `Containers.run`_.
             custom_master_mounts: Custom mounts add to master node containers.
@@ -177,10 +303,59 @@ class Docker(ClusterBackend):
                 master only if there are multiple master nodes. See `ports` in
                 `Containers.run`_. Currently, only Transmission Control
                 Protocol is supported.
+            max_parallel_nodes: The maximum number of node containers to create
+                and start at the same time, and the maximum number of nodes to
+                install DC/OS on at the same time.
+            docker_tarball_dir: A directory which caches Docker static binary
+                tarballs, named as in their download URLs, for example
+                ``docker-1.13.1.tgz``. If the tarball for ``docker_version``
+                is not in this directory, it is downloaded there. Node images
+                are then built without internet access. If this is ``None``,
+                Docker is downloaded each time a node image is built.
+            warm_pool_size: The number of started master containers and the
+                number of started agent containers to keep ready for new
+                clusters. Nodes without custom labels, mounts or ports are
+                taken from this pool, and the pool is refilled in the
+                background after a cluster is created. The refill runs in a
+                daemon thread, so the process does not wait for it to exit.
+                Containers which are being started when the process exits are
+                removed. Ready pooled containers are labeled
+                ``dcos_e2e.warm_pool`` and are not removed when clusters are
+                destroyed or when the process exits. ``minidcos docker
+                clean`` removes them. Stopped pooled containers are removed
+                when the pool is refilled. Nodes taken from the pool are
+                renamed, but their hostnames and the ``container``
+                environment variable keep the pool name, such as
+                ``dcos-e2e-pool-<id>-0``, so they do not match the container
+                names. If this is ``0``, no pool is used.
+            snapshot_dir: A directory which holds a snapshot made by
+                :py:meth:`~dcos_e2e.cluster.Cluster.snapshot`. If this is
+                given, clusters are created with the installed state of the
+                snapshot, and must have the same number of each kind of node.
+                Nodes have the IP addresses of the nodes which the snapshot
+                was taken of, so ``network`` must have them in its subnet,
+                and no other containers may have them. If ``network`` is not
+                given, the network which the snapshot was taken on is used.
+            kill_on_destroy: Whether to kill node containers when a cluster is
+                destroyed, rather than waiting for each node to shut down.
+                This makes destroying clusters faster, and is useful for
+                clusters which are thrown away, for example in CI.
+            overlap_install_roles: Whether to install DC/OS on agents at the
+                same time as on masters. By default, DC/OS is installed on all
+                masters before it is installed on any agents.
+            shared_package_store: Whether to extract DC/OS packages once on
+                the host, rather than on every node. Extracted packages are
+                kept in the workspace directory, shared by clusters, and each
+                node mounts them as the read-only lower layer of an overlay
+                file system on ``/opt/mesosphere``. Nodes of clusters which
+                use this are not taken from the warm pool, and snapshots
+                cannot be taken of these clusters.
 
         Attributes:
             workspace_dir: The directory in which large temporary files will be
                 created. These files will be deleted at the end of a test run.
+                Files generated by DC/OS installers are also cached in this
+                directory.
             custom_container_mounts: Custom mounts add to all node containers.
                 See `mounts` in `Containers.run`_.
             custom_master_mounts: Custom mounts add to master node containers.
@@ -216,6 +391,22 @@ class Docker(ClusterBackend):
                 master only if there are multiple master nodes. See `ports` in
                 `Containers.run`_. Currently, only Transmission Control
                 Protocol is supported.
+            max_parallel_nodes: The maximum number of node containers to create
+                and start at the same time, and the maximum number of nodes to
+                install DC/OS on at the same time.
+            docker_tarball_dir: A directory which caches Docker static binary
+                tarballs, or ``None``.
+            warm_pool_size: The number of started master containers and the
+                number of started agent containers to keep ready for new
+                clusters.
+            snapshot_dir: A directory which holds a snapshot to create
+                clusters from, or ``None``.
+            kill_on_destroy: Whether to kill node containers when a cluster is
+                destroyed, rather than waiting for each node to shut down.
+            overlap_install_roles: Whether to install DC/OS on agents at the
+                same time as on masters.
+            shared_package_store: Whether to extract DC/OS packages once on
+                the host, rather than on every node.
             container_name_prefix: The prefix that all container names will
                 start with. This is useful, for example, for later finding all
                 containers started with this backend.
@@ -224,6 +415,12 @@ class Docker(ClusterBackend):
             http://docker-py.readthedocs.io/en/stable/containers.html#docker.models.containers.ContainerCollection.run
         """
         self.docker_version = docker_version
+        self.docker_tarball_dir = docker_tarball_dir
+        self.warm_pool_size = warm_pool_size
+        self.snapshot_dir = snapshot_dir
+        self.kill_on_destroy = kill_on_destroy
+        self.overlap_install_roles = overlap_install_roles
+        self.shared_package_store = shared_package_store
         self.workspace_dir = workspace_dir or Path(gettempdir())
         self.custom_container_mounts = custom_container_mounts or []
         self.custom_master_mounts = custom_master_mounts or []
@@ -240,6 +437,7 @@ class Docker(ClusterBackend):
         self.network = network
         self.one_master_host_port_map = one_master_host_port_map or {}
         self.container_name_prefix = container_name_prefix
+        self.max_parallel_nodes = max_parallel_nodes
 
     @property
     def cluster_cls(self) -> Type['DockerCluster']:
@@ -281,6 +479,18 @@ class DockerCluster(ClusterManager):
         """
         self._default_user = 'root'
         self._default_transport = cluster_backend.transport
+        self._kill_on_destroy = cluster_backend.kill_on_destroy
+        self._max_parallel_nodes = cluster_backend.max_parallel_nodes
+        self._overlap_install_roles = cluster_backend.overlap_install_roles
+
+        snapshot = None  # type: Optional[Snapshot]
+        if cluster_backend.snapshot_dir is not None:
+            snapshot = Snapshot(directory=cluster_backend.snapshot_dir)
+            snapshot.check_node_counts(
+                masters=masters,
+                agents=agents,
+                public_agents=public_agents,
+            )
 
         # To avoid conflicts, we use random container names.
         # We use the same random string for each container in a cluster so
@@ -295,6 +505,9 @@ class DockerCluster(ClusterManager):
         # This helps running tests in parallel without conflicts and it
         # reduces the chance of side-effects affecting sequential tests.
         workspace_dir = cluster_backend.workspace_dir
+        self._genconf_cache_dir = Path(workspace_dir) / 'genconf-cache'
+        self._installer_cache_dir = Path(workspace_dir) / 'installer-cache'
+        self._package_store_dir = Path(workspace_dir) / 'package-store'
         self._path = Path(workspace_dir) / uuid.uuid4().hex / self._cluster_id
         self._path.mkdir(exist_ok=True, parents=True)
         self._path = self._path.resolve()
@@ -324,102 +537,63 @@ class DockerCluster(ClusterManager):
         self._master_prefix = self._cluster_id + '-master-'
         self._agent_prefix = self._cluster_id + '-agent-'
         self._public_agent_prefix = self._cluster_id + '-public-agent-'
+        # Nodes by container name prefix.
+        # This is filled when nodes are first requested, after the cluster is
+        # created, and it is cleared when nodes are destroyed.
+        self._node_sets = None  # type: Optional[Dict[str, Set[Node]]]
 
         bootstrap_genconf_path = self._genconf_dir / 'serve'
         bootstrap_genconf_path.mkdir()
-        self._bootstrap_tmp_path = Path('/opt/dcos_install_tmp')
-
-        # See https://success.docker.com/KBase/Different_Types_of_Volumes
-        # for a definition of different types of volumes.
-        node_tmpfs_mounts = {
-            '/run': 'rw,exec,nosuid,size=2097152k',
-            '/tmp': 'rw,exec,nosuid,size=2097152k',
-        }
-
-        docker_image_tag = 'mesosphere/dcos-docker'
-        build_docker_image(
-            tag=docker_image_tag,
-            linux_distribution=cluster_backend.linux_distribution,
-            docker_version=cluster_backend.docker_version,
-        )
-
-        certs_mount = Mount(
-            source=str(certs_dir.resolve()),
-            target='/etc/docker/certs.d',
-            read_only=False,
-            type='bind',
-        )
-
-        bootstrap_genconf_mount = Mount(
-            source=str(bootstrap_genconf_path),
-            target=str(self._bootstrap_tmp_path),
-            read_only=True,
-            type='bind',
-        )
-
-        # Mount cgroups into agents for Mesos DRF.
-        # See https://jira.mesosphere.com/browse/DCOS_OSS-4475 for removing
-        # this.
-        cgroup_mount = Mount(
-            source='/sys/fs/cgroup',
-            target='/sys/fs/cgroup',
-            read_only=True,
-            type='bind',
-        )
-
-        var_lib_docker_mount = Mount(
-            source=None,
-            target='/var/lib/docker',
-        )
-
-        opt_mount = Mount(
-            source=None,
-            target='/opt',
-        )
-
-        mesos_slave_mount = Mount(
-            source=None,
-            target='/var/lib/mesos/slave',
-        )
+        self._bootstrap_tmp_path = BOOTSTRAP_TMP_PATH
+
+        # Extracted packages are linked into this directory when DC/OS is
+        # installed, if the cluster uses the shared package store.
+        self._package_store = None  # type: Optional[Path]
+        package_store_mounts = []  # type: List[Mount]
+        if cluster_backend.shared_package_store:
+            self._package_store = self._path / 'package-store'
+            self._package_store.mkdir()
+            package_store_mounts = [
+                package_store_mount(package_store_dir=self._package_store),
+            ]
 
         agent_mounts = [
-            certs_mount,
-            bootstrap_genconf_mount,
-            cgroup_mount,
-            var_lib_docker_mount,
-            opt_mount,
-            mesos_slave_mount,
+            *node_mounts(
+                certs_dir=certs_dir,
+                genconf_serve_dir=bootstrap_genconf_path,
+                agent=True,
+            ),
+            *package_store_mounts,
             *cluster_backend.custom_container_mounts,
         ]
 
         master_mounts = [
-            certs_mount,
-            bootstrap_genconf_mount,
-            var_lib_docker_mount,
-            opt_mount,
+            *node_mounts(
+                certs_dir=certs_dir,
+                genconf_serve_dir=bootstrap_genconf_path,
+                agent=False,
+            ),
+            *package_store_mounts,
             *cluster_backend.custom_container_mounts,
             *cluster_backend.custom_master_mounts,
         ]
 
+        node_specs = []  # type: List[Dict[str, Any]]
         for master_container_number in range(masters):
             ports = {}  # type: Dict[str, int]
             if master_container_number == 0:
                 ports = cluster_backend.one_master_host_port_map
-            start_dcos_container(
-                container_base_name=self._master_prefix,
-                container_number=master_container_number,
-                mounts=master_mounts,
-                tmpfs=node_tmpfs_mounts,
-                docker_image=docker_image_tag,
-                labels={
-                    **cluster_backend.docker_container_labels,
-                    **cluster_backend.docker_master_labels,
+            node_specs.append(
+                {
+                    'container_base_name': self._master_prefix,
+                    'container_number': master_container_number,
+                    'mounts': master_mounts,
+                    'labels': {
+                        **cluster_backend.docker_container_labels,
+                        **cluster_backend.docker_master_labels,
+                    },
+                    'ports': ports,
                 },
-                public_key_path=public_key_path,
-                docker_storage_driver=(cluster_backend.docker_storage_driver),
-                docker_version=cluster_backend.docker_version,
-                network=cluster_backend.network,
-                ports=ports,
             )
 
         for nodes, prefix, labels, mounts in (
@@ -437,24 +611,180 @@ class DockerCluster(ClusterManager):
             ),
         ):
             for agent_container_number in range(nodes):
-                start_dcos_container(
-                    container_base_name=prefix,
-                    container_number=agent_container_number,
-                    mounts=mounts,
-                    tmpfs=node_tmpfs_mounts,
-                    docker_image=docker_image_tag,
-                    labels={
-                        **cluster_backend.docker_container_labels,
-                        **labels,
+                node_specs.append(
+                    {
+                        'container_base_name': prefix,
+                        'container_number': agent_container_number,
+                        'mounts': mounts,
+                        'labels': {
+                            **cluster_backend.docker_container_labels,
+                            **labels,
+                        },
                     },
+                )
+
+        # Nodes which are taken from the warm pool, with their host
+        # directories.
+        self._pooled_containers = []  # type: List[PooledContainer]
+        warm_pool = None  # type: Optional[WarmPool]
+        if snapshot is not None:
+            network = cluster_backend.network
+            if network is None:
+                client = docker.from_env(version='auto')
+                network = client.networks.get(snapshot.network_name)
+            start_node = partial(
+                restore_dcos_container,
+                snapshot=snapshot,
+                network=network,
+            )  # type: Callable[..., docker.models.containers.Container]
+            for prefix, role in (
+                (self._master_prefix, 'master'),
+                (self._agent_prefix, 'agent'),
+                (self._public_agent_prefix, 'public_agent'),
+            ):
+                role_specs = [
+                    node_spec for node_spec in node_specs
+                    if node_spec['container_base_name'] == prefix
+                ]
+                for node_spec, snapshot_node in zip(
+                    role_specs,
+                    snapshot.nodes(role=role),
+                ):
+                    node_spec['snapshot_node'] = snapshot_node
+        else:
+            docker_image_tag = build_docker_image(
+                linux_distribution=cluster_backend.linux_distribution,
+                docker_version=cluster_backend.docker_version,
+                docker_tarball_dir=cluster_backend.docker_tarball_dir,
+            )
+            start_node = partial(
+                start_dcos_container,
+                docker_image=docker_image_tag,
+                docker_storage_driver=cluster_backend.docker_storage_driver,
+                docker_version=cluster_backend.docker_version,
+                network=cluster_backend.network,
+            )
+
+        if snapshot is None and cluster_backend.warm_pool_size > 0:
+            warm_pool = WarmPool(
+                size=cluster_backend.warm_pool_size,
+                pool_dir=Path(workspace_dir) / 'dcos-e2e-warm-pool',
+                docker_image=docker_image_tag,
+                docker_storage_driver=cluster_backend.docker_storage_driver,
+                docker_version=cluster_backend.docker_version,
+                network=cluster_backend.network,
+            )
+            node_specs = self._take_from_warm_pool(
+                warm_pool=warm_pool,
+                node_specs=node_specs,
+                public_key_path=public_key_path,
+            )
+
+        # Starting a node container involves many sequential steps, most of
+        # which wait on the container rather than on this process.
+        # Therefore we start the containers concurrently.
+        with ThreadPoolExecutor(
+            max_workers=cluster_backend.max_parallel_nodes,
+        ) as executor:
+            futures = {
+                executor.submit(
+                    start_node,
+                    tmpfs=NODE_TMPFS_MOUNTS,
                     public_key_path=public_key_path,
-                    docker_storage_driver=(
-                        cluster_backend.docker_storage_driver
+                    **node_spec,
+                ): node_spec['container_base_name'] + str(
+                    node_spec['container_number'],
+                )
+                for node_spec in node_specs
+            }
+
+        errors = []  # type: List[BaseException]
+        for future, container_name in futures.items():
+            exception = future.exception()
+            if exception is not None:
+                LOGGER.error(
+                    'Error starting container {name}: {exception}'.format(
+                        name=container_name,
+                        exception=exception,
+                    ),
+                )
+                errors.append(exception)
+
+        if errors:
+            # Do not leave behind containers which did start, or a
+            # workspace which nothing will clean up.
+            self._remove_containers()
+            self._remove_pooled_container_dirs()
+            rmtree(path=str(self._path), ignore_errors=True)
+            raise errors[0]
+
+        if warm_pool is not None:
+            warm_pool.refill_in_background()
+
+    def _take_from_warm_pool(
+        self,
+        warm_pool: WarmPool,
+        node_specs: List[Dict[str, Any]],
+        public_key_path: Path,
+    ) -> List[Dict[str, Any]]:
+        """
+        Take containers from the warm pool for the given nodes where possible.
+
+        Pooled containers are only used for nodes without custom labels,
+        mounts or ports, as these cannot be changed after a container is
+        created.
+
+        Args:
+            warm_pool: The pool to take containers from.
+            node_specs: Arguments to ``start_dcos_container`` for each node.
+            public_key_path: The path to an SSH public key to put on nodes.
+
+        Returns:
+            The specifications of nodes which must still be started.
+        """
+        remaining_specs = []  # type: List[Dict[str, Any]]
+        for node_spec in node_specs:
+            agent = node_spec['container_base_name'] != self._master_prefix
+            pooled = None  # type: Optional[PooledContainer]
+            default_mounts = node_mounts(
+                certs_dir=self._path / 'include' / 'certs',
+                genconf_serve_dir=self._genconf_dir / 'serve',
+                agent=agent,
+            )
+            customized = any(
+                [
+                    node_spec['labels'],
+                    node_spec.get('ports'),
+                    node_spec['mounts'] != default_mounts,
+                ],
+            )
+            if not customized:
+                pooled = warm_pool.claim(
+                    agent=agent,
+                    name=node_spec['container_base_name'] + str(
+                        node_spec['container_number'],
                     ),
-                    docker_version=cluster_backend.docker_version,
-                    network=cluster_backend.network,
                 )
 
+            if pooled is None:
+                remaining_specs.append(node_spec)
+                continue
+
+            self._pooled_containers.append(pooled)
+            add_authorized_key(
+                container=pooled.container,
+                public_key_path=public_key_path,
+            )
+
+        return remaining_specs
+
+    def _remove_pooled_container_dirs(self) -> None:
+        """
+        Remove the host directories of containers taken from the warm pool.
+        """
+        for pooled in self._pooled_containers:
+            rmtree(path=str(pooled.directory), ignore_errors=True)
+
     def install_dcos_from_url_with_bootstrap_node(
         self,
         dcos_installer: str,
@@ -465,7 +795,11 @@ class DockerCluster(ClusterManager):
     ) -> None:
         """
         Install DC/OS from a URL with a bootstrap node.
-        This is not supported and simply raises a ``NotImplementedError``.
+
+        The installer is downloaded once on the host, and kept in a cache in
+        the workspace directory which is shared by clusters.
+        It is then used as with
+        :py:meth:`install_dcos_from_path_with_bootstrap_node`.
 
         Args:
             dcos_installer: The URL string to an installer to install DC/OS
@@ -479,11 +813,23 @@ class DockerCluster(ClusterManager):
                 the installer node before installing DC/OS.
 
         Raises:
-            NotImplementedError: ``NotImplementedError`` because the Docker
-                backend does not support the DC/OS advanced installation
-                method with a bootstrap node.
+            requests.RequestException: The installer could not be downloaded.
+            CalledProcessError: There was an error installing DC/OS on a node.
         """
-        raise NotImplementedError
+        installer = self._path / 'dcos_generate_config.sh'
+        fetch_file(
+            url=dcos_installer,
+            destination=installer,
+            cache_dir=self._installer_cache_dir,
+            max_entries=_INSTALLER_CACHE_ENTRIES,
+        )
+        self.install_dcos_from_path_with_bootstrap_node(
+            dcos_installer=installer,
+            dcos_config=dcos_config,
+            ip_detect_path=ip_detect_path,
+            output=output,
+            files_to_copy_to_genconf_dir=files_to_copy_to_genconf_dir,
+        )
 
     @property
     def base_config(self) -> Dict[str, Any]:
@@ -578,57 +924,194 @@ class DockerCluster(ClusterManager):
             Output.NO_CAPTURE: False,
         }[output]
 
-        run_subprocess(
-            args=genconf_args,
-            env={
-                'PORT': str(installer_port),
-                'DCOS_INSTALLER_CONTAINER_NAME': installer_ctr,
-            },
-            log_output_live=log_output_live,
-            cwd=str(self._path),
-            pipe_output=capture_output,
+        # The output of ``--genconf`` only depends on the installer and the
+        # ``genconf`` directory, so it is shared between clusters.
+        serve_dir = self._genconf_dir / 'serve'
+        cache_key = genconf_cache_key(
+            installer=dcos_installer,
+            genconf_dir=self._genconf_dir,
+        )
+        restored = restore_genconf_output(
+            cache_dir=self._genconf_cache_dir,
+            key=cache_key,
+            serve_dir=serve_dir,
         )
+        if not restored:
+            run_subprocess(
+                args=genconf_args,
+                env={
+                    'PORT': str(installer_port),
+                    'DCOS_INSTALLER_CONTAINER_NAME': installer_ctr,
+                },
+                log_output_live=log_output_live,
+                cwd=str(self._path),
+                pipe_output=capture_output,
+                output_limit=_GENCONF_OUTPUT_LIMIT,
+            )
+            store_genconf_output(
+                cache_dir=self._genconf_cache_dir,
+                key=cache_key,
+                serve_dir=serve_dir,
+                max_entries=_GENCONF_CACHE_ENTRIES,
+            )
+
+        package_store = False
+        install_script_name = 'dcos_install.sh'
+        if self._package_store is not None:
+            package_store = prepare_package_store(
+                serve_dir=serve_dir,
+                store_dir=self._package_store_dir,
+                destination=self._package_store,
+                max_entries=_PACKAGE_STORE_ENTRIES,
+            )
+        if package_store:
+            install_script_name = PACKAGE_STORE_INSTALL_SCRIPT
+
+        # Containers from the warm pool mount their own directories in place
+        # of this cluster's ``serve`` directory.
+        for pooled in self._pooled_containers:
+            link_tree(src=serve_dir, dst=pooled.serve_dir)
+
+        # Each node reads the same ``serve`` directory, so DC/OS is installed
+        # on many nodes at the same time.
+        phases = [
+            [('master', self.masters)],
+            [('slave', self.agents), ('slave_public', self.public_agents)],
+        ]
+        if self._overlap_install_roles:
+            phases = [[*phases[0], *phases[1]]]
+
+        dcos_install_path = self._bootstrap_tmp_path / install_script_name
+        for phase in phases:
+            with ThreadPoolExecutor(
+                max_workers=self._max_parallel_nodes,
+            ) as executor:
+                futures = [
+                    executor.submit(
+                        _run_dcos_install_script,
+                        node=node,
+                        role=role,
+                        dcos_install_path=dcos_install_path,
+                        package_store=package_store,
+                    ) for role, nodes in phase for node in nodes
+                ]
+
+            for future in futures:
+                # Errors from every node have already been logged.
+                error = future.exception()
+                if error is not None:
+                    raise error
+
+    def snapshot(self, snapshot_dir: Path) -> None:
+        """
+        Take a snapshot of the cluster which new clusters can be created from
+        with the ``snapshot_dir`` option of the Docker backend.
+
+        The file system of each node, other than its volumes, is committed to
+        an image in the ``dcos-e2e-snapshot`` repository.
+        Volumes are archived in ``snapshot_dir``.
+        Nodes are paused while the snapshot is taken.
 
-        for role, nodes in [
-            ('master', self.masters),
-            ('slave', self.agents),
-            ('slave_public', self.public_agents),
-        ]:
-            dcos_install_args = [
-                '/bin/bash',
-                str(self._bootstrap_tmp_path / 'dcos_install.sh'),
-                '--no-block-dcos-setup',
-                role,
+        Args:
+            snapshot_dir: A directory, which does not exist, to create the
+                snapshot in.
+
+        Raises:
+            ValueError: The cluster is not on a custom network, or the cluster
+                uses the shared package store.
+        """
+        if self._package_store is not None:
+            message = (
+                'Snapshots cannot be taken of clusters which use the shared '
+                'package store, as the package store is not in node volumes.'
+            )
+            raise ValueError(message)
+
+        client = docker.from_env(version='auto')
+        filters = {'name': self._cluster_id}
+        containers = client.containers.list(filters=filters)
+        # Nodes are ordered by the number at the end of their container
+        # names.
+        containers_by_role = {}
+        for prefix, role in (
+            (self._master_prefix, 'master'),
+            (self._agent_prefix, 'agent'),
+            (self._public_agent_prefix, 'public_agent'),
+        ):
+            role_containers = [
+                container for container in containers
+                if container.name.startswith(prefix)
             ]
+            containers_by_role[role] = sorted(
+                role_containers,
+                key=partial(_container_number, prefix=prefix),
+            )
+
+        create_snapshot(
+            containers=containers_by_role,
+            snapshot_dir=snapshot_dir,
+        )
 
-            for node in nodes:
-                try:
-                    node.run(args=dcos_install_args)
-                except subprocess.CalledProcessError as ex:  # pragma: no cover
-                    LOGGER.error(ex.stdout)
-                    LOGGER.error(ex.stderr)
-                    raise
+    def _remove_containers(self) -> None:
+        """
+        Stop and remove all containers, running or not, which belong to this
+        cluster.
+
+        The containers are found with one listing and removed at the same
+        time.
+        """
+        client = docker.from_env(version='auto')
+        filters = {'name': self._cluster_id}
+        containers = client.containers.list(all=True, filters=filters)
+        ip_addresses = set()  # type: Set[str]
+        for container in containers:
+            networks = container.attrs['NetworkSettings']['Networks']
+            for network in networks.values():
+                if network['IPAddress']:
+                    ip_addresses.add(network['IPAddress'])
+
+        try:
+            remove_containers(
+                containers=containers,
+                kill=self._kill_on_destroy,
+                max_workers=self._max_parallel_nodes,
+            )
+        finally:
+            for ip_address in ip_addresses:
+                forget_container(ip_address=IPv4Address(ip_address))
+            self._node_sets = None
 
     def destroy_node(self, node: Node) -> None:
         """
         Destroy a node in the cluster.
         """
         client = docker.from_env(version='auto')
-        containers = client.containers.list()
+        filters = {'name': self._cluster_id}
+        containers = client.containers.list(filters=filters)
+        node_containers = []
         for container in containers:
             networks = container.attrs['NetworkSettings']['Networks']
-            for net in networks:
-                if networks[net]['IPAddress'] == str(node.public_ip_address):
-                    container.stop()
-                    container.remove(v=True)
+            ip_addresses = set(
+                network['IPAddress'] for network in networks.values()
+            )
+            if str(node.public_ip_address) in ip_addresses:
+                node_containers.append(container)
+
+        remove_containers(
+            containers=node_containers,
+            kill=self._kill_on_destroy,
+            max_workers=self._max_parallel_nodes,
+        )
+
+        forget_container(ip_address=node.public_ip_address)
+        self._node_sets = None
 
     def destroy(self) -> None:
         """
         Destroy all nodes in the cluster.
         """
-        for node in {*self.masters, *self.agents, *self.public_agents}:
-            self.destroy_node(node=node)
-
+        self._remove_containers()
+        self._remove_pooled_container_dirs()
         rmtree(path=str(self._path), ignore_errors=True)
 
     def _nodes(self, container_base_name: str) -> Set[Node]:
@@ -639,12 +1122,35 @@ class DockerCluster(ClusterManager):
         Returns: ``Node``s corresponding to containers with names starting
             with ``container_base_name``.
         """
+        if self._node_sets is None:
+            self._node_sets = self._get_node_sets()
+        return set(self._node_sets[container_base_name])
+
+    def _get_node_sets(self) -> Dict[str, Set[Node]]:
+        """
+        Return ``Node``s corresponding to the containers in this cluster, by
+        container name prefix.
+
+        This lists the containers once for all of the prefixes.
+        """
         client = docker.from_env(version='auto')
-        filters = {'name': container_base_name}
+        filters = {'name': self._cluster_id}
         containers = client.containers.list(filters=filters)
 
-        nodes = set([])
+        node_sets = {
+            self._master_prefix: set([]),
+            self._agent_prefix: set([]),
+            self._public_agent_prefix: set([]),
+        }  # type: Dict[str, Set[Node]]
         for container in containers:
+            container_base_names = [
+                name for name in node_sets
+                if container.name.startswith(name)
+            ]
+            if not container_base_names:
+                continue
+
+            [container_base_name] = container_base_names
             networks = container.attrs['NetworkSettings']['Networks']
             network_name = 'bridge'
             if len(networks) != 1:
@@ -652,7 +1158,7 @@ class DockerCluster(ClusterManager):
             container_ip_address = IPv4Address(
                 networks[network_name]['IPAddress'],
             )
-            nodes.add(
+            node_sets[container_base_name].add(
                 Node(
                     public_ip_address=container_ip_address,
                     private_ip_address=container_ip_address,
@@ -661,7 +1167,7 @@ class DockerCluster(ClusterManager):
                     default_transport=self._default_transport,
                 ),
             )
-        return nodes
+        return node_sets
 
     @property
     def masters(self) -> Set[Node]:
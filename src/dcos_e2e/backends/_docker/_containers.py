@@ -5,14 +5,115 @@ Helpers for starting DC/OS containers.
 import configparser
 import io
 import shlex
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 
 import docker
+from docker.types import Mount
 
+from dcos_e2e._common import get_logger
 from dcos_e2e.docker_storage_drivers import DockerStorageDriver
 from dcos_e2e.docker_versions import DockerVersion
 
+LOGGER = get_logger(__name__)
+
+# The path on nodes at which the output of ``--genconf`` is mounted.
+BOOTSTRAP_TMP_PATH = Path('/opt/dcos_install_tmp')
+
+# Commands which write settings which depend on the cgroup of a node
+# container.
+_DOCKER_ENV_SETUP = (
+    'CGROUP=`grep memory /proc/1/cgroup | cut -d: -f3`; '
+    'echo "CGROUP_PARENT=$CGROUP/docker" >> '
+    '/etc/docker/env'
+)
+_MESOS_CGROUPS_ROOT_SETUP = (
+    'MESOS_CGROUPS_ROOT=`grep memory /proc/1/cgroup | cut -d: -f3`/mesos; '
+    'MESOS_CGROUPS_ROOT=${MESOS_CGROUPS_ROOT:1}; '
+    'echo "MESOS_CGROUPS_ROOT=$MESOS_CGROUPS_ROOT" >> '
+    '/var/lib/dcos/mesos-slave-common'
+)
+
+# See https://success.docker.com/KBase/Different_Types_of_Volumes
+# for a definition of different types of volumes.
+NODE_TMPFS_MOUNTS = {
+    '/run': 'rw,exec,nosuid,size=2097152k',
+    '/tmp': 'rw,exec,nosuid,size=2097152k',
+}
+
+
+def node_mounts(
+    certs_dir: Path,
+    genconf_serve_dir: Path,
+    agent: bool,
+) -> List[Mount]:
+    """
+    Return the mounts which every master or every agent container has.
+
+    Args:
+        certs_dir: A host directory to mount at ``/etc/docker/certs.d``.
+        genconf_serve_dir: A host directory which holds, or will hold, the
+            output of ``--genconf``.
+        agent: Whether the mounts are for an agent or public agent, rather
+            than for a master.
+    """
+    certs_mount = Mount(
+        source=str(certs_dir.resolve()),
+        target='/etc/docker/certs.d',
+        read_only=False,
+        type='bind',
+    )
+
+    bootstrap_genconf_mount = Mount(
+        source=str(genconf_serve_dir),
+        target=str(BOOTSTRAP_TMP_PATH),
+        read_only=True,
+        type='bind',
+    )
+
+    var_lib_docker_mount = Mount(
+        source=None,
+        target='/var/lib/docker',
+    )
+
+    opt_mount = Mount(
+        source=None,
+        target='/opt',
+    )
+
+    if not agent:
+        return [
+            certs_mount,
+            bootstrap_genconf_mount,
+            var_lib_docker_mount,
+            opt_mount,
+        ]
+
+    # Mount cgroups into agents for Mesos DRF.
+    # See https://jira.mesosphere.com/browse/DCOS_OSS-4475 for removing
+    # this.
+    cgroup_mount = Mount(
+        source='/sys/fs/cgroup',
+        target='/sys/fs/cgroup',
+        read_only=True,
+        type='bind',
+    )
+
+    mesos_slave_mount = Mount(
+        source=None,
+        target='/var/lib/mesos/slave',
+    )
+
+    return [
+        certs_mount,
+        bootstrap_genconf_mount,
+        cgroup_mount,
+        var_lib_docker_mount,
+        opt_mount,
+        mesos_slave_mount,
+    ]
+
 
 def _docker_service_file(
     storage_driver: DockerStorageDriver,
@@ -77,25 +178,19 @@ def _docker_service_file(
     return config_string.read()
 
 
-def start_dcos_container(
+def create_dcos_container(
     container_base_name: str,
     container_number: int,
     mounts: List[docker.types.Mount],
     tmpfs: Dict[str, str],
     docker_image: str,
     labels: Dict[str, str],
-    public_key_path: Path,
-    docker_storage_driver: DockerStorageDriver,
-    docker_version: DockerVersion,
     network: Optional[docker.models.networks.Network] = None,
     ports: Optional[Dict[str, int]] = None,
-) -> None:
+    ipv4_address: Optional[str] = None,
+) -> docker.models.containers.Container:
     """
-    Start a master, agent or public agent container.
-    In this container, start Docker and `sshd`.
-
-    Run Mesos without `systemd` support. This is not supported by DC/OS.
-    See https://jira.mesosphere.com/browse/DCOS_OSS-1131.
+    Create, but do not start, a master, agent or public agent container.
 
     Args:
         container_base_name: The start of the container name.
@@ -105,16 +200,15 @@ def start_dcos_container(
         tmpfs: See `tmpfs` on
             http://docker-py.readthedocs.io/en/latest/containers.html.
         docker_image: The name of the Docker image to use.
-        labels: Docker labels to add to the cluster node containers. Akin to
-            the dictionary option in
-            http://docker-py.readthedocs.io/en/stable/containers.html.
-        public_key_path: The path to an SSH public key to put on the node.
-        docker_version: The Docker version to use on the node.
-        docker_storage_driver: The storage driver to use for Docker on the
-            node.
+        labels: Docker labels to add to the container.
         network: The network to connect the container to other than the default
-        ``docker0`` bridge network.
+            ``docker0`` bridge network.
         ports: The ports to expose on the host.
+        ipv4_address: The IP address to give the container on ``network``, or
+            ``None`` to let Docker choose one.
+
+    Returns:
+        The created container.
     """
     hostname = container_base_name + str(container_number)
     environment = {'container': hostname}
@@ -136,7 +230,63 @@ def start_dcos_container(
         ports=ports or {},
     )
     if network:
-        network.connect(container)
+        network.connect(container, ipv4_address=ipv4_address)
+    return container
+
+
+def start_dcos_container(
+    container_base_name: str,
+    container_number: int,
+    mounts: List[docker.types.Mount],
+    tmpfs: Dict[str, str],
+    docker_image: str,
+    labels: Dict[str, str],
+    public_key_path: Optional[Path],
+    docker_storage_driver: DockerStorageDriver,
+    docker_version: DockerVersion,
+    network: Optional[docker.models.networks.Network] = None,
+    ports: Optional[Dict[str, int]] = None,
+) -> docker.models.containers.Container:
+    """
+    Start a master, agent or public agent container.
+    In this container, start Docker and `sshd`.
+
+    Run Mesos without `systemd` support. This is not supported by DC/OS.
+    See https://jira.mesosphere.com/browse/DCOS_OSS-1131.
+
+    Args:
+        container_base_name: The start of the container name.
+        container_number: The end of the container name.
+        mounts: See `mounts` on
+            http://docker-py.readthedocs.io/en/latest/containers.html.
+        tmpfs: See `tmpfs` on
+            http://docker-py.readthedocs.io/en/latest/containers.html.
+        docker_image: The name of the Docker image to use.
+        labels: Docker labels to add to the cluster node containers. Akin to
+            the dictionary option in
+            http://docker-py.readthedocs.io/en/stable/containers.html.
+        public_key_path: The path to an SSH public key to put on the node, or
+            ``None`` to start the node without an authorized key.
+        docker_version: The Docker version to use on the node.
+        docker_storage_driver: The storage driver to use for Docker on the
+            node.
+        network: The network to connect the container to other than the default
+        ``docker0`` bridge network.
+        ports: The ports to expose on the host.
+
+    Returns:
+        The started container.
+    """
+    container = create_dcos_container(
+        container_base_name=container_base_name,
+        container_number=container_number,
+        mounts=mounts,
+        tmpfs=tmpfs,
+        docker_image=docker_image,
+        labels=labels,
+        network=network,
+        ports=ports,
+    )
     container.start()
 
     disable_systemd_support_cmd = (
@@ -144,13 +294,6 @@ def start_dcos_container(
         '/var/lib/dcos/mesos-slave-common'
     )
 
-    setup_mesos_cgroup_root = (
-        'MESOS_CGROUPS_ROOT=`grep memory /proc/1/cgroup | cut -d: -f3`/mesos; '
-        'MESOS_CGROUPS_ROOT=${MESOS_CGROUPS_ROOT:1}; '
-        'echo "MESOS_CGROUPS_ROOT=$MESOS_CGROUPS_ROOT" >> '
-        '/var/lib/dcos/mesos-slave-common'
-    )
-
     docker_service_name = 'docker.service'
     docker_service_text = _docker_service_file(
         storage_driver=docker_storage_driver,
@@ -164,26 +307,16 @@ def start_dcos_container(
         '>',
         docker_service_dst,
     ]
-    docker_env_setup = (
-        'CGROUP=`grep memory /proc/1/cgroup | cut -d: -f3`; '
-        'echo "CGROUP_PARENT=$CGROUP/docker" >> '
-        '/etc/docker/env'
-    )
-
-    public_key = public_key_path.read_text()
-    echo_key = ['echo', public_key, '>>', '/root/.ssh/authorized_keys']
-
     for cmd in [
         ['mkdir', '-p', '/var/lib/dcos'],
-        ['/bin/bash', '-c', docker_env_setup],
+        ['/bin/bash', '-c', _DOCKER_ENV_SETUP],
         ['mkdir', '-p', '/lib/systemd/system'],
         '/bin/bash -c "{cmd}"'.format(cmd=' '.join(echo_docker)),
         ['systemctl', 'enable', docker_service_name],
         ['systemctl', 'start', docker_service_name],
         ['/bin/bash', '-c', disable_systemd_support_cmd],
-        ['/bin/bash', '-c', setup_mesos_cgroup_root],
+        ['/bin/bash', '-c', _MESOS_CGROUPS_ROOT_SETUP],
         ['mkdir', '--parents', '/root/.ssh'],
-        '/bin/bash -c "{cmd}"'.format(cmd=' '.join(echo_key)),
         ['rm', '-f', '/run/nologin', '||', 'true'],
         ['systemctl', 'start', 'sshd'],
         # Work around https://jira.mesosphere.com/browse/DCOS_OSS-1361.
@@ -191,3 +324,132 @@ def start_dcos_container(
     ]:
         exit_code, output = container.exec_run(cmd=cmd)
         assert exit_code == 0, ' '.join(cmd) + ': ' + output.decode()
+
+    if public_key_path is not None:
+        add_authorized_key(
+            container=container,
+            public_key_path=public_key_path,
+        )
+
+    return container
+
+
+def add_authorized_key(
+    container: docker.models.containers.Container,
+    public_key_path: Path,
+) -> None:
+    """
+    Authorize an SSH public key for ``root`` on a node container.
+
+    Args:
+        container: The node container.
+        public_key_path: The path to an SSH public key to put on the node.
+    """
+    public_key = public_key_path.read_text()
+    echo_key = ['echo', public_key, '>>', '/root/.ssh/authorized_keys']
+    cmd = '/bin/bash -c "{cmd}"'.format(cmd=' '.join(echo_key))
+    exit_code, output = container.exec_run(cmd=cmd)
+    assert exit_code == 0, cmd + ': ' + output.decode()
+
+
+def setup_restored_container(
+    container: docker.models.containers.Container,
+) -> None:
+    """
+    Set up a node container which was started from the file system of another
+    node container.
+
+    Settings which depend on the cgroup of the container are written again,
+    and the services which use them are restarted.
+    Services which are not started at boot are started.
+
+    Args:
+        container: The started node container.
+    """
+    for cmd in [
+        ['sed', '-i', '/^CGROUP_PARENT=/d', '/etc/docker/env'],
+        ['/bin/bash', '-c', _DOCKER_ENV_SETUP],
+        [
+            'sed',
+            '-i',
+            '/^MESOS_CGROUPS_ROOT=/d',
+            '/var/lib/dcos/mesos-slave-common',
+        ],
+        ['/bin/bash', '-c', _MESOS_CGROUPS_ROOT_SETUP],
+        ['systemctl', 'restart', 'docker.service'],
+        ['rm', '-f', '/run/nologin'],
+        ['systemctl', 'start', 'sshd'],
+        ['systemd-tmpfiles', '--create', '--prefix', '/run/log/journal'],
+        [
+            'systemctl',
+            'try-restart',
+            'dcos-mesos-slave.service',
+            'dcos-mesos-slave-public.service',
+        ],
+    ]:
+        exit_code, output = container.exec_run(cmd=cmd)
+        assert exit_code == 0, ' '.join(cmd) + ': ' + output.decode()
+
+
+def _remove_container(
+    container: docker.models.containers.Container,
+    kill: bool,
+) -> None:
+    """
+    Remove a container and its anonymous volumes.
+    """
+    if kill:
+        container.remove(v=True, force=True)
+        return
+
+    container.stop()
+    container.remove(v=True)
+
+
+def remove_containers(
+    containers: Iterable[docker.models.containers.Container],
+    kill: bool,
+    max_workers: int,
+) -> None:
+    """
+    Remove containers and their anonymous volumes, at the same time.
+
+    Args:
+        containers: The containers to remove.
+        kill: Whether to kill the containers rather than stopping them.
+            Stopping a node container waits for ``systemd`` to shut down.
+        max_workers: The maximum number of containers to remove at the same
+            time.
+
+    Raises:
+        docker.errors.APIError: A container could not be removed. Other
+            containers are still removed.
+    """
+    containers = list(containers)
+    if not containers:
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(
+                _remove_container,
+                container=container,
+                kill=kill,
+            ): container.name
+            for container in containers
+        }
+
+    errors = []  # type: List[BaseException]
+    for future, container_name in futures.items():
+        exception = future.exception()
+        if exception is not None:
+            LOGGER.error(
+                'Error removing container {name}: {exception}'.format(
+                    name=container_name,
+                    exception=exception,
+                ),
+            )
+            errors.append(exception)
+
+    if errors:
+        raise errors[0]
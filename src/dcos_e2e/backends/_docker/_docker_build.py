@@ -1,14 +1,46 @@
 """
 Helpers for building Docker images.
+
+Images are tagged with a hash of everything which goes into them, so that an
+image which already exists is not built again, and so that clusters with
+different distributions or Docker versions do not share a tag.
 """
 
+import fcntl
+import hashlib
+import os
+import shutil
+import uuid
+from contextlib import contextmanager
 from pathlib import Path
+from tempfile import TemporaryDirectory, gettempdir
+from typing import Iterator, Optional
 
 import docker
+import requests
 
+from dcos_e2e._common import get_logger
 from dcos_e2e.distributions import Distribution
 from dcos_e2e.docker_versions import DockerVersion
 
+LOGGER = get_logger(__name__)
+
+# The repository which node images are tagged in.
+_IMAGE_REPOSITORY = 'mesosphere/dcos-docker'
+
+# A file which is locked while images are built, so that only one build runs
+# on a host at a time.
+_BUILD_LOCK_PATH = Path(gettempdir()) / 'dcos-e2e-docker-build.lock'
+
+_DOCKER_URLS = {
+    DockerVersion.v1_11_2:
+    'https://get.docker.com/builds/Linux/x86_64/docker-1.11.2.tgz',
+    DockerVersion.v1_13_1:
+    'https://get.docker.com/builds/Linux/x86_64/docker-1.13.1.tgz',
+    DockerVersion.v17_12_1_ce:
+    'https://download.docker.com/linux/static/stable/x86_64/docker-17.12.1-ce.tgz',  # noqa: E501
+}
+
 
 def _base_dockerfile(linux_distribution: Distribution) -> Path:
     """
@@ -34,40 +66,165 @@ def _docker_dockerfile() -> Path:
     return current_parent / 'resources' / 'dockerfiles' / 'base-docker'
 
 
+def _image_tag(*parts: bytes) -> str:
+    """
+    Return a tag in the node image repository which identifies the given
+    parts.
+    """
+    hasher = hashlib.sha256()
+    for part in parts:
+        hasher.update(hashlib.sha256(part).digest())
+    return '{repository}:{digest}'.format(
+        repository=_IMAGE_REPOSITORY,
+        digest=hasher.hexdigest()[:16],
+    )
+
+
+def _image_exists(client: docker.DockerClient, tag: str) -> bool:
+    """
+    Return whether an image with the given tag exists.
+    """
+    try:
+        client.images.get(tag)
+    except docker.errors.ImageNotFound:
+        return False
+    return True
+
+
+@contextmanager
+def _build_lock() -> Iterator[None]:
+    """
+    Hold a lock which is shared by all processes on this host.
+    """
+    with _BUILD_LOCK_PATH.open('a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _cached_docker_tarball(
+    docker_version: DockerVersion,
+    docker_tarball_dir: Path,
+) -> Path:
+    """
+    Return the path to a Docker static binary tarball in the given directory,
+    downloading it if it is not there.
+
+    Tarballs have the same names as in their download URLs, for example
+    ``docker-1.13.1.tgz``, so that they can be put in the directory by hand
+    for use without internet access.
+    """
+    url = _DOCKER_URLS[docker_version]
+    tarball = docker_tarball_dir / url.split('/')[-1]
+    if tarball.exists():
+        return tarball
+
+    LOGGER.info(
+        'Downloading {url} to {tarball}.'.format(url=url, tarball=tarball),
+    )
+    docker_tarball_dir.mkdir(parents=True, exist_ok=True)
+    # The tarball is downloaded to a unique path and then renamed so that a
+    # partial download is never used.
+    partial_tarball = tarball.with_name(
+        '.{name}.{unique}'.format(name=tarball.name, unique=uuid.uuid4().hex),
+    )
+    try:
+        response = requests.get(url, stream=True)
+        response.raise_for_status()
+        with partial_tarball.open('wb') as tarball_file:
+            for chunk in response.iter_content(chunk_size=1024 * 1024):
+                tarball_file.write(chunk)
+        os.replace(str(partial_tarball), str(tarball))
+    finally:
+        if partial_tarball.exists():
+            partial_tarball.unlink()
+
+    return tarball
+
+
 def build_docker_image(
-    tag: str,
     linux_distribution: Distribution,
     docker_version: DockerVersion,
-) -> None:
-    """
-    Build a Docker image to use for node containers.
+    docker_tarball_dir: Optional[Path] = None,
+) -> str:
     """
-    base_tag = tag + ':base'
+    Build a Docker image to use for node containers, unless an identical
+    image already exists.
 
-    client = docker.from_env(version='auto')
+    Args:
+        linux_distribution: The Linux distribution of the image.
+        docker_version: The version of Docker to install in the image.
+        docker_tarball_dir: A directory of Docker static binary tarballs to
+            install Docker from. If this is ``None``, Docker is downloaded
+            while building the image.
+
+    Returns:
+        The tag of the image.
+    """
     base_dockerfile = _base_dockerfile(linux_distribution=linux_distribution)
     docker_dockerfile = _docker_dockerfile()
+    base_dockerfile_contents = (base_dockerfile / 'Dockerfile').read_bytes()
+    docker_dockerfile_contents = (
+        docker_dockerfile / 'Dockerfile'
+    ).read_bytes()
 
-    docker_urls = {
-        DockerVersion.v1_11_2:
-        'https://get.docker.com/builds/Linux/x86_64/docker-1.11.2.tgz',
-        DockerVersion.v1_13_1:
-        'https://get.docker.com/builds/Linux/x86_64/docker-1.13.1.tgz',
-        DockerVersion.v17_12_1_ce:
-        'https://download.docker.com/linux/static/stable/x86_64/docker-17.12.1-ce.tgz',  # noqa: E501
-    }
-
-    client.images.build(
-        path=str(base_dockerfile),
-        rm=True,
-        forcerm=True,
-        tag=base_tag,
+    base_tag = _image_tag(
+        linux_distribution.name.encode(),
+        base_dockerfile_contents,
     )
-
-    client.images.build(
-        path=str(docker_dockerfile),
-        rm=True,
-        forcerm=True,
-        tag=tag,
-        buildargs={'DOCKER_URL': docker_urls[docker_version]},
+    tag = _image_tag(
+        base_tag.encode(),
+        docker_version.name.encode(),
+        docker_dockerfile_contents,
     )
+
+    client = docker.from_env(version='auto')
+    if _image_exists(client=client, tag=tag):
+        return tag
+
+    with _build_lock():
+        # Another process may have built the image while we waited.
+        if _image_exists(client=client, tag=tag):
+            return tag
+
+        LOGGER.info('Building node image {tag}.'.format(tag=tag))
+        if not _image_exists(client=client, tag=base_tag):
+            client.images.build(
+                path=str(base_dockerfile),
+                rm=True,
+                forcerm=True,
+                tag=base_tag,
+            )
+
+        with TemporaryDirectory() as context_dir:
+            context = Path(context_dir)
+            shutil.copy(
+                src=str(docker_dockerfile / 'Dockerfile'),
+                dst=str(context / 'Dockerfile'),
+            )
+            tarball_dir = context / 'docker-tarball'
+            tarball_dir.mkdir()
+            if docker_tarball_dir is not None:
+                tarball = _cached_docker_tarball(
+                    docker_version=docker_version,
+                    docker_tarball_dir=docker_tarball_dir,
+                )
+                shutil.copy(
+                    src=str(tarball),
+                    dst=str(tarball_dir / 'docker.tgz'),
+                )
+
+            client.images.build(
+                path=str(context),
+                rm=True,
+                forcerm=True,
+                tag=tag,
+                buildargs={
+                    'BASE_IMAGE': base_tag,
+                    'DOCKER_URL': _DOCKER_URLS[docker_version],
+                },
+            )
+
+    return tag
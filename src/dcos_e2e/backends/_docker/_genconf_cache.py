@@ -0,0 +1,136 @@
+"""
+A cache of the files which ``dcos_generate_config.sh --genconf`` creates.
+
+Generating these files is slow, and the result depends only on the installer
+and the files in the ``genconf`` directory.
+"""
+
+import hashlib
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+from dcos_e2e._common import get_logger, installer_cache_key
+
+LOGGER = get_logger(__name__)
+
+
+def genconf_cache_key(installer: Path, genconf_dir: Path) -> str:
+    """
+    Return a key which identifies the output of running an installer with the
+    given ``genconf`` directory.
+
+    The installer is identified by ``installer_cache_key``, as reading all of
+    it is slow.
+    Every file in the ``genconf`` directory except the output directory,
+    ``serve``, is read in full.
+
+    Args:
+        installer: The path to a DC/OS installer.
+        genconf_dir: The ``genconf`` directory given to the installer.
+    """
+    hasher = hashlib.sha256()
+    hasher.update(installer_cache_key(installer=installer).encode())
+
+    serve_dir = genconf_dir / 'serve'
+    for path in sorted(genconf_dir.glob('**/*')):
+        if path == serve_dir or serve_dir in path.parents:
+            continue
+        hasher.update(str(path.relative_to(genconf_dir)).encode())
+        if path.is_file():
+            hasher.update(path.read_bytes())
+
+    return hasher.hexdigest()
+
+
+def link_tree(src: Path, dst: Path) -> None:
+    """
+    Recreate the files in ``src`` in the existing directory ``dst``.
+
+    Files are hard linked where possible, and copied otherwise.
+    """
+    for path in sorted(src.glob('**/*')):
+        destination = dst / path.relative_to(src)
+        if path.is_dir():
+            destination.mkdir(exist_ok=True)
+            continue
+        try:
+            os.link(str(path), str(destination))
+        except OSError:
+            shutil.copy2(src=str(path), dst=str(destination))
+
+
+def restore_genconf_output(cache_dir: Path, key: str, serve_dir: Path) -> bool:
+    """
+    Put cached ``genconf`` output into the given ``serve`` directory.
+
+    Args:
+        cache_dir: The directory which holds cached output.
+        key: The key for the output, from ``genconf_cache_key``.
+        serve_dir: The directory to put the output in.
+
+    Returns:
+        Whether the output was in the cache.
+    """
+    entry = cache_dir / key
+    if not entry.is_dir():
+        return False
+
+    link_tree(src=entry, dst=serve_dir)
+    # The modification time is used to find the least recently used entries.
+    os.utime(str(entry))
+    LOGGER.info(
+        'Using cached genconf output from {entry}.'.format(entry=entry),
+    )
+    return True
+
+
+def store_genconf_output(
+    cache_dir: Path,
+    key: str,
+    serve_dir: Path,
+    max_entries: int,
+) -> None:
+    """
+    Add ``genconf`` output to the cache, and remove the least recently used
+    entries so that there are at most ``max_entries``.
+
+    The cache is only an optimization, so errors are logged and ignored.
+
+    Args:
+        cache_dir: The directory which holds cached output.
+        key: The key for the output, from ``genconf_cache_key``.
+        serve_dir: The directory which holds the output.
+        max_entries: The maximum number of entries to keep in the cache.
+    """
+    entry = cache_dir / key
+    if entry.exists():
+        return
+
+    # Output is copied to a temporary directory and then renamed so that
+    # other clusters never see a partial entry.
+    tmp_entry = cache_dir / '.{key}.{unique}'.format(
+        key=key,
+        unique=uuid.uuid4().hex,
+    )
+    try:
+        tmp_entry.mkdir(parents=True)
+        link_tree(src=serve_dir, dst=tmp_entry)
+        os.rename(str(tmp_entry), str(entry))
+    except OSError as exc:
+        LOGGER.warning(
+            'Could not cache genconf output: {exception}'.format(
+                exception=exc,
+            ),
+        )
+        shutil.rmtree(path=str(tmp_entry), ignore_errors=True)
+        return
+
+    entries = [
+        path for path in cache_dir.iterdir()
+        if path.is_dir() and not path.name.startswith('.')
+    ]
+    entries.sort(key=lambda path: path.stat().st_mtime, reverse=True)
+    for old_entry in entries[max_entries:]:
+        shutil.rmtree(path=str(old_entry), ignore_errors=True)
@@ -0,0 +1,376 @@
+"""
+A store of extracted DC/OS packages which is shared by node containers.
+
+Without a store, ``dcos_install.sh`` extracts the bootstrap tarball and the
+cluster packages into ``/opt/mesosphere`` on every node.
+With a store, each bootstrap tarball and each package is extracted once on the
+host, by its ID.
+Package IDs and bootstrap IDs identify their contents, so clusters with
+different configurations share all but the few packages which hold their
+configuration.
+Each cluster has its own tree of hard links to the store.
+Each node then mounts an overlay file system on ``/opt/mesosphere``.
+The store is the read-only lower layer, and the node's writes go to an upper
+layer in the node's own ``/opt`` volume.
+
+``dcos_install.sh`` does not download DC/OS on nodes which already have
+``/opt/mesosphere``, and ``pkgpanda`` does not fetch packages which are
+already in ``/opt/mesosphere/packages``.
+However, the preflight checks of ``dcos_install.sh`` take ``/opt/mesosphere``
+to be an existing installation.
+Nodes therefore run a copy of ``dcos_install.sh`` which skips only that check.
+"""
+
+import fcntl
+import os
+import re
+import shlex
+import shutil
+import tarfile
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Tuple  # noqa: F401
+from typing import Iterator
+
+from docker.types import Mount
+
+from dcos_e2e._common import get_logger
+from dcos_e2e.node import Node
+
+LOGGER = get_logger(__name__)
+
+# The path on nodes at which the package store is mounted.
+_NODE_STORE_PATH = Path('/var/lib/dcos-e2e/package-store')
+
+# The directory on nodes which holds the writable layer of the overlay.
+# This must not be on an overlay file system, so it is in the ``/opt`` volume.
+_NODE_OVERLAY_PATH = Path('/opt/dcos-e2e-package-store')
+
+_MOUNT_UNIT_NAME = 'opt-mesosphere.mount'
+
+# The directories in the store which hold extracted bootstrap tarballs by
+# bootstrap ID and extracted packages by package ID.
+_BOOTSTRAP_DIR_NAME = 'bootstrap'
+_PACKAGES_DIR_NAME = 'packages'
+
+_BOOTSTRAP_SUFFIX = '.bootstrap.tar.xz'
+
+# The name of the copy of ``dcos_install.sh`` in the ``serve`` directory which
+# nodes with the package store run.
+PACKAGE_STORE_INSTALL_SCRIPT = 'dcos_install_package_store.sh'
+
+# The line of ``dcos_install.sh`` which runs the preflight check for an
+# existing installation.
+_EXISTING_INSTALL_CHECK = re.compile(
+    r'^(\s*)check_preexisting_dcos\s*$',
+    flags=re.MULTILINE,
+)
+
+
+def package_store_mount(package_store_dir: Path) -> Mount:
+    """
+    Return a mount of a cluster's package store directory for node
+    containers.
+
+    Args:
+        package_store_dir: A host directory which holds, or will hold, the
+            extracted packages.
+    """
+    return Mount(
+        source=str(package_store_dir),
+        target=str(_NODE_STORE_PATH),
+        read_only=True,
+        type='bind',
+    )
+
+
+@contextmanager
+def _store_lock(store_dir: Path) -> Iterator[None]:
+    """
+    Hold a lock on the store which is shared by all processes on this host.
+    """
+    store_dir.mkdir(parents=True, exist_ok=True)
+    with (store_dir / '.lock').open('a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _link_tree(src: Path, dst: Path) -> None:
+    """
+    Recreate the files in ``src`` in the existing directory ``dst``.
+
+    Files are hard linked where possible, and copied otherwise.
+    Symbolic links are recreated, rather than followed, as packages have
+    links which only resolve on nodes.
+    """
+    directories = []  # type: List[Tuple[Path, Path]]
+    for dirpath, dirnames, filenames in os.walk(str(src)):
+        relative_dir = Path(dirpath).relative_to(src)
+        for name in [*dirnames, *filenames]:
+            path = Path(dirpath) / name
+            destination = dst / relative_dir / name
+            if path.is_symlink():
+                os.symlink(os.readlink(str(path)), str(destination))
+            elif path.is_dir():
+                destination.mkdir()
+                directories.append((path, destination))
+            else:
+                try:
+                    os.link(str(path), str(destination))
+                except OSError:
+                    shutil.copy2(src=str(path), dst=str(destination))
+
+    # Permissions of directories are copied last, as some directories are
+    # not writable.
+    for path, destination in reversed(directories):
+        shutil.copystat(str(path), str(destination))
+
+
+def _store_entry(
+    entries_dir: Path,
+    name: str,
+    tarball: Path,
+    used_at: float,
+) -> Path:
+    """
+    Return the store entry which holds the given extracted tarball,
+    extracting it if it is not in the store.
+
+    Args:
+        entries_dir: The directory which holds entries of this kind.
+        name: The name of the entry, which identifies the tarball's contents.
+        tarball: The tarball to extract.
+        used_at: The time to set as the modification time of the entry,
+            which is used to find entries which have not been used recently.
+    """
+    entry = entries_dir / name
+    if not entry.is_dir():
+        LOGGER.info('Extracting {tarball}.'.format(tarball=tarball))
+        entries_dir.mkdir(parents=True, exist_ok=True)
+        tmp_entry = entries_dir / '.{name}.{unique}'.format(
+            name=name,
+            unique=uuid.uuid4().hex,
+        )
+        try:
+            tmp_entry.mkdir()
+            with tarfile.open(str(tarball)) as tar:
+                tar.extractall(path=str(tmp_entry))
+            os.rename(str(tmp_entry), str(entry))
+        finally:
+            shutil.rmtree(path=str(tmp_entry), ignore_errors=True)
+
+    os.utime(str(entry), (used_at, used_at))
+    return entry
+
+
+def _entries(entries_dir: Path) -> List[Path]:
+    """
+    Return the entries in a directory of the store, without those which are
+    being extracted.
+    """
+    if not entries_dir.is_dir():
+        return []
+    return [
+        path for path in entries_dir.iterdir()
+        if path.is_dir() and not path.name.startswith('.')
+    ]
+
+
+def _evict(store_dir: Path, max_entries: int) -> None:
+    """
+    Remove the bootstrap and package entries which were not used by any of
+    the last ``max_entries`` preparations of a destination.
+
+    Each preparation sets the same modification time on all of the entries
+    which it uses, so each time identifies a preparation.
+    """
+    entries = [
+        *_entries(entries_dir=store_dir / _BOOTSTRAP_DIR_NAME),
+        *_entries(entries_dir=store_dir / _PACKAGES_DIR_NAME),
+    ]
+    used_at = sorted({path.stat().st_mtime for path in entries}, reverse=True)
+    if len(used_at) <= max_entries:
+        return
+
+    oldest_kept = used_at[max_entries - 1]
+    for old_entry in entries:
+        if old_entry.stat().st_mtime < oldest_kept:
+            shutil.rmtree(path=str(old_entry), ignore_errors=True)
+
+
+def _write_install_script(serve_dir: Path) -> bool:
+    """
+    Write a copy of ``dcos_install.sh`` which skips the preflight check for an
+    existing installation to ``PACKAGE_STORE_INSTALL_SCRIPT`` in the ``serve``
+    directory.
+
+    Returns:
+        Whether the copy was written. It is not if ``dcos_install.sh`` does
+        not run the check as expected.
+    """
+    install_script = (serve_dir / 'dcos_install.sh').read_text()
+    replacement = (
+        r'\1echo "Skipping the check for an existing installation, as '
+        r'/opt/mesosphere is the package store."'
+    )
+    new_install_script, count = _EXISTING_INSTALL_CHECK.subn(
+        replacement,
+        install_script,
+    )
+    if count == 0:
+        return False
+
+    (serve_dir / PACKAGE_STORE_INSTALL_SCRIPT).write_text(new_install_script)
+    return True
+
+
+def prepare_package_store(
+    serve_dir: Path,
+    store_dir: Path,
+    destination: Path,
+    max_entries: int,
+) -> bool:
+    """
+    Put the extracted packages for the given ``genconf`` output into the given
+    destination, extracting them only if they are not in the store.
+
+    The destination holds hard links to the store, so that it stays usable if
+    entries are later removed from the store.
+    A copy of ``dcos_install.sh`` for nodes with the package store is written
+    to ``PACKAGE_STORE_INSTALL_SCRIPT`` in the ``serve`` directory.
+
+    Args:
+        serve_dir: The ``serve`` directory of ``genconf`` output.
+        store_dir: The directory which holds extracted packages.
+        destination: The existing, empty directory to put the packages in.
+        max_entries: The number of most recent preparations whose bootstrap
+            tarball and packages are kept in the store.
+
+    Returns:
+        Whether the packages were put in the destination. They are not if the
+        ``genconf`` output does not have exactly one bootstrap tarball, or if
+        the preflight check for an existing installation cannot be skipped.
+    """
+    bootstraps = list(serve_dir.glob('bootstrap/*' + _BOOTSTRAP_SUFFIX))
+    if len(bootstraps) != 1:
+        LOGGER.warning(
+            'Expected one bootstrap tarball in {serve_dir}, found {count}. '
+            'The package store is not used.'.format(
+                serve_dir=serve_dir,
+                count=len(bootstraps),
+            ),
+        )
+        return False
+
+    if not _write_install_script(serve_dir=serve_dir):
+        LOGGER.warning(
+            'The preflight check for an existing installation cannot be '
+            'skipped with the dcos_install.sh in {serve_dir}. '
+            'The package store is not used.'.format(serve_dir=serve_dir),
+        )
+        return False
+
+    bootstrap_id = bootstraps[0].name[:-len(_BOOTSTRAP_SUFFIX)]
+    destination_packages_dir = destination / 'packages'
+    # The lock is held while extracting so that clusters which are created
+    # at the same time with the same packages extract them once.
+    with _store_lock(store_dir=store_dir):
+        used_at = time.time()
+        bootstrap_entry = _store_entry(
+            entries_dir=store_dir / _BOOTSTRAP_DIR_NAME,
+            name=bootstrap_id,
+            tarball=bootstraps[0],
+            used_at=used_at,
+        )
+        # The bootstrap tarball holds the extracted bootstrap packages, as
+        # ``/opt/mesosphere`` would after ``dcos_install.sh`` extracts it.
+        _link_tree(src=bootstrap_entry, dst=destination)
+        destination_packages_dir.mkdir(exist_ok=True)
+
+        for package in sorted(serve_dir.glob('packages/*/*.tar.xz')):
+            package_id = package.name[:-len('.tar.xz')]
+            package_dir = destination_packages_dir / package_id
+            if package_dir.exists():
+                continue
+            package_entry = _store_entry(
+                entries_dir=store_dir / _PACKAGES_DIR_NAME,
+                name=package_id,
+                tarball=package,
+                used_at=used_at,
+            )
+            package_dir.mkdir()
+            _link_tree(src=package_entry, dst=package_dir)
+            shutil.copystat(str(package_entry), str(package_dir))
+
+        _evict(store_dir=store_dir, max_entries=max_entries)
+
+    return True
+
+
+def _mount_unit() -> str:
+    """
+    Return the contents of a systemd unit file which mounts an overlay of the
+    package store on ``/opt/mesosphere``.
+
+    A unit is used rather than a single ``mount`` so that the overlay is
+    mounted again when a node container restarts.
+    """
+    options = 'lowerdir={lower},upperdir={upper},workdir={work}'.format(
+        lower=_NODE_STORE_PATH,
+        upper=_NODE_OVERLAY_PATH / 'upper',
+        work=_NODE_OVERLAY_PATH / 'work',
+    )
+    return '\n'.join(
+        [
+            '[Unit]',
+            'Description=DC/OS package store',
+            'Before=dcos-download.service dcos-setup.service',
+            '',
+            '[Mount]',
+            'What=overlay',
+            'Where=/opt/mesosphere',
+            'Type=overlay',
+            'Options=' + options,
+            '',
+            '[Install]',
+            'WantedBy=multi-user.target',
+            '',
+        ],
+    )
+
+
+def mount_package_store(node: Node) -> None:
+    """
+    Mount an overlay of the package store on ``/opt/mesosphere`` on a node.
+
+    Args:
+        node: The node to mount the package store on.
+
+    Raises:
+        CalledProcessError: The package store could not be mounted.
+    """
+    unit_path = Path('/etc/systemd/system') / _MOUNT_UNIT_NAME
+    for args in (
+        [
+            'mkdir',
+            '--parents',
+            str(_NODE_OVERLAY_PATH / 'upper'),
+            str(_NODE_OVERLAY_PATH / 'work'),
+            '/opt/mesosphere',
+        ],
+        [
+            'echo',
+            shlex.quote(_mount_unit()),
+            '>',
+            str(unit_path),
+        ],
+        ['systemctl', 'daemon-reload'],
+        ['systemctl', 'enable', _MOUNT_UNIT_NAME],
+        ['systemctl', 'start', _MOUNT_UNIT_NAME],
+    ):
+        node.run(args=args, shell=True)
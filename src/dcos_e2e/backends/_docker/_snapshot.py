@@ -0,0 +1,324 @@
+"""
+Snapshots of Docker clusters.
+
+A snapshot is a directory which holds a manifest and an archive of each volume
+of each node container.
+The rest of the file system of each node container is committed to an image.
+
+DC/OS stores the IP addresses of nodes in its configuration, so nodes which
+are created from a snapshot have the IP addresses of the nodes which the
+snapshot was taken of.
+Docker only allows choosing IP addresses on networks with user configured
+subnets, so snapshots can only be taken of clusters on such networks.
+"""
+
+import json
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import docker
+
+from dcos_e2e._common import get_logger
+
+from ._containers import (
+    add_authorized_key,
+    create_dcos_container,
+    setup_restored_container,
+)
+
+LOGGER = get_logger(__name__)
+
+# The repository which snapshot images are tagged in.
+SNAPSHOT_IMAGE_REPOSITORY = 'dcos-e2e-snapshot'
+
+_MANIFEST_NAME = 'manifest.json'
+
+# The version of the manifest format.
+# This is changed when snapshots which were made by other versions cannot be
+# restored.
+_MANIFEST_VERSION = 1
+
+
+def _custom_network_address(
+    container: docker.models.containers.Container,
+) -> Tuple[str, str]:
+    """
+    Return the name of the network other than the default bridge network
+    which the given container is connected to, and the container's IP
+    address on it.
+
+    Raises:
+        ValueError: The container is only connected to the default bridge
+            network.
+    """
+    networks = container.attrs['NetworkSettings']['Networks']
+    custom_networks = list(networks.keys() - set(['bridge']))
+    if not custom_networks:
+        message = (
+            'Snapshots can only be taken of clusters on a custom network. '
+            'Container {name} is only connected to the default bridge '
+            'network.'
+        ).format(name=container.name)
+        raise ValueError(message)
+
+    [network_name] = custom_networks
+    return network_name, networks[network_name]['IPAddress']
+
+
+def _snapshot_container(
+    container: docker.models.containers.Container,
+    role: str,
+    number: int,
+    snapshot_id: str,
+    snapshot_dir: Path,
+) -> Dict[str, Any]:
+    """
+    Commit a paused node container to an image and archive its volumes.
+
+    Returns:
+        The manifest entry for the node.
+    """
+    node_name = '{role}-{number}'.format(role=role, number=number)
+    tag = '{snapshot_id}-{node_name}'.format(
+        snapshot_id=snapshot_id,
+        node_name=node_name.replace('_', '-'),
+    )
+    # A paused container is not paused again, or unpaused, by ``commit``.
+    container.commit(repository=SNAPSHOT_IMAGE_REPOSITORY, tag=tag)
+
+    volumes = {}  # type: Dict[str, str]
+    for mount in container.attrs['Mounts']:
+        if mount['Type'] != 'volume':
+            continue
+        destination = mount['Destination']
+        archive_name = '{node_name}{path}.tar'.format(
+            node_name=node_name,
+            path=destination.replace('/', '-'),
+        )
+        stream, _ = container.get_archive(path=destination)
+        with (snapshot_dir / archive_name).open('wb') as archive:
+            for chunk in stream:
+                archive.write(chunk)
+        volumes[destination] = archive_name
+
+    _, ip_address = _custom_network_address(container=container)
+    return {
+        'role': role,
+        'image': '{repository}:{tag}'.format(
+            repository=SNAPSHOT_IMAGE_REPOSITORY,
+            tag=tag,
+        ),
+        'ip_address': ip_address,
+        'volumes': volumes,
+    }
+
+
+def create_snapshot(
+    containers: Dict[str, List[docker.models.containers.Container]],
+    snapshot_dir: Path,
+) -> None:
+    """
+    Take a snapshot of the given node containers.
+
+    The containers are paused while the snapshot is taken, so that the
+    snapshot is consistent across nodes.
+
+    Args:
+        containers: Node containers by role, in the order in which they are
+            numbered.
+        snapshot_dir: A directory, which does not exist, to create the
+            snapshot in.
+
+    Raises:
+        ValueError: A container is not connected to a custom network.
+    """
+    nodes = [
+        (role, number, container)
+        for role, role_containers in sorted(containers.items())
+        for number, container in enumerate(role_containers)
+    ]
+    network_names = set(
+        _custom_network_address(container=container)[0]
+        for _, _, container in nodes
+    )
+
+    snapshot_dir.mkdir(parents=True)
+    snapshot_id = uuid.uuid4().hex[:12]
+    paused = []  # type: List[docker.models.containers.Container]
+    try:
+        for _, _, container in nodes:
+            container.pause()
+            paused.append(container)
+
+        with ThreadPoolExecutor(max_workers=max(len(nodes), 1)) as executor:
+            futures = [
+                executor.submit(
+                    _snapshot_container,
+                    container=container,
+                    role=role,
+                    number=number,
+                    snapshot_id=snapshot_id,
+                    snapshot_dir=snapshot_dir,
+                ) for role, number, container in nodes
+            ]
+    finally:
+        for container in paused:
+            container.unpause()
+
+    errors = []  # type: List[BaseException]
+    for future, (_, _, container) in zip(futures, nodes):
+        exception = future.exception()
+        if exception is not None:
+            LOGGER.error(
+                'Error taking a snapshot of {name}: {exception}'.format(
+                    name=container.name,
+                    exception=exception,
+                ),
+            )
+            errors.append(exception)
+
+    if errors:
+        raise errors[0]
+
+    [network_name] = network_names
+    manifest = {
+        'version': _MANIFEST_VERSION,
+        'network': network_name,
+        'nodes': [future.result() for future in futures],
+    }
+    (snapshot_dir / _MANIFEST_NAME).write_text(
+        json.dumps(manifest, indent=2, sort_keys=True),
+    )
+
+
+class Snapshot:
+    """
+    A snapshot which can be restored.
+
+    Attributes:
+        directory: The directory which holds the snapshot.
+        network_name: The name of the network which nodes were connected to.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        """
+        Args:
+            directory: The directory which holds the snapshot.
+
+        Raises:
+            ValueError: The snapshot was made by an incompatible version.
+        """
+        manifest = json.loads((directory / _MANIFEST_NAME).read_text())
+        if manifest['version'] != _MANIFEST_VERSION:
+            message = (
+                'The snapshot in {directory} has version {version}. '
+                'Only snapshots with version {supported} are supported.'
+            ).format(
+                directory=directory,
+                version=manifest['version'],
+                supported=_MANIFEST_VERSION,
+            )
+            raise ValueError(message)
+
+        self.directory = directory
+        self.network_name = manifest['network']  # type: str
+        self._nodes = manifest['nodes']  # type: List[Dict[str, Any]]
+
+    def check_node_counts(
+        self,
+        masters: int,
+        agents: int,
+        public_agents: int,
+    ) -> None:
+        """
+        Check that the snapshot has the given number of each kind of node.
+
+        Raises:
+            ValueError: The snapshot has a different number of a kind of node.
+        """
+        for role, count in (
+            ('master', masters),
+            ('agent', agents),
+            ('public_agent', public_agents),
+        ):
+            snapshot_count = len(self.nodes(role=role))
+            if snapshot_count != count:
+                message = (
+                    'The snapshot in {directory} has {snapshot_count} {role} '
+                    'nodes but {count} were requested.'
+                ).format(
+                    directory=self.directory,
+                    snapshot_count=snapshot_count,
+                    role=role,
+                    count=count,
+                )
+                raise ValueError(message)
+
+    def nodes(self, role: str) -> List[Dict[str, Any]]:
+        """
+        Return the manifest entries of the nodes with the given role, in the
+        order in which they are numbered.
+        """
+        return [node for node in self._nodes if node['role'] == role]
+
+
+def restore_dcos_container(
+    container_base_name: str,
+    container_number: int,
+    mounts: List[docker.types.Mount],
+    tmpfs: Dict[str, str],
+    labels: Dict[str, str],
+    public_key_path: Path,
+    snapshot: Snapshot,
+    snapshot_node: Dict[str, Any],
+    network: docker.models.networks.Network,
+    ports: Optional[Dict[str, int]] = None,
+) -> docker.models.containers.Container:
+    """
+    Start a node container from a snapshot.
+
+    Args:
+        container_base_name: The start of the container name.
+        container_number: The end of the container name.
+        mounts: See `mounts` on
+            http://docker-py.readthedocs.io/en/latest/containers.html.
+        tmpfs: See `tmpfs` on
+            http://docker-py.readthedocs.io/en/latest/containers.html.
+        labels: Docker labels to add to the container.
+        public_key_path: The path to an SSH public key to put on the node.
+        snapshot: The snapshot to restore from.
+        snapshot_node: The manifest entry of the node to restore.
+        network: The network to connect the container to, which has the
+            node's IP address in its subnet.
+        ports: The ports to expose on the host.
+
+    Returns:
+        The started container.
+    """
+    container = create_dcos_container(
+        container_base_name=container_base_name,
+        container_number=container_number,
+        mounts=mounts,
+        tmpfs=tmpfs,
+        docker_image=snapshot_node['image'],
+        labels=labels,
+        network=network,
+        ports=ports,
+        ipv4_address=snapshot_node['ip_address'],
+    )
+
+    # Volumes are filled before the container starts so that services see
+    # the restored files when they start.
+    for destination, archive_name in snapshot_node['volumes'].items():
+        with (snapshot.directory / archive_name).open('rb') as archive:
+            container.put_archive(
+                path=str(Path(destination).parent),
+                data=archive,
+            )
+
+    container.start()
+    setup_restored_container(container=container)
+    add_authorized_key(container=container, public_key_path=public_key_path)
+    return container
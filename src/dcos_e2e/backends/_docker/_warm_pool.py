@@ -0,0 +1,356 @@
+"""
+A pool of booted node containers which do not yet belong to a cluster.
+
+Starting a node container takes many steps, so containers are started ahead of
+time and handed to new clusters.
+
+Pooled containers are found by a label which identifies everything which goes
+into them.
+A container is handed to a cluster by renaming it.
+Docker renames atomically, so two processes cannot take the same container.
+
+Docker labels and mounts cannot be changed after a container is created.
+Therefore only nodes without custom labels, mounts or ports are taken from the
+pool, and each pooled container bind mounts its own host directories in place
+of a cluster's ``certs`` and ``genconf/serve`` directories.
+"""
+
+import atexit
+import hashlib
+import threading
+import uuid
+from pathlib import Path
+from shutil import rmtree
+from typing import Dict  # noqa: F401
+from typing import List, Optional
+
+import docker
+
+from dcos_e2e._common import get_logger
+from dcos_e2e.docker_storage_drivers import DockerStorageDriver
+from dcos_e2e.docker_versions import DockerVersion
+
+from ._containers import NODE_TMPFS_MOUNTS, node_mounts, start_dcos_container
+
+LOGGER = get_logger(__name__)
+
+# The label which identifies the kind of a pooled container.
+_POOL_LABEL_KEY = 'dcos_e2e.warm_pool'
+
+# The label which holds the host directory of a pooled container.
+_POOL_DIR_LABEL_KEY = 'dcos_e2e.warm_pool_dir'
+
+# All pooled containers which have not been taken by a cluster have names
+# which start with this.
+_POOL_NAME_PREFIX = 'dcos-e2e-pool-'
+
+# Pooled containers which are ready to be taken have names which start with
+# this.
+_READY_NAME_PREFIX = _POOL_NAME_PREFIX + 'ready-'
+
+# Only one refill runs at a time in this process, so that concurrent refills
+# do not all start the same missing containers.
+_REFILL_LOCK = threading.Lock()
+
+# The host directories of containers which are being started in this process,
+# by the unique part of their names.
+_STARTING = {}  # type: Dict[str, Path]
+_STARTING_LOCK = threading.Lock()
+
+# Set when the process exits, to stop refills from starting more containers.
+_EXITING = threading.Event()
+
+
+def _remove_pooled_container(
+    client: docker.DockerClient,
+    unique: str,
+    directory: Path,
+) -> None:
+    """
+    Remove a pooled container, whether or not it has finished starting, and
+    its host directory.
+    """
+    for container in client.containers.list(
+        all=True,
+        filters={'name': unique},
+    ):
+        container.remove(v=True, force=True)
+    rmtree(path=str(directory), ignore_errors=True)
+
+
+def _remove_starting_containers() -> None:
+    """
+    Remove the containers which are being started for the pool when the
+    process exits.
+
+    Refills run in daemon threads, which stop part way through starting a
+    container when the process exits.
+    Those containers could never be taken from the pool.
+    """
+    _EXITING.set()
+    with _STARTING_LOCK:
+        starting = dict(_STARTING)
+
+    if not starting:
+        return
+
+    for unique, directory in starting.items():
+        try:
+            _remove_pooled_container(
+                client=docker.from_env(version='auto'),
+                unique=unique,
+                directory=directory,
+            )
+        except docker.errors.DockerException as exc:
+            LOGGER.warning(
+                'Could not remove a container which was being added to the '
+                'warm pool: {exception}'.format(exception=exc),
+            )
+
+
+atexit.register(_remove_starting_containers)
+
+
+class PooledContainer:
+    """
+    A container which has been taken from the pool.
+
+    Attributes:
+        container: The container.
+        directory: The host directory which holds the container's ``certs``
+            and ``serve`` directories.
+        serve_dir: The host directory which is mounted in place of a
+            cluster's ``genconf/serve`` directory.
+    """
+
+    def __init__(
+        self,
+        container: docker.models.containers.Container,
+        directory: Path,
+    ) -> None:
+        """
+        Args:
+            container: The container.
+            directory: The host directory which holds the container's
+                ``certs`` and ``serve`` directories.
+        """
+        self.container = container
+        self.directory = directory
+        self.serve_dir = directory / 'serve'
+
+
+class WarmPool:
+    """
+    Booted master and agent containers of one kind.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        pool_dir: Path,
+        docker_image: str,
+        docker_storage_driver: DockerStorageDriver,
+        docker_version: DockerVersion,
+        network: Optional[docker.models.networks.Network],
+    ) -> None:
+        """
+        Args:
+            size: The number of master containers and the number of agent
+                containers to keep in the pool.
+            pool_dir: The directory in which to create host directories for
+                pooled containers.
+            docker_image: The name of the Docker image to use.
+            docker_storage_driver: The storage driver to use for Docker on the
+                nodes.
+            docker_version: The Docker version to use on the nodes.
+            network: The network to connect the containers to other than the
+                default ``docker0`` bridge network.
+        """
+        self._size = size
+        self._pool_dir = pool_dir
+        self._docker_image = docker_image
+        self._docker_storage_driver = docker_storage_driver
+        self._docker_version = docker_version
+        self._network = network
+
+    def _key(self, agent: bool) -> str:
+        """
+        Return a value which identifies containers which can be used in place
+        of one another.
+        """
+        hasher = hashlib.sha256()
+        for part in (
+            self._docker_image,
+            self._docker_storage_driver.name,
+            self._docker_version.name,
+            self._network.id if self._network else 'bridge',
+            'agent' if agent else 'master',
+        ):
+            hasher.update(part.encode() + b'\0')
+        return hasher.hexdigest()[:16]
+
+    def claim(self, agent: bool, name: str) -> Optional[PooledContainer]:
+        """
+        Take a ready container from the pool and give it a new name.
+
+        Args:
+            agent: Whether to take an agent container rather than a master
+                container.
+            name: The new name of the container.
+
+        Returns:
+            The container which was taken, or ``None`` if the pool has no
+            ready containers of the given kind.
+        """
+        client = docker.from_env(version='auto')
+        containers = client.containers.list(
+            filters={
+                'label': '{key}={value}'.format(
+                    key=_POOL_LABEL_KEY,
+                    value=self._key(agent=agent),
+                ),
+                'name': _READY_NAME_PREFIX,
+            },
+        )
+        for container in containers:
+            try:
+                container.rename(name)
+            except docker.errors.APIError:
+                # Another process took this container.
+                continue
+            return PooledContainer(
+                container=container,
+                directory=Path(container.labels[_POOL_DIR_LABEL_KEY]),
+            )
+        return None
+
+    def _start(self, agent: bool) -> None:
+        """
+        Start a container and add it to the pool when it is ready.
+        """
+        unique = uuid.uuid4().hex[:12]
+        directory = self._pool_dir / unique
+        certs_dir = directory / 'certs'
+        serve_dir = directory / 'serve'
+        certs_dir.mkdir(parents=True)
+        serve_dir.mkdir()
+        with _STARTING_LOCK:
+            _STARTING[unique] = directory
+        try:
+            container = start_dcos_container(
+                container_base_name=_POOL_NAME_PREFIX + unique + '-',
+                container_number=0,
+                mounts=node_mounts(
+                    certs_dir=certs_dir,
+                    genconf_serve_dir=serve_dir,
+                    agent=agent,
+                ),
+                tmpfs=NODE_TMPFS_MOUNTS,
+                docker_image=self._docker_image,
+                labels={
+                    _POOL_LABEL_KEY: self._key(agent=agent),
+                    _POOL_DIR_LABEL_KEY: str(directory),
+                },
+                public_key_path=None,
+                docker_storage_driver=self._docker_storage_driver,
+                docker_version=self._docker_version,
+                network=self._network,
+            )
+            container.rename(_READY_NAME_PREFIX + unique)
+        except Exception:
+            _remove_pooled_container(
+                client=docker.from_env(version='auto'),
+                unique=unique,
+                directory=directory,
+            )
+            raise
+        finally:
+            with _STARTING_LOCK:
+                del _STARTING[unique]
+
+    def _running_containers(
+        self,
+        client: docker.DockerClient,
+        agent: bool,
+    ) -> List[docker.models.containers.Container]:
+        """
+        Return the pooled containers of the given kind which are running,
+        including containers which are still starting.
+
+        Pooled containers which have stopped, for example because the Docker
+        daemon restarted, can never be taken, so they are removed.
+        """
+        pooled = client.containers.list(
+            all=True,
+            filters={
+                'label': '{key}={value}'.format(
+                    key=_POOL_LABEL_KEY,
+                    value=self._key(agent=agent),
+                ),
+                'name': _POOL_NAME_PREFIX,
+            },
+        )
+        running = []
+        for container in pooled:
+            if container.status == 'running':
+                running.append(container)
+                continue
+
+            if container.status not in ('exited', 'dead'):
+                continue
+
+            LOGGER.info(
+                'Removing stopped container {name} from the warm '
+                'pool.'.format(name=container.name),
+            )
+            try:
+                container.remove(v=True, force=True)
+            except docker.errors.APIError:
+                # Another process removed this container.
+                continue
+            rmtree(
+                path=container.labels[_POOL_DIR_LABEL_KEY],
+                ignore_errors=True,
+            )
+        return running
+
+    def refill(self) -> None:
+        """
+        Start containers until the pool has ``size`` running masters and
+        ``size`` running agents, counting containers which are still starting.
+        """
+        client = docker.from_env(version='auto')
+        with _REFILL_LOCK:
+            for agent in (False, True):
+                running = self._running_containers(client=client, agent=agent)
+                for _ in range(self._size - len(running)):
+                    if _EXITING.is_set():
+                        return
+                    try:
+                        self._start(agent=agent)
+                    except Exception as exc:  # pylint: disable=broad-except
+                        LOGGER.warning(
+                            'Could not add a container to the warm pool: '
+                            '{exception}'.format(exception=exc),
+                        )
+                        return
+
+    def refill_in_background(self) -> threading.Thread:
+        """
+        Refill the pool in a new thread.
+
+        The thread is a daemon thread, so that the process does not wait for
+        containers to start before it exits.
+        Containers which are being started when the process exits are
+        removed.
+
+        Returns:
+            The thread which refills the pool.
+        """
+        thread = threading.Thread(
+            target=self.refill,
+            name='dcos-e2e-pool',
+            daemon=True,
+        )
+        thread.start()
+        return thread
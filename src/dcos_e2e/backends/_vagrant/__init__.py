@@ -128,6 +128,11 @@ class VagrantCluster(ClusterManager):
         )
 
         self._vagrant_client.up()
+        # Nodes by VM name.
+        # Finding the IP address of a VM requires a slow ``vagrant ssh``
+        # command, so this is filled once when nodes are first requested and
+        # it is cleared when nodes are destroyed.
+        self._vm_nodes = None  # type: Optional[Dict[str, Node]]
 
     def install_dcos_from_url_with_bootstrap_node(
         self,
@@ -181,45 +186,34 @@ class VagrantCluster(ClusterManager):
         Destroy a node in the cluster.
         """
         client = self._vagrant_client
-        hostname_command = "hostname -I | cut -d' ' -f2"
-        virtual_machines = [
-            vm for vm in client.status() if vm.state == 'running'
-        ]
-        for virtual_machine in virtual_machines:
-            vm_ip_str = client.ssh(
-                vm_name=virtual_machine.name,
-                command=hostname_command,
-            ).strip()
+        for vm_name, vm_node in self._get_vm_nodes().items():
+            if vm_node.private_ip_address == node.private_ip_address:
+                client.destroy(vm_name=vm_name)
 
-            vm_ip_address = IPv4Address(vm_ip_str)
-            if vm_ip_address == node.private_ip_address:
-                client.destroy(vm_name=virtual_machine.name)
+        self._vm_nodes = None
 
     def destroy(self) -> None:
         """
         Destroy all nodes in the cluster.
         """
         client = self._vagrant_client
-        for node in {*self.masters, *self.agents, *self.public_agents}:
-            self.destroy_node(node=node)
+        for vm_name in self._get_vm_nodes():
+            client.destroy(vm_name=vm_name)
 
+        self._vm_nodes = None
         shutil.rmtree(path=client.root, ignore_errors=True)
 
-    def _nodes(self, node_base_name: str) -> Set[Node]:
+    def _get_vm_nodes(self) -> Dict[str, Node]:
         """
-        Args:
-            node_base_name: The start of node names.
-
-        Returns: ``Node``s corresponding to VMs with names starting with
-            ``node_base_name``.
+        Return ``Node``s corresponding to running VMs, by VM name.
         """
+        if self._vm_nodes is not None:
+            return self._vm_nodes
+
         client = self._vagrant_client
-        vagrant_nodes = [
-            vm for vm in client.status()
-            if vm.name.startswith(node_base_name) and vm.state == 'running'
-        ]
+        vagrant_nodes = [vm for vm in client.status() if vm.state == 'running']
         hostname_command = "hostname -I | cut -d' ' -f2"
-        nodes = set([])
+        vm_nodes = {}  # type: Dict[str, Node]
         for node in vagrant_nodes:
             default_user = client.user(vm_name=node.name)
             ssh_key_path = Path(client.keyfile(vm_name=node.name))
@@ -236,15 +230,28 @@ class VagrantCluster(ClusterManager):
 
             node_ip_address = IPv4Address(node_ip_str)
 
-            nodes.add(
-                Node(
-                    public_ip_address=node_ip_address,
-                    private_ip_address=node_ip_address,
-                    default_user=default_user,
-                    ssh_key_path=ssh_key_path,
-                ),
+            vm_nodes[node.name] = Node(
+                public_ip_address=node_ip_address,
+                private_ip_address=node_ip_address,
+                default_user=default_user,
+                ssh_key_path=ssh_key_path,
             )
-        return nodes
+
+        self._vm_nodes = vm_nodes
+        return vm_nodes
+
+    def _nodes(self, node_base_name: str) -> Set[Node]:
+        """
+        Args:
+            node_base_name: The start of node names.
+
+        Returns: ``Node``s corresponding to VMs with names starting with
+            ``node_base_name``.
+        """
+        return set(
+            node for vm_name, node in self._get_vm_nodes().items()
+            if vm_name.startswith(node_base_name)
+        )
 
     @property
     def masters(self) -> Set[Node]:
@@ -4,14 +4,25 @@ DC/OS Cluster management tools. Independent of back ends.
 
 import json
 import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import ContextDecorator
+from functools import partial
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
-import retrying
 import timeout_decorator
-from retry import retry
 
+from ._common import get_logger
+from ._node_transports import close_ssh_connections
+from ._readiness import (
+    Check,
+    admin_router_check,
+    login_check,
+    service_checks,
+    wait_for_checks,
+)
 from ._vendor.dcos_test_utils.dcos_api import DcosApiSession, DcosUser
 from ._vendor.dcos_test_utils.enterprise import EnterpriseApiSession
 from ._vendor.dcos_test_utils.helpers import CI_CREDENTIALS
@@ -21,16 +32,36 @@ from .backends import ClusterBackend, _ExistingCluster
 from .exceptions import DCOSTimeoutError
 from .node import Node, Output, Role, Transport
 
+LOGGER = get_logger(__name__)
 
-@retry(
-    exceptions=(subprocess.CalledProcessError),
-    tries=5,
-    delay=1,
-)
-def _wait_for_ssh(node: Node) -> None:
+
+# The time to wait for SSH to be available on all nodes of a new cluster.
+_SSH_WAIT_TIMEOUT_SECONDS = 30
+
+# The time to wait for one check of whether SSH is available on a node.
+_SSH_PROBE_TIMEOUT_SECONDS = 5
+
+# The maximum number of nodes to wait for SSH on at the same time.
+_SSH_WAIT_CONCURRENCY = 8
+
+
+def _wait_for_ssh(node: Node, deadline: float) -> int:
     """
-    Retry up to five times (arbitrary) until SSH is available on the given
-    node.
+    Retry every second until SSH is available on the given node or until the
+    deadline has passed.
+
+    Args:
+        node: The node to wait for.
+        deadline: The ``time.monotonic()`` value after which to stop retrying.
+
+    Returns:
+        The number of attempts which were made.
+
+    Raises:
+        subprocess.CalledProcessError: SSH was not available on the node
+            before the deadline.
+        subprocess.TimeoutExpired: The last check of whether SSH was
+            available on the node did not finish.
     """
     # In theory we could just use any args and specify the transport as SSH.
     # However, this would not work on macOS without a special network set up.
@@ -43,25 +74,186 @@ def _wait_for_ssh(node: Node) -> None:
         'status',
         'sshd',
     ]
-    node.run(
-        args=args,
-        output=Output.LOG_AND_CAPTURE,
-        shell=True,
+    attempts = 0
+    while True:
+        attempts += 1
+        # Each check is limited on the host, rather than on the node, so that
+        # a connection to the node which hangs does not outlast the deadline.
+        process = node.popen(args=args, shell=True)
+        try:
+            stdout, stderr = process.communicate(
+                timeout=_SSH_PROBE_TIMEOUT_SECONDS,
+            )
+        except subprocess.TimeoutExpired as exc:
+            process.kill()
+            process.communicate()
+            error = exc  # type: subprocess.SubprocessError
+        else:
+            if process.returncode == 0:
+                return attempts
+            error = subprocess.CalledProcessError(
+                returncode=process.returncode,
+                cmd=args,
+                output=stdout,
+                stderr=stderr,
+            )
+
+        if time.monotonic() + 1 > deadline:
+            raise error
+        time.sleep(1)
+
+
+def _wait_for_ssh_on_nodes(nodes: Set[Node]) -> None:
+    """
+    Wait until SSH is available on all of the given nodes.
+
+    Up to ``_SSH_WAIT_CONCURRENCY`` nodes are waited for at the same time,
+    with one shared deadline.
+    Nodes which needed more than one attempt are logged.
+
+    Args:
+        nodes: The nodes to wait for.
+
+    Raises:
+        subprocess.CalledProcessError: SSH was not available on a node before
+            the deadline.
+        subprocess.TimeoutExpired: Checking whether SSH was available on a
+            node did not finish before the deadline.
+    """
+    if not nodes:
+        return
+
+    start_time = time.monotonic()
+    deadline = start_time + _SSH_WAIT_TIMEOUT_SECONDS
+    # Each check is limited, so no node is waited for longer than the
+    # deadline plus one check.
+    with ThreadPoolExecutor(max_workers=_SSH_WAIT_CONCURRENCY) as executor:
+        futures = {
+            executor.submit(_wait_for_ssh, node=node, deadline=deadline): node
+            for node in nodes
+        }
+
+    errors = []  # type: List[BaseException]
+    slow_nodes = []  # type: List[str]
+    for future, node in futures.items():
+        exception = future.exception()
+        if exception is not None:
+            LOGGER.error(
+                'SSH was not available on {node} within {seconds} seconds: '
+                '{exception}'.format(
+                    node=node,
+                    seconds=_SSH_WAIT_TIMEOUT_SECONDS,
+                    exception=exception,
+                ),
+            )
+            errors.append(exception)
+            continue
+
+        attempts = future.result()
+        if attempts > 1:
+            slow_nodes.append(
+                '{node} ({attempts} attempts)'.format(
+                    node=node,
+                    attempts=attempts,
+                ),
+            )
+
+    if errors:
+        raise errors[0]
+
+    if slow_nodes:
+        LOGGER.info(
+            'SSH was slow to become available on: {nodes}.'.format(
+                nodes=', '.join(sorted(slow_nodes)),
+            ),
+        )
+
+    LOGGER.info(
+        'SSH was available on all nodes after {seconds:.1f} seconds.'.format(
+            seconds=time.monotonic() - start_time,
+        ),
     )
 
 
-@retry(exceptions=(retrying.RetryError, ))
-def _test_utils_wait_for_dcos(
-    session: Union[DcosApiSession, EnterpriseApiSession],
+def _install_dcos_on_node(
+    node: Node,
+    role: Role,
+    install: Callable[..., None],
 ) -> None:
     """
-    Wait for DC/OS using DC/OS Test Utils.
+    Install DC/OS on a node with the given role, and log how long it took.
 
-    DC/OS Test Utils raises its own timeout, a ``retrying.RetryError``.
-    We want to ignore this error and use our own timeouts, so we wrap this in
-    our own retried function.
+    Args:
+        node: The node to install DC/OS on.
+        role: The role to install.
+        install: An unbound ``Node`` install method with all arguments but
+            ``role`` bound.
     """
-    session.wait_for_dcos()  # type: ignore
+    start_time = time.monotonic()
+    try:
+        install(node, role=role)
+    except Exception as exc:
+        LOGGER.error(
+            'Installing DC/OS on {node} failed after {seconds:.1f} '
+            'seconds: {exception}'.format(
+                node=node,
+                seconds=time.monotonic() - start_time,
+                exception=exc,
+            ),
+        )
+        raise
+
+    LOGGER.info(
+        'Installed DC/OS on {node} in {seconds:.1f} seconds.'.format(
+            node=node,
+            seconds=time.monotonic() - start_time,
+        ),
+    )
+
+
+class NodeRunResult:
+    """
+    The result of running a command on one node with
+    :py:meth:`~dcos_e2e.cluster.Cluster.run_on_nodes`.
+
+    Attributes:
+        completed_process: The representation of the finished process, or
+            ``None`` if running the command raised an exception.
+        exception: The exception raised when running the command, or ``None``.
+            This is a ``subprocess.CalledProcessError`` if the command exited
+            with a non-zero code.
+        seconds: The wall clock time, in seconds, taken to run the command.
+    """
+
+    def __init__(
+        self,
+        completed_process: Optional[subprocess.CompletedProcess],
+        exception: Optional[Exception],
+        seconds: float,
+    ) -> None:
+        """
+        Args:
+            completed_process: The representation of the finished process, or
+                ``None`` if running the command raised an exception.
+            exception: The exception raised when running the command, or
+                ``None``.
+            seconds: The wall clock time, in seconds, taken to run the
+                command.
+        """
+        self.completed_process = completed_process
+        self.exception = exception
+        self.seconds = seconds
+
+    def check_returncode(self) -> None:
+        """
+        Raise the exception raised when running the command, if there was one.
+
+        Raises:
+            subprocess.CalledProcessError: The process exited with a non-zero
+                code.
+        """
+        if self.exception is not None:
+            raise self.exception
 
 
 class Cluster(ContextDecorator):
@@ -94,12 +286,9 @@ class Cluster(ContextDecorator):
             cluster_backend=cluster_backend,
         )  # type: ClusterManager
 
-        for node in {
-            *self.masters,
-            *self.agents,
-            *self.public_agents,
-        }:
-            _wait_for_ssh(node=node)
+        _wait_for_ssh_on_nodes(
+            nodes={*self.masters, *self.agents, *self.public_agents},
+        )
 
     @classmethod
     def from_nodes(
@@ -132,13 +321,10 @@ class Cluster(ContextDecorator):
             cluster_backend=backend,
         )
 
-    @retry(
-        exceptions=(subprocess.CalledProcessError),
-        delay=10,
-    )
-    def _wait_for_node_poststart(self) -> None:
+    def _node_poststart_checks(self) -> Dict[str, Check]:
         """
-        Wait until all DC/OS node-poststart checks are healthy.
+        Return checks, by name, which pass when all DC/OS node-poststart
+        checks are healthy on a master.
 
         The execution will differ for different version of DC/OS.
         ``dcos-check-runner`` only exists on DC/OS 1.12+. ``dcos-diagnostics
@@ -146,26 +332,30 @@ class Cluster(ContextDecorator):
         exists on DC/OS 1.9. ``node-poststart`` requires ``sudo`` to allow
         reading the CA certificate used by certain checks.
         """
-        for node in self.masters:
-            node.run(
-                args=[
-                    'sudo',
-                    '/opt/mesosphere/bin/dcos-check-runner',
-                    'check',
-                    'node-poststart',
-                    '||',
-                    'sudo',
-                    '/opt/mesosphere/bin/dcos-diagnostics',
-                    'check',
-                    'node-poststart',
-                    '||',
-                    '/opt/mesosphere/bin/3dt',
-                    '--diag',
-                ],
+        args = [
+            'sudo',
+            '/opt/mesosphere/bin/dcos-check-runner',
+            'check',
+            'node-poststart',
+            '||',
+            'sudo',
+            '/opt/mesosphere/bin/dcos-diagnostics',
+            'check',
+            'node-poststart',
+            '||',
+            '/opt/mesosphere/bin/3dt',
+            '--diag',
+        ]
+        return {
+            'node-poststart checks on {node}'.format(node=node): partial(
+                node.run,
+                args=args,
                 # Keep in mind this must be run as privileged user.
                 output=Output.LOG_AND_CAPTURE,
                 shell=True,
             )
+            for node in self.masters
+        }
 
     def wait_for_dcos_oss(
         self,
@@ -200,8 +390,8 @@ class Cluster(ContextDecorator):
             Wait until DC/OS OSS is up or timeout hits.
             """
 
-            self._wait_for_node_poststart()
             if not http_checks:
+                wait_for_checks(checks=self._node_poststart_checks())
                 return
 
             email = 'albert@bekstil.net'
@@ -260,14 +450,6 @@ class Cluster(ContextDecorator):
             # DC/OS checks for every HTTP endpoint exposed by Admin Router.
 
             any_master = next(iter(self.masters))
-            # This allows this function to work even after a user has logged
-            # in.
-            any_master.run(
-                args=create_user_args,
-                shell=True,
-                output=Output.CAPTURE,
-            )
-
             credentials = CI_CREDENTIALS
 
             api_session = DcosApiSession(
@@ -280,7 +462,25 @@ class Cluster(ContextDecorator):
                 auth_user=DcosUser(credentials=credentials),
             )
 
-            _test_utils_wait_for_dcos(session=api_session)
+            # Checks which do not depend on each other are run concurrently,
+            # so that waiting takes about as long as the slowest component.
+            wait_for_checks(
+                checks={
+                    **self._node_poststart_checks(),
+                    'Admin Router': admin_router_check(session=api_session),
+                },
+            )
+
+            # This allows this function to work even after a user has logged
+            # in.
+            any_master.run(
+                args=create_user_args,
+                shell=True,
+                output=Output.CAPTURE,
+            )
+
+            wait_for_checks(checks={'Login': login_check(session=api_session)})
+            wait_for_checks(checks=service_checks(session=api_session))
 
             # Only the first user can log in with SSO, before granting others
             # access.
@@ -329,8 +529,8 @@ class Cluster(ContextDecorator):
             Wait until DC/OS Enterprise is up or timeout hits.
             """
 
-            self._wait_for_node_poststart()
             if not http_checks:
+                wait_for_checks(checks=self._node_poststart_checks())
                 return
 
             # The dcos-diagnostics check is not yet sufficient to determine
@@ -379,20 +579,26 @@ class Cluster(ContextDecorator):
                 auth_user=DcosUser(credentials=credentials),
             )
 
+            # Checks which do not depend on each other are run concurrently,
+            # so that waiting takes about as long as the slowest component.
+            wait_for_checks(
+                checks={
+                    **self._node_poststart_checks(),
+                    'Admin Router': admin_router_check(
+                        session=enterprise_session,
+                    ),
+                },
+            )
+
             if ssl_enabled:
-                response = enterprise_session.get(
-                    # Avoid hitting a RetryError in the get function.
-                    # Waiting a year is considered equivalent to an
-                    # infinite timeout.
-                    '/ca/dcos-ca.crt',
-                    retry_timeout=60 * 60 * 24 * 365,
-                    verify=False,
+                wait_for_checks(
+                    checks={'CA certificate': enterprise_session.set_ca_cert},
                 )
-                response.raise_for_status()
-                # This is already done in enterprise_session.wait_for_dcos()
-                enterprise_session.set_ca_cert()
 
-            _test_utils_wait_for_dcos(session=enterprise_session)
+            wait_for_checks(
+                checks={'Login': login_check(session=enterprise_session)},
+            )
+            wait_for_checks(checks=service_checks(session=enterprise_session))
 
         wait_for_dcos_ee_until_timeout()
 
@@ -443,6 +649,168 @@ class Cluster(ContextDecorator):
             **self._cluster.base_config,
         }
 
+    def run_on_nodes(
+        self,
+        args: List[str],
+        roles: Iterable[Role] = (
+            Role.MASTER,
+            Role.AGENT,
+            Role.PUBLIC_AGENT,
+        ),
+        user: Optional[str] = None,
+        output: Output = Output.CAPTURE,
+        env: Optional[Dict[str, Any]] = None,
+        shell: bool = False,
+        transport: Optional[Transport] = None,
+        sudo: bool = False,
+        concurrency: int = 8,
+        fail_fast: bool = False,
+    ) -> Dict[Node, NodeRunResult]:
+        """
+        Run a command on many nodes of this cluster at the same time.
+
+        Errors do not stop the command from running on other nodes unless
+        ``fail_fast`` is ``True``.
+
+        Args:
+            args: The command to run on each node.
+            roles: The roles of the nodes to run the command on. By default,
+                the command is run on all nodes.
+            user: The username to communicate as. If ``None`` then the
+                ``default_user`` of each node is used instead.
+            output: What happens with stdout and stderr.
+            env: Environment variables to be set on each node before running
+                the command. A mapping of environment variable names to
+                values.
+            shell: If ``False`` (the default), each argument is passed as a
+                literal value to the command.  If True, the command line is
+                interpreted as a shell command. See
+                :py:meth:`~dcos_e2e.node.Node.run`.
+            transport: The transport to use for communicating with nodes. If
+                ``None``, the ``default_transport`` of each node is used.
+            sudo: Whether to use "sudo" to run commands.
+            concurrency: The maximum number of nodes to run the command on at
+                the same time.
+            fail_fast: If ``True``, the command is not started on any more
+                nodes after it fails on one node.
+
+        Returns:
+            The result of running the command on each node, by node.
+            Nodes on which the command was not started because of
+            ``fail_fast`` are not included.
+        """
+        nodes_by_role = {
+            Role.MASTER: self.masters,
+            Role.AGENT: self.agents,
+            Role.PUBLIC_AGENT: self.public_agents,
+        }
+        nodes = set()  # type: Set[Node]
+        for role in roles:
+            nodes |= nodes_by_role[role]
+
+        failed = threading.Event()
+
+        def run_on_node(node: Node) -> Optional[NodeRunResult]:
+            """
+            Run the command on the given node, unless it has failed on another
+            node and ``fail_fast`` is set.
+            """
+            if fail_fast and failed.is_set():
+                return None
+
+            start_time = time.monotonic()
+            try:
+                completed_process = node.run(
+                    args=args,
+                    user=user,
+                    output=output,
+                    env=env,
+                    shell=shell,
+                    transport=transport,
+                    sudo=sudo,
+                )
+            except Exception as exc:  # pylint: disable=broad-except
+                failed.set()
+                return NodeRunResult(
+                    completed_process=None,
+                    exception=exc,
+                    seconds=time.monotonic() - start_time,
+                )
+
+            return NodeRunResult(
+                completed_process=completed_process,
+                exception=None,
+                seconds=time.monotonic() - start_time,
+            )
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = {
+                node: executor.submit(run_on_node, node)
+                for node in nodes
+            }
+
+        results = {}  # type: Dict[Node, NodeRunResult]
+        for node, future in futures.items():
+            result = future.result()
+            if result is None:
+                continue
+            LOGGER.debug(
+                '{args} {status} on {node} after {seconds:.1f} '
+                'seconds.'.format(
+                    args=args,
+                    status='failed' if result.exception else 'succeeded',
+                    node=node,
+                    seconds=result.seconds,
+                ),
+            )
+            results[node] = result
+
+        return results
+
+    def _install_dcos_on_each_node(
+        self,
+        install: Callable[..., None],
+        concurrency: int,
+    ) -> None:
+        """
+        Install DC/OS on every node without a bootstrap node.
+
+        All masters are installed concurrently, and then all agents and public
+        agents are installed concurrently.
+
+        Args:
+            install: An unbound ``Node`` install method with all arguments but
+                ``role`` bound.
+            concurrency: The maximum number of nodes to install DC/OS on at
+                the same time.
+
+        Raises:
+            Exception: The error from the first failed node.
+                Errors from all failed nodes are logged.
+        """
+        for phase in (
+            ((self.masters, Role.MASTER), ),
+            (
+                (self.agents, Role.AGENT),
+                (self.public_agents, Role.PUBLIC_AGENT),
+            ),
+        ):
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                futures = [
+                    executor.submit(
+                        _install_dcos_on_node,
+                        node=node,
+                        role=role,
+                        install=install,
+                    ) for nodes, role in phase for node in nodes
+                ]
+
+            for future in futures:
+                # Errors from every node have already been logged.
+                error = future.exception()
+                if error is not None:
+                    raise error
+
     def install_dcos_from_url(
         self,
         dcos_installer: str,
@@ -450,6 +818,7 @@ class Cluster(ContextDecorator):
         ip_detect_path: Path,
         output: Output = Output.CAPTURE,
         files_to_copy_to_genconf_dir: Iterable[Tuple[Path, Path]] = (),
+        concurrency: int = 8,
     ) -> None:
         """
         Installs DC/OS using the DC/OS advanced installation method.
@@ -465,7 +834,9 @@ class Cluster(ContextDecorator):
         However, some backends may not support using a bootstrap node. For
         these backends, each node will download and extract the installer.
         This may be very slow, as the installer is downloaded to
-        and extracted on each node, one at a time.
+        and extracted on each node.
+        Up to ``concurrency`` nodes are installed at a time, and all masters
+        are installed before any agents.
 
         Args:
             dcos_installer: The URL string to an installer to install DC/OS
@@ -477,6 +848,9 @@ class Cluster(ContextDecorator):
                 the installer node. These are files to copy from the host to
                 the installer node before installing DC/OS.
             output: What happens with stdout and stderr.
+            concurrency: The maximum number of nodes to install DC/OS on at
+                the same time, if the backend does not support using a
+                bootstrap node.
         """
         try:
             self._cluster.install_dcos_from_url_with_bootstrap_node(
@@ -487,22 +861,17 @@ class Cluster(ContextDecorator):
                 output=output,
             )
         except NotImplementedError:
-            for nodes, role in (
-                (self.masters, Role.MASTER),
-                (self.agents, Role.AGENT),
-                (self.public_agents, Role.PUBLIC_AGENT),
-            ):
-                for node in nodes:
-                    node.install_dcos_from_url(
-                        dcos_installer=dcos_installer,
-                        dcos_config=dcos_config,
-                        ip_detect_path=ip_detect_path,
-                        files_to_copy_to_genconf_dir=(
-                            files_to_copy_to_genconf_dir
-                        ),
-                        role=role,
-                        output=output,
-                    )
+            self._install_dcos_on_each_node(
+                install=partial(
+                    Node.install_dcos_from_url,
+                    dcos_installer=dcos_installer,
+                    dcos_config=dcos_config,
+                    ip_detect_path=ip_detect_path,
+                    files_to_copy_to_genconf_dir=files_to_copy_to_genconf_dir,
+                    output=output,
+                ),
+                concurrency=concurrency,
+            )
 
     def install_dcos_from_path(
         self,
@@ -511,8 +880,16 @@ class Cluster(ContextDecorator):
         ip_detect_path: Path,
         files_to_copy_to_genconf_dir: Iterable[Tuple[Path, Path]] = (),
         output: Output = Output.CAPTURE,
+        concurrency: int = 8,
     ) -> None:
         """
+        Install DC/OS from a given installer.
+
+        If supported by the cluster backend, this uses a bootstrap node.
+        Otherwise, the installer is sent to and extracted on each node.
+        Up to ``concurrency`` nodes are installed at a time, and all masters
+        are installed before any agents.
+
         Args:
             dcos_installer: The `Path` to an installer to install DC/OS
                 from.
@@ -523,6 +900,9 @@ class Cluster(ContextDecorator):
                 the installer node. These are files to copy from the host to
                 the installer node before installing DC/OS.
             output: What happens with stdout and stderr.
+            concurrency: The maximum number of nodes to install DC/OS on at
+                the same time, if the backend does not support using a
+                bootstrap node.
 
         Raises:
             NotImplementedError: `NotImplementedError` because it is more
@@ -538,22 +918,17 @@ class Cluster(ContextDecorator):
                 output=output,
             )
         except NotImplementedError:
-            for nodes, role in (
-                (self.masters, Role.MASTER),
-                (self.agents, Role.AGENT),
-                (self.public_agents, Role.PUBLIC_AGENT),
-            ):
-                for node in nodes:
-                    node.install_dcos_from_path(
-                        dcos_installer=dcos_installer,
-                        dcos_config=dcos_config,
-                        ip_detect_path=ip_detect_path,
-                        role=role,
-                        files_to_copy_to_genconf_dir=(
-                            files_to_copy_to_genconf_dir
-                        ),
-                        output=output,
-                    )
+            self._install_dcos_on_each_node(
+                install=partial(
+                    Node.install_dcos_from_path,
+                    dcos_installer=dcos_installer,
+                    dcos_config=dcos_config,
+                    ip_detect_path=ip_detect_path,
+                    files_to_copy_to_genconf_dir=files_to_copy_to_genconf_dir,
+                    output=output,
+                ),
+                concurrency=concurrency,
+            )
 
     def run_integration_tests(
         self,
@@ -563,6 +938,8 @@ class Cluster(ContextDecorator):
         tty: bool = False,
         test_host: Optional[Node] = None,
         transport: Optional[Transport] = None,
+        output_limit: Optional[int] = None,
+        spool_output: bool = False,
     ) -> subprocess.CompletedProcess:
         """
         Run integration tests on a random master node.
@@ -581,6 +958,13 @@ class Cluster(ContextDecorator):
                 the returned ``subprocess.CompletedProcess``.
             transport: The transport to use for communicating with nodes. If
                 ``None``, the ``Node``'s ``default_transport`` is used.
+            output_limit: When ``output`` is ``Output.LOG_AND_CAPTURE``, the
+                maximum number of bytes of output to keep in memory. The start
+                and the end of the output are kept. If ``None``, all output is
+                kept.
+            spool_output: When ``output`` is ``Output.LOG_AND_CAPTURE``,
+                whether to also write all output to a temporary file. This file
+                is given as the ``stdout_file`` attribute of the result.
 
         Returns:
             The result of the ``pytest`` command.
@@ -628,19 +1012,47 @@ class Cluster(ContextDecorator):
             tty=tty,
             shell=True,
             transport=transport,
+            output_limit=output_limit,
+            spool_output=spool_output,
         )
 
+    def snapshot(self, snapshot_dir: Path) -> None:
+        """
+        Take a snapshot of the cluster which new clusters can be created from.
+
+        Only the Docker backend supports snapshots.
+        See ``snapshot_dir`` in :py:class:`~dcos_e2e.backends.Docker` for how
+        to create a cluster from a snapshot.
+
+        Args:
+            snapshot_dir: A directory, which does not exist, to create the
+                snapshot in.
+
+        Raises:
+            NotImplementedError: The backend does not support snapshots.
+            ValueError: The backend cannot take a snapshot of this cluster.
+        """
+        self._cluster.snapshot(snapshot_dir=snapshot_dir)
+
     def destroy(self) -> None:
         """
         Destroy all nodes in the cluster.
         """
-        self._cluster.destroy()
+        nodes = {*self.masters, *self.agents, *self.public_agents}
+        try:
+            self._cluster.destroy()
+        finally:
+            for node in nodes:
+                close_ssh_connections(public_ip_address=node.public_ip_address)
 
     def destroy_node(self, node: Node) -> None:
         """
         Destroy a node in the cluster.
         """
-        self._cluster.destroy_node(node=node)
+        try:
+            self._cluster.destroy_node(node=node)
+        finally:
+            close_ssh_connections(public_ip_address=node.public_ip_address)
 
     def __exit__(
         self,
@@ -2,20 +2,30 @@
 Tools for managing DC/OS cluster nodes.
 """
 
+import asyncio
+import os
 import subprocess
 import tarfile
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 from ipaddress import IPv4Address
 from pathlib import Path
+from shlex import quote
 from tempfile import gettempdir
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import IO, Any, Dict, Iterable, List, Optional, Tuple
 
 import yaml
 
 from ._node_transports import DockerExecTransport, NodeTransport, SSHTransport
 
 
+# The maximum number of bytes of output from installing DC/OS to keep in
+# memory. This output is logged, and it is only kept for errors.
+_INSTALL_OUTPUT_LIMIT = 1024 * 1024
+
+
 class Role(Enum):
     """
     Roles of DC/OS nodes.
@@ -198,7 +208,11 @@ class Node:
             },
         }
         config_yaml = yaml.dump(data=dcos_config)
-        config_file_path = tempdir / 'config.yaml'
+        # The configuration differs between nodes, so use a unique local path
+        # in case DC/OS is being installed on multiple nodes at once.
+        config_file_path = tempdir / '{unique}-config.yaml'.format(
+            unique=uuid.uuid4().hex,
+        )
         Path(config_file_path).write_text(data=config_yaml)
 
         self.send_file(
@@ -208,6 +222,7 @@ class Node:
             user=user,
             sudo=True,
         )
+        config_file_path.unlink()
 
         for host_path, installer_path in files_to_copy_to_genconf_dir:
             relative_installer_path = installer_path.relative_to('/genconf')
@@ -238,6 +253,7 @@ class Node:
             transport=transport,
             user=user,
             sudo=True,
+            output_limit=_INSTALL_OUTPUT_LIMIT,
         )
 
         self.run(
@@ -246,6 +262,7 @@ class Node:
             transport=transport,
             user=user,
             sudo=True,
+            output_limit=_INSTALL_OUTPUT_LIMIT,
         )
 
         setup_args = [
@@ -265,6 +282,7 @@ class Node:
             transport=transport,
             user=user,
             sudo=True,
+            output_limit=_INSTALL_OUTPUT_LIMIT,
         )
 
     def install_dcos_from_path(
@@ -427,6 +445,8 @@ class Node:
         tty: bool = False,
         transport: Optional[Transport] = None,
         sudo: bool = False,
+        output_limit: Optional[int] = None,
+        spool_output: bool = False,
     ) -> subprocess.CompletedProcess:
         """
         Run a command on this node the given user.
@@ -452,6 +472,13 @@ class Node:
             transport: The transport to use for communicating with nodes. If
                 ``None``, the ``Node``'s ``default_transport`` is used.
             sudo: Whether to use "sudo" to run commands.
+            output_limit: When ``output`` is ``Output.LOG_AND_CAPTURE``, the
+                maximum number of bytes of output to keep in memory. The start
+                and the end of the output are kept. If ``None``, all output is
+                kept.
+            spool_output: When ``output`` is ``Output.LOG_AND_CAPTURE``,
+                whether to also write all output to a temporary file. This file
+                is given as the ``stdout_file`` attribute of the result.
 
         Returns:
             The representation of the finished process.
@@ -496,6 +523,72 @@ class Node:
             ssh_key_path=self._ssh_key_path,
             public_ip_address=self.public_ip_address,
             capture_output=capture_output,
+            output_limit=output_limit,
+            spool_output=spool_output,
+        )
+
+    async def run_async(
+        self,
+        args: List[str],
+        user: Optional[str] = None,
+        output: Output = Output.CAPTURE,
+        env: Optional[Dict[str, Any]] = None,
+        shell: bool = False,
+        transport: Optional[Transport] = None,
+        sudo: bool = False,
+    ) -> subprocess.CompletedProcess:
+        """
+        Run a command on this node the given user, without blocking the event
+        loop.
+
+        This is a coroutine version of :py:meth:`run`.
+        It makes it possible to drive many commands on many nodes from one
+        event loop.
+
+        Args:
+            args: The command to run on the node.
+            user: The username to communicate as. If ``None`` then the
+                ``default_user`` is used instead.
+            output: What happens with stdout and stderr.
+            env: Environment variables to be set on the node before running
+                the command. A mapping of environment variable names to
+                values.
+            shell: If ``False`` (the default), each argument is passed as a
+                literal value to the command.  If True, the command line is
+                interpreted as a shell command. See :py:meth:`run`.
+            transport: The transport to use for communicating with nodes. If
+                ``None``, the ``Node``'s ``default_transport`` is used.
+            sudo: Whether to use "sudo" to run commands.
+
+        Returns:
+            The representation of the finished process.
+
+        Raises:
+            subprocess.CalledProcessError: The process exited with a non-zero
+                code.
+        """
+        env = dict(env or {})
+
+        if shell:
+            args = ['/bin/sh', '-c', ' '.join(args)]
+
+        if sudo:
+            args = ['sudo'] + args
+
+        if user is None:
+            user = self.default_user
+
+        transport = transport or self.default_transport
+        node_transport = self._get_node_transport(transport=transport)
+
+        return await node_transport.run_async(
+            args=args,
+            user=user,
+            log_output_live=output == Output.LOG_AND_CAPTURE,
+            env=env,
+            ssh_key_path=self._ssh_key_path,
+            public_ip_address=self.public_ip_address,
+            capture_output=output != Output.NO_CAPTURE,
         )
 
     def popen(
@@ -545,6 +638,68 @@ class Node:
             public_ip_address=self.public_ip_address,
         )
 
+    def _send_file_args(
+        self,
+        local_path: Path,
+        remote_path: Path,
+        user: str,
+        sudo: bool,
+    ) -> List[str]:
+        """
+        Return a command which extracts a ``tar`` archive of ``local_path``,
+        given on its standard input, to ``remote_path``.
+
+        Args:
+            local_path: The path on the host of the file to send.
+            remote_path: The path on the node to place the file.
+            user: The name of the remote user to send the file.
+            sudo: Whether to use sudo to create the directory which holds the
+                remote file.
+        """
+        sudo_prefix = 'sudo ' if sudo else ''
+        parent = quote(str(remote_path.parent))
+        destination = quote(str(remote_path))
+        if local_path.name == remote_path.name:
+            extract_to_new_path = 'tar -C {parent} -xf -'.format(parent=parent)
+        else:
+            extract_to_new_path = (
+                'tmp="$(mktemp -d {parent}/.dcos-e2e-XXXXXXXX)" && '
+                'tar -C "$tmp" -xf - && '
+                'mv "$tmp"/{name} {destination} && '
+                'rmdir "$tmp"'
+            ).format(
+                parent=parent,
+                name=quote(local_path.name),
+                destination=destination,
+            )
+
+        # We make the parent directory, give it to ``user`` so that ``tar``
+        # can write to it and then give it back to its original owner.
+        # This is all done in one command so that sending a file costs one
+        # round trip to the node.
+        script = '\n'.join(
+            [
+                'set -e',
+                '{sudo}mkdir --parents {parent}',
+                'owner="$({sudo}stat -c %U {parent})"',
+                '{sudo}chown -R {user} {parent}',
+                'if [ -d {destination} ]; then',
+                '    tar -C {destination} -xf -',
+                'else',
+                '    {extract_to_new_path}',
+                'fi',
+                '{sudo}chown -R "$owner" {parent}',
+            ],
+        ).format(
+            sudo=sudo_prefix,
+            parent=parent,
+            user=quote(user),
+            destination=destination,
+            extract_to_new_path=extract_to_new_path,
+        )
+
+        return ['/bin/sh', '-c', script]
+
     def send_file(
         self,
         local_path: Path,
@@ -565,113 +720,187 @@ class Node:
                 ``None``, the ``Node``'s ``default_transport`` is used.
             sudo: Whether to use sudo to create the directory which holds the
                 remote file.
+
+        Raises:
+            subprocess.CalledProcessError: The file could not be sent.
         """
         if user is None:
             user = self.default_user
 
         transport = transport or self.default_transport
         node_transport = self._get_node_transport(transport=transport)
-        mkdir_args = ['mkdir', '--parents', str(remote_path.parent)]
-        self.run(
-            args=mkdir_args,
-            user=user,
-            transport=transport,
-            sudo=sudo,
-        )
 
-        stat_cmd = ['stat', '-c', '"%U"', str(remote_path.parent)]
-        stat_result = self.run(
-            args=stat_cmd,
-            shell=True,
+        args = self._send_file_args(
+            local_path=local_path,
+            remote_path=remote_path,
             user=user,
-            transport=transport,
             sudo=sudo,
         )
-
-        original_parent = stat_result.stdout.decode().strip()
-
-        chown_args = ['chown', '-R', user, str(remote_path.parent)]
-        self.run(
-            args=chown_args,
+        process = node_transport.popen(
+            args=args,
             user=user,
-            transport=transport,
-            sudo=sudo,
+            env={},
+            ssh_key_path=self._ssh_key_path,
+            public_ip_address=self.public_ip_address,
+            pipe_stdin=True,
         )
 
-        tempdir = Path(gettempdir())
-        tar_name = '{unique}.tar'.format(unique=uuid.uuid4().hex)
-        local_tar_path = tempdir / tar_name
+        stdin = process.stdin
+        assert stdin is not None
+        assert process.stdout is not None
+        assert process.stderr is not None
+
+        # The output of the command is read while the archive is written, so
+        # that the command does not block on a full pipe.
+        output = {}  # type: Dict[str, bytes]
+
+        def read_output(name: str, stream: IO[bytes]) -> None:
+            """
+            Read all of ``stream`` into ``output``.
+            """
+            output[name] = stream.read()
+
+        readers = [
+            threading.Thread(
+                target=read_output,
+                kwargs={'name': name, 'stream': stream},
+            ) for name, stream in (
+                ('stdout', process.stdout),
+                ('stderr', process.stderr),
+            )
+        ]
+        for reader in readers:
+            reader.start()
+
+        try:
+            with tarfile.open(
+                fileobj=stdin,
+                mode='w|',
+                dereference=True,
+            ) as tar:
+                tar.add(
+                    str(local_path),
+                    arcname=local_path.name,
+                    recursive=True,
+                )
+        except BrokenPipeError:
+            # The command exited before reading the whole archive.
+            # The failure is reported below.
+            pass
+        finally:
+            try:
+                stdin.close()
+            except BrokenPipeError:
+                pass
+            for reader in readers:
+                reader.join()
+            process.wait()
+
+        stdout = output['stdout']
+        stderr = output['stderr']
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(
+                returncode=process.returncode,
+                cmd=args,
+                output=stdout,
+                stderr=stderr,
+            )
 
-        is_dir = self.run(
-            args=[
-                'python',
-                '-c',
-                '"import os; print(os.path.isdir(\'{remote_path}\'))"'.format(
-                    remote_path=remote_path,
-                ),
-            ],
-            shell=True,
-        ).stdout.decode().strip()
-
-        with tarfile.open(str(local_tar_path), 'w', dereference=True) as tar:
-            arcname = remote_path.relative_to(remote_path.parent)
-            if is_dir == 'True':
-                filename = local_path.relative_to(local_path.parent)
-                arcname = arcname / filename
-            tar.add(str(local_path), arcname=str(arcname), recursive=True)
-
-        # `remote_path` may be a tmpfs mount.
-        # At the time of writing, for example, `/tmp` is a tmpfs mount
-        # on the Docker backend.
-        # Copying files to tmpfs mounts fails silently.
-        # See https://github.com/moby/moby/issues/22020.
-        home_path = self.run(
-            args=['echo', '$HOME'],
-            user=user,
-            transport=transport,
-            sudo=False,
-            shell=True,
-        ).stdout.strip().decode()
-        # Therefore, we create a temporary file within our home directory.
-        # We then remove the temporary file at the end of this function.
+    async def send_file_async(
+        self,
+        local_path: Path,
+        remote_path: Path,
+        user: Optional[str] = None,
+        transport: Optional[Transport] = None,
+        sudo: bool = False,
+    ) -> None:
+        """
+        Copy a file to this node, without blocking the event loop.
 
-        remote_tar_path = Path(home_path) / tar_name
+        This is a coroutine version of :py:meth:`send_file`.
 
-        node_transport.send_file(
-            local_path=local_tar_path,
-            remote_path=remote_tar_path,
-            user=user,
-            ssh_key_path=self._ssh_key_path,
-            public_ip_address=self.public_ip_address,
-        )
+        Args:
+            local_path: The path on the host of the file to send.
+            remote_path: The path on the node to place the file.
+            user: The name of the remote user to send the file. If ``None``,
+                the ``default_user`` is used instead.
+            transport: The transport to use for communicating with nodes. If
+                ``None``, the ``Node``'s ``default_transport`` is used.
+            sudo: Whether to use sudo to create the directory which holds the
+                remote file.
 
-        Path(local_tar_path).unlink()
+        Raises:
+            subprocess.CalledProcessError: The file could not be sent.
+        """
+        if user is None:
+            user = self.default_user
 
-        tar_args = [
-            'tar',
-            '-C',
-            str(remote_path.parent),
-            '-xvf',
-            str(remote_tar_path),
-        ]
-        self.run(
-            args=tar_args,
-            user=user,
-            transport=transport,
-            sudo=False,
-        )
+        transport = transport or self.default_transport
+        node_transport = self._get_node_transport(transport=transport)
 
-        chown_args = ['chown', '-R', original_parent, str(remote_path.parent)]
-        self.run(
-            args=chown_args,
+        args = self._send_file_args(
+            local_path=local_path,
+            remote_path=remote_path,
             user=user,
-            transport=transport,
             sudo=sudo,
         )
 
-        self.run(
-            args=['rm', str(remote_tar_path)],
-            user=user,
-            transport=transport,
-            sudo=sudo,
+        def write_archive(archive: IO[bytes]) -> None:
+            """
+            Write a ``tar`` archive of ``local_path`` to the given pipe, and
+            then close it.
+            """
+            try:
+                with tarfile.open(
+                    fileobj=archive,
+                    mode='w|',
+                    dereference=True,
+                ) as tar:
+                    tar.add(
+                        str(local_path),
+                        arcname=local_path.name,
+                        recursive=True,
+                    )
+            except BrokenPipeError:
+                # The command exited before reading the whole archive.
+                # The failure is reported by the command.
+                pass
+            finally:
+                try:
+                    archive.close()
+                except BrokenPipeError:
+                    pass
+
+        # The archive is streamed to the command through a pipe, as
+        # ``send_file`` streams it, rather than being written to a file first.
+        # ``tarfile`` blocks, so the archive is written in a thread of its
+        # own.
+        # It is not written in the default executor, which reads from the
+        # pipe, as writers which fill it could take every thread.
+        read_fd, write_fd = os.pipe()
+        archive_reader = os.fdopen(read_fd, 'rb')
+        archive_writer = os.fdopen(write_fd, 'wb')
+        loop = asyncio.get_event_loop()
+        writer_executor = ThreadPoolExecutor(max_workers=1)
+        writing = loop.run_in_executor(
+            writer_executor,
+            write_archive,
+            archive_writer,
         )
+        try:
+            await node_transport.run_async(
+                args=args,
+                user=user,
+                log_output_live=False,
+                env={},
+                ssh_key_path=self._ssh_key_path,
+                public_ip_address=self.public_ip_address,
+                capture_output=True,
+                stdin=archive_reader,
+            )
+        finally:
+            # Closing the read end stops the writer if the command exited
+            # before reading the whole archive.
+            archive_reader.close()
+            await writing
+            writer_executor.shutdown(wait=False)
@@ -3,10 +3,11 @@ Common commands and command factories.
 """
 
 from pathlib import Path
+from typing import Optional
 
 import click
-import requests
-from tqdm import tqdm
+
+from .download import download_file
 
 
 @click.command('download-installer')
@@ -35,16 +36,49 @@ from tqdm import tqdm
     show_default=True,
     help='The path to download an installer to.',
 )
-@click.pass_context
+@click.option(
+    '--connections',
+    type=click.IntRange(min=1),
+    default=4,
+    show_default=True,
+    help=(
+        'The maximum number of connections to download over, if the server '
+        'supports range requests.'
+    ),
+)
+@click.option(
+    '--sha256',
+    type=str,
+    help=(
+        'The expected SHA-256 hash of the installer. '
+        'If this is given and a cached download has this hash, the cached '
+        'download is used without contacting the server.'
+    ),
+)
+@click.option(
+    '--cache/--no-cache',
+    default=True,
+    show_default=True,
+    help=(
+        'Whether to use and add to a cache of downloaded installers. '
+        'A cached installer is used if the server reports that the installer '
+        'has not changed since it was downloaded.'
+    ),
+)
 def download_installer(
-    ctx: click.core.Context,
     dcos_version: str,
     download_path: str,
+    connections: int,
+    sha256: Optional[str],
+    cache: bool,
 ) -> None:
     """
     Download a DC/OS Open Source installer.
 
     For DC/OS Enterprise installers, contact your sales representative.
+
+    An interrupted download is resumed when this command is run again with
+    the same URL and download path.
     """
     path = Path(download_path)
     path.parent.mkdir(exist_ok=True, parents=True)
@@ -58,56 +92,16 @@ def download_installer(
         base_url = 'https://downloads.dcos.io/dcos/'
         url = base_url + dcos_version + '/dcos_generate_config.sh'
 
-    head_resp = requests.head(url)
-    if not head_resp.ok:
-        message = 'Cannot download installer from {url}.'.format(url=url)
-        ctx.fail(message=message)
-
     if path.is_dir():
         path = path / 'dcos_generate_config.sh'
 
     if not path.exists():
         path.parent.mkdir(parents=True, exist_ok=True)
 
-    # See
-    # https://stackoverflow.com/questions/16694907/how-to-download-large-file-in-python-with-requests-py
-
-    stream = requests.get(url, stream=True)
-    assert stream.ok
-    content_length = int(stream.headers['Content-Length'])
-    total_written = 0
-    chunk_size = 1024
-    # See http://click.pocoo.org/7/arguments/#file-args for parameter
-    # information.
-    content_iter = stream.iter_content(chunk_size=chunk_size)
-    progress_bar = tqdm(
-        iterable=content_iter,
-        total=content_length / chunk_size,
-        dynamic_ncols=True,
-        bar_format='{l_bar}{bar}',
-        unit_scale=None,
-    )
-    with click.open_file(
-        filename=str(path),
-        mode='wb',
-        atomic=True,
-        lazy=True,
-    ) as file_descriptor:
-        for chunk in progress_bar:
-            # Enable at the start of each chunk, disable at the end, to avoid
-            # showing statistics at the end.
-            progress_bar.disable = False
-            # Filter out keep-alive new chunks.
-            if chunk:
-                total_written += len(chunk)
-                file_descriptor.write(chunk)  # type: ignore
-            progress_bar.disable = True
-
-    message = (
-        'Downloaded {total_written} bytes. '
-        'Expected {content_length} bytes.'
-    ).format(
-        total_written=total_written,
-        content_length=content_length,
+    download_file(
+        url=url,
+        path=path,
+        connections=connections,
+        sha256=sha256,
+        use_cache=cache,
     )
-    assert total_written == content_length, message
@@ -2,17 +2,38 @@
 Common helpers for doctor commands.
 """
 
+import hashlib
+import json
+import os
 import shutil
 import subprocess
 import sys
 import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from enum import IntEnum
 from pathlib import Path
-from typing import Callable, List
+from typing import Any, Dict  # noqa: F401
+from typing import Callable, List, Optional, Sequence, Tuple
 
 import click
 from tqdm import tqdm
 
+from .utils import cache_dir
+
+# The maximum number of checks to run at the same time.
+_MAX_PARALLEL_CHECKS = 8
+
+# The number of seconds for which cached results of slow checks are used.
+_CACHE_TTL = 24 * 60 * 60
+
+# Messages shown by checks which are running in threads started by
+# ``run_doctor_commands`` are collected here, so that they can be shown in
+# the order of the checks.
+_MESSAGES = threading.local()
+
 
 class CheckLevels(IntEnum):
     """
@@ -24,31 +45,41 @@ class CheckLevels(IntEnum):
     ERROR = 3
 
 
+def _write(string: str) -> None:
+    """
+    Show a message, or collect it if it is shown by a running check.
+    """
+    messages = getattr(_MESSAGES, 'messages', None)
+    if messages is not None:
+        messages.append(string)
+        return
+
+    tqdm.write(s='')
+    tqdm.write(s=string)
+
+
 def info(message: str) -> None:
     """
     Show an info message.
     """
-    tqdm.write(s='')
     string = click.style('Note: ', fg='bright_green', bold=True) + message
-    tqdm.write(s=string)
+    _write(string=string)
 
 
 def warn(message: str) -> None:
     """
     Show a warning message.
     """
-    tqdm.write(s='')
     string = click.style('Warning: ', fg='yellow', bold=True) + message
-    tqdm.write(s=string)
+    _write(string=string)
 
 
 def error(message: str) -> None:
     """
     Show an error message.
     """
-    tqdm.write(s='')
     string = click.style('Error: ', fg='red', bold=True) + message
-    tqdm.write(s=string)
+    _write(string=string)
 
 
 def check_1_9_sed() -> CheckLevels:
@@ -85,38 +116,212 @@ def check_ssh() -> CheckLevels:
     return CheckLevels.NONE
 
 
+def _check_name(function: Callable[[], CheckLevels]) -> str:
+    """
+    Return the name of a check function, which may be a partial function.
+    """
+    return str(getattr(function, 'func', function).__name__)
+
+
+def _run_check(
+    function: Callable[[], CheckLevels],
+) -> Tuple[CheckLevels, List[str]]:
+    """
+    Run a check, collecting the messages which it shows.
+
+    Returns:
+        The level of the check and the messages which it showed.
+    """
+    _MESSAGES.messages = []
+    try:
+        level = function()
+        return level, _MESSAGES.messages
+    except Exception as exc:  # pylint: disable=broad-except
+        message = (
+            'There was an unknown error when performing a doctor '
+            'check.\n'
+            'The doctor function was "{doctor_function}".\n'
+            'The error was: "{exception}".'
+        ).format(
+            doctor_function=_check_name(function=function),
+            exception=exc,
+        )
+        error(message=message)
+        return CheckLevels.ERROR, _MESSAGES.messages
+    finally:
+        _MESSAGES.messages = None
+
+
+class _ResultCache:
+    """
+    Results of checks, kept on disk between runs.
+
+    Only results which are not errors are cached, so that a check which
+    failed is run again after the problem is fixed.
+    The cache is only an optimization, so errors reading and writing it are
+    ignored.
+    """
+
+    def __init__(self, cache_key: str) -> None:
+        """
+        Args:
+            cache_key: A value which changes whenever cached results may no
+                longer be valid.
+        """
+        self._cache_key = cache_key
+        self._path = cache_dir() / 'doctor-results.json'
+        try:
+            data = json.loads(self._path.read_text())
+        except (OSError, ValueError):
+            data = {}
+        now = time.time()
+        self._data = {
+            key: value
+            for key, value in data.items()
+            if now - value['time'] < _CACHE_TTL
+        }  # type: Dict[str, Dict[str, Any]]
+
+    def _key(self, function: Callable[[], CheckLevels]) -> str:
+        """
+        Return the key for the result of a check.
+        """
+        name = _check_name(function=function)
+        key = '{cache_key}:{name}'.format(cache_key=self._cache_key, name=name)
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def get(
+        self,
+        function: Callable[[], CheckLevels],
+    ) -> Optional[Tuple[CheckLevels, List[str]]]:
+        """
+        Return the cached result of a check, if there is one.
+        """
+        value = self._data.get(self._key(function=function))
+        if value is None:
+            return None
+        return CheckLevels(value['level']), list(value['messages'])
+
+    def set(
+        self,
+        function: Callable[[], CheckLevels],
+        level: CheckLevels,
+        messages: List[str],
+    ) -> None:
+        """
+        Cache the result of a check.
+        """
+        if level == CheckLevels.ERROR:
+            return
+
+        self._data[self._key(function=function)] = {
+            'level': int(level),
+            'messages': messages,
+            'time': time.time(),
+        }
+        tmp_path = self._path.parent / '{name}.{unique}.tmp'.format(
+            name=self._path.name,
+            unique=uuid.uuid4().hex,
+        )
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(json.dumps(self._data))
+            os.replace(str(tmp_path), str(self._path))
+        except OSError:
+            pass
+
+
+def _run_checks_in_parallel(
+    check_functions: Sequence[Callable[[], CheckLevels]],
+    progress_bar: tqdm,
+    result_cache: Optional[_ResultCache],
+) -> None:
+    """
+    Run checks at the same time, then show their messages in the order of the
+    checks.
+
+    Exits if a check shows an error, after showing the messages of the checks
+    before it.
+    """
+    progress_bar_lock = threading.Lock()
+
+    def run(
+        function: Callable[[], CheckLevels],
+    ) -> Tuple[CheckLevels, List[str]]:
+        """
+        Run a check, or get its cached result, and update the progress bar.
+        """
+        result = None
+        if result_cache is not None:
+            result = result_cache.get(function=function)
+        if result is None:
+            result = _run_check(function=function)
+            if result_cache is not None:
+                result_cache.set(
+                    function=function,
+                    level=result[0],
+                    messages=result[1],
+                )
+
+        with progress_bar_lock:
+            progress_bar.update(1)
+        return result
+
+    if not check_functions:
+        return
+
+    max_workers = min(len(check_functions), _MAX_PARALLEL_CHECKS)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(run, check_functions))
+
+    for level, messages in results:
+        for message in messages:
+            _write(string=message)
+        if level == CheckLevels.ERROR:
+            sys.exit(1)
+
+
 def run_doctor_commands(
     check_functions: List[Callable[[], CheckLevels]],
+    slow_check_functions: Sequence[Callable[[], CheckLevels]] = (),
+    cache_key: Optional[str] = None,
 ) -> None:
     """
     Run doctor commands.
+
+    Checks are run at the same time, and their messages are shown in the
+    order of the checks.
+    The command exits at the first check, in that order, which shows an error.
+
+    Args:
+        check_functions: Checks which are independent of each other.
+        slow_check_functions: Checks which are run at the same time as each
+            other, only after all ``check_functions`` pass.
+            For example, checks which create a cluster.
+        cache_key: A value which identifies the environment which the checks
+            run in, such as the Docker daemon.
+            If this is given, the results of ``slow_check_functions`` which do
+            not show errors are cached on disk, and are reused while the
+            environment is the same for up to ``_CACHE_TTL`` seconds.
     """
+    result_cache = None  # type: Optional[_ResultCache]
+    if cache_key is not None:
+        result_cache = _ResultCache(cache_key=cache_key)
+
     progress_bar = tqdm(
-        iterable=check_functions,
+        total=len(check_functions) + len(slow_check_functions),
         dynamic_ncols=True,
         bar_format='{n_fmt}/{total_fmt} checks complete: {bar}',
         unit_scale=None,
     )
 
-    for function in progress_bar:
-        # Enable at the start of each chunk, disable at the end, to avoid
-        # showing statistics at the end.
-        progress_bar.disable = False
-        try:
-            level = function()
-        except Exception as exc:  # pylint: disable=broad-except
-            message = (
-                'There was an unknown error when performing a doctor '
-                'check.\n'
-                'The doctor function was "{doctor_function}".\n'
-                'The error was: "{exception}".'
-            ).format(
-                doctor_function=function.__name__,
-                exception=exc,
-            )
-            error(message=message)
-            sys.exit(1)
-
-        if level == CheckLevels.ERROR:
-            sys.exit(1)
-        progress_bar.disable = True
+    with progress_bar:
+        _run_checks_in_parallel(
+            check_functions=check_functions,
+            progress_bar=progress_bar,
+            result_cache=None,
+        )
+        _run_checks_in_parallel(
+            check_functions=slow_check_functions,
+            progress_bar=progress_bar,
+            result_cache=result_cache,
+        )
@@ -0,0 +1,428 @@
+"""
+Download large files such as DC/OS installers.
+
+Files are downloaded in parts over many connections with HTTP range requests.
+The parts are written to a file which is created at its full size before the
+download starts.
+Which parts have been downloaded is recorded in a progress file next to it, so
+that an interrupted download can be resumed.
+
+Downloaded files are kept in the cache in ``dcos_e2e._download_cache``, which
+is also used by the Docker backend.
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Set  # noqa: F401
+from typing import Callable, Optional
+
+import click
+import requests
+from tqdm import tqdm
+
+from dcos_e2e._download_cache import (
+    DownloadCache,
+    content_length,
+    copy_file,
+    file_sha256,
+    validator,
+)
+
+from .utils import cache_dir
+
+# The number of bytes requested in each range request.
+_PART_SIZE = 16 * 1024 * 1024
+
+# The number of bytes read from a response at a time.
+_BUFFER_SIZE = 1024 * 1024
+
+# The maximum number of downloaded files to keep in the cache.
+_DOWNLOAD_CACHE_SIZE = 3
+
+# The number of seconds to wait for a server to send data.
+_TIMEOUT = 60
+
+
+class _Remote:
+    """
+    Details of a file to download, from a ``HEAD`` request.
+
+    Attributes:
+        url: The URL of the file.
+        length: The size of the file in bytes, if the server gives it.
+        accepts_ranges: Whether the server accepts range requests.
+        validator: A value which changes when the file changes, from the
+            ``ETag`` or ``Last-Modified`` headers, or an empty string.
+            Weak ``ETag`` values are not used as they cannot be given in an
+            ``If-Range`` header.
+    """
+
+    def __init__(self, url: str) -> None:
+        """
+        Args:
+            url: The URL of the file.
+
+        Raises:
+            click.ClickException: The file cannot be downloaded.
+        """
+        response = requests.head(url, allow_redirects=True, timeout=_TIMEOUT)
+        if not response.ok:
+            message = 'Cannot download {url}.'.format(url=url)
+            raise click.ClickException(message)
+
+        headers = response.headers
+        self.url = response.url
+        self.length = content_length(headers=headers)
+        self.accepts_ranges = headers.get('Accept-Ranges') == 'bytes'
+        self.validator = validator(headers=headers)
+
+
+class _Progress:
+    """
+    A record of which parts of a file have been downloaded, kept in a file so
+    that a download can be resumed.
+    """
+
+    def __init__(self, path: Path, part_path: Path, remote: _Remote) -> None:
+        """
+        Args:
+            path: The path to the progress file.
+            part_path: The path to the file which is being downloaded to.
+            remote: The file which is being downloaded.
+        """
+        self._path = path
+        self._part_path = part_path
+        self._length = remote.length
+        self._key = {
+            'url': remote.url,
+            'length': remote.length,
+            'validator': remote.validator,
+            'part_size': _PART_SIZE,
+        }
+        self._lock = threading.Lock()
+        self.done_parts = set()  # type: Set[int]
+
+    def load(self) -> bool:
+        """
+        Load the parts which were downloaded by an earlier attempt to download
+        the same file.
+
+        Returns:
+            Whether there was progress to resume.
+        """
+        try:
+            data = json.loads(self._path.read_text())
+            part_size = self._part_path.stat().st_size
+        except (OSError, ValueError):
+            return False
+
+        if part_size != self._length:
+            return False
+
+        if not self._key['validator'] or data.get('key') != self._key:
+            return False
+
+        self.done_parts = set(data['done_parts'])
+        return True
+
+    def mark_done(self, part: int) -> None:
+        """
+        Record that a part has been downloaded.
+        """
+        with self._lock:
+            self.done_parts.add(part)
+            data = {
+                'key': self._key,
+                'done_parts': sorted(self.done_parts),
+            }
+            tmp_path = self._path.with_suffix('.tmp')
+            tmp_path.write_text(json.dumps(data))
+            os.replace(str(tmp_path), str(self._path))
+
+    def remove(self) -> None:
+        """
+        Remove the progress file.
+        """
+        if self._path.exists():
+            self._path.unlink()
+
+
+def _download_range(
+    remote: _Remote,
+    path: Path,
+    start: int,
+    end: int,
+    on_chunk: Callable[[int], None],
+    stop: threading.Event,
+) -> None:
+    """
+    Download the bytes from ``start`` to ``end`` inclusive into the same place
+    in the file at ``path``.
+
+    Raises:
+        click.ClickException: The server did not send the requested bytes.
+    """
+    headers = {'Range': 'bytes={start}-{end}'.format(start=start, end=end)}
+    if remote.validator:
+        # If the file has changed, the server sends all of it with a 200
+        # status rather than mixing parts of two files.
+        headers['If-Range'] = remote.validator
+
+    response = requests.get(
+        remote.url,
+        headers=headers,
+        stream=True,
+        timeout=_TIMEOUT,
+    )
+    if response.status_code != 206:
+        response.close()
+        message = (
+            'Cannot download bytes {start}-{end} of {url}. '
+            'The file may have changed during the download.'
+        ).format(start=start, end=end, url=remote.url)
+        raise click.ClickException(message)
+
+    written = 0
+    with response, path.open('r+b') as file_descriptor:
+        file_descriptor.seek(start)
+        for chunk in response.iter_content(chunk_size=_BUFFER_SIZE):
+            if stop.is_set():
+                return
+            file_descriptor.write(chunk)
+            written += len(chunk)
+            on_chunk(len(chunk))
+
+    if written != end - start + 1:
+        message = (
+            'Downloaded {written} bytes of {url} at offset {start}. '
+            'Expected {expected} bytes.'
+        ).format(
+            written=written,
+            url=remote.url,
+            start=start,
+            expected=end - start + 1,
+        )
+        raise click.ClickException(message)
+
+
+def _download_in_parts(
+    remote: _Remote,
+    part_path: Path,
+    progress: _Progress,
+    connections: int,
+) -> None:
+    """
+    Download a file with range requests over many connections, skipping parts
+    which have already been downloaded.
+    """
+    assert remote.length is not None
+    length = remote.length
+    parts = [
+        (index, start, min(start + _PART_SIZE, length) - 1)
+        for index, start in enumerate(range(0, length, _PART_SIZE))
+    ]
+    remaining = [part for part in parts if part[0] not in progress.done_parts]
+    done_bytes = sum(
+        end - start + 1 for index, start, end in parts
+        if index in progress.done_parts
+    )
+
+    progress_bar = tqdm(
+        total=length,
+        initial=done_bytes,
+        dynamic_ncols=True,
+        bar_format='{l_bar}{bar}',
+        unit_scale=None,
+    )
+    progress_bar_lock = threading.Lock()
+
+    def on_chunk(size: int) -> None:
+        """
+        Show that ``size`` more bytes have been downloaded.
+        """
+        with progress_bar_lock:
+            progress_bar.update(size)
+
+    stop = threading.Event()
+
+    def download_part(index: int, start: int, end: int) -> None:
+        """
+        Download one part and record that it is done.
+        """
+        if stop.is_set():
+            return
+        _download_range(
+            remote=remote,
+            path=part_path,
+            start=start,
+            end=end,
+            on_chunk=on_chunk,
+            stop=stop,
+        )
+        if not stop.is_set():
+            progress.mark_done(part=index)
+
+    errors = []  # type: List[BaseException]
+    with progress_bar, ThreadPoolExecutor(max_workers=connections) as executor:
+        futures = [
+            executor.submit(download_part, index, start, end)
+            for index, start, end in remaining
+        ]
+        try:
+            for future in futures:
+                exception = future.exception()
+                if exception is not None:
+                    errors.append(exception)
+                    stop.set()
+        except BaseException:
+            # For example, the user pressed Ctrl-C.
+            # This is set before the executor waits for running parts to
+            # finish, so that they stop early.
+            # Parts which are not finished are downloaded again on resuming.
+            stop.set()
+            raise
+
+    if errors:
+        raise errors[0]
+
+
+def _download_in_one_stream(remote: _Remote, part_path: Path) -> None:
+    """
+    Download a file over one connection.
+    """
+    response = requests.get(remote.url, stream=True, timeout=_TIMEOUT)
+    if not response.ok:
+        message = 'Cannot download {url}.'.format(url=remote.url)
+        raise click.ClickException(message)
+
+    progress_bar = tqdm(
+        total=remote.length,
+        dynamic_ncols=True,
+        bar_format='{l_bar}{bar}',
+        unit_scale=None,
+    )
+    with response, progress_bar, part_path.open('wb') as file_descriptor:
+        for chunk in response.iter_content(chunk_size=_BUFFER_SIZE):
+            file_descriptor.write(chunk)
+            progress_bar.update(len(chunk))
+
+
+def download_file(
+    url: str,
+    path: Path,
+    connections: int,
+    sha256: Optional[str] = None,
+    use_cache: bool = True,
+) -> None:
+    """
+    Download a file, resuming an earlier interrupted download of it.
+
+    Args:
+        url: The URL of the file.
+        path: The path to download the file to.
+        connections: The maximum number of connections to download over.
+        sha256: The expected SHA-256 hash of the file, if known.
+        use_cache: Whether to use and add to the cache of downloaded files.
+
+    Raises:
+        click.ClickException: The file cannot be downloaded, or it does not
+            have the expected size or hash.
+    """
+    download_cache = DownloadCache(
+        directory=cache_dir() / 'downloads',
+        max_entries=_DOWNLOAD_CACHE_SIZE,
+    )
+    if use_cache and sha256 is not None:
+        with download_cache.lock():
+            cached = download_cache.get(sha256=sha256.lower())
+            if cached is not None:
+                message = 'Using cached download {cached}.'.format(
+                    cached=cached,
+                )
+                click.echo(message)
+                copy_file(src=cached, dst=path)
+                return
+
+    remote = _Remote(url=url)
+
+    if use_cache and sha256 is None:
+        with download_cache.lock():
+            cached = download_cache.get_for_url(
+                url=url,
+                remote_validator=remote.validator,
+                length=remote.length,
+            )
+            if cached is not None:
+                message = 'Using cached download {cached}.'.format(
+                    cached=cached,
+                )
+                click.echo(message)
+                copy_file(src=cached, dst=path)
+                return
+
+    part_path = path.parent / (path.name + '.part')
+    progress = _Progress(
+        path=path.parent / (path.name + '.part.json'),
+        part_path=part_path,
+        remote=remote,
+    )
+
+    if remote.accepts_ranges and remote.length:
+        if progress.load():
+            click.echo('Resuming an earlier download.')
+        else:
+            with part_path.open('wb') as file_descriptor:
+                file_descriptor.truncate(remote.length)
+        _download_in_parts(
+            remote=remote,
+            part_path=part_path,
+            progress=progress,
+            connections=connections,
+        )
+    else:
+        progress.remove()
+        _download_in_one_stream(remote=remote, part_path=part_path)
+
+    size = part_path.stat().st_size
+    if remote.length is not None and size != remote.length:
+        part_path.unlink()
+        progress.remove()
+        message = (
+            'Downloaded {size} bytes. '
+            'Expected {length} bytes.'
+        ).format(size=size, length=remote.length)
+        raise click.ClickException(message)
+
+    digest = None  # type: Optional[str]
+    if use_cache or sha256 is not None:
+        digest = file_sha256(path=part_path)
+
+    if sha256 is not None and digest != sha256.lower():
+        part_path.unlink()
+        progress.remove()
+        message = (
+            'The downloaded file has the SHA-256 hash {digest}. '
+            'Expected {sha256}.'
+        ).format(digest=digest, sha256=sha256)
+        raise click.ClickException(message)
+
+    os.replace(str(part_path), str(path))
+    progress.remove()
+
+    if use_cache and digest is not None:
+        # The cache is only an optimization, so errors writing to it are
+        # ignored.
+        try:
+            with download_cache.lock():
+                download_cache.add(
+                    path=path,
+                    sha256=digest,
+                    url=url,
+                    remote_validator=remote.validator,
+                    length=remote.length,
+                )
+        except OSError:
+            pass
@@ -358,6 +358,26 @@ def sync_dir_run_option(command: Callable[..., None]) -> Callable[..., None]:
     return function
 
 
+def incremental_sync_option(command: Callable[..., None],
+                            ) -> Callable[..., None]:
+    """
+    An option decorator for syncing only files which have changed since the
+    last sync.
+    """
+    function = click.option(
+        '--incremental-sync',
+        is_flag=True,
+        help=(
+            'With this flag set, only files which have changed since the last '
+            'sync are synced, and files which have been removed since the '
+            'last sync are deleted. '
+            'This is not supported when syncing DC/OS Open Source tests to a '
+            'DC/OS Enterprise cluster.'
+        ),
+    )(command)  # type: Callable[..., None]
+    return function
+
+
 def verbosity_option(command: Callable[..., None]) -> Callable[..., None]:
     """
     A decorator for setting the verbosity of logging.
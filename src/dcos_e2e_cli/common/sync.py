@@ -2,17 +2,20 @@
 Tools for syncing code to a cluster.
 """
 
-import io
-import subprocess
+import hashlib
+import json
+import os
 import tarfile
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Callable, Optional
+from shlex import quote
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import click
 
 from dcos_e2e.cluster import Cluster
-from dcos_e2e.node import Node
+from dcos_e2e.node import Role
 from dcos_e2e_cli._vendor.dcos_installer_tools import DCOSVariant
 
 SYNC_HELP = (
@@ -33,64 +36,310 @@ SYNC_HELP = (
     This makes an assumption that all DC/OS Enterprise and DC/OS OSS
     integration tests are in the top level ``packages/dcos-integration-test``
     directory.
+
+    With ``--incremental-sync``, only files which have changed since the last
+    sync are sent, and files which have been removed since the last sync are
+    deleted.
+    This is not supported when syncing DC/OS OSS tests to a DC/OS Enterprise
+    cluster.
     """
 )
 
+# The directory on masters which holds a manifest for each synced directory.
+# A manifest describes the files which were synced, so that the next sync can
+# send only the files which have changed.
+# Manifests are not kept in the synced directories, as those are Python
+# packages.
+# They are kept in the active DC/OS directory, so that they are removed when
+# DC/OS is installed again.
+_SYNC_MANIFEST_DIR = Path('/opt/mesosphere/active/.dcos-e2e-sync-manifests')
 
-def _tar_with_filter(
-    path: Path,
-    tar_filter: Callable[[tarfile.TarInfo], Optional[tarfile.TarInfo]],
-) -> io.BytesIO:
+# The names of the members of the ``tar`` file which is sent to masters.
+# Synced files are in a directory, so that they can be extracted apart from
+# the manifest.
+_TAR_FILES_DIR = 'files'
+_TAR_MANIFEST_NAME = 'manifest.json'
+
+
+def _manifest_path(remote_path: Path) -> Path:
+    """
+    Return the path on masters to the manifest of the last sync to a remote
+    directory.
     """
-    Return a tar of a files in a given directory, which are not filtered out
-    by the ``filter``.
+    remote_path_hash = hashlib.sha256(str(remote_path).encode()).hexdigest()
+    return _SYNC_MANIFEST_DIR / (remote_path_hash + '.json')
+
+
+def _is_cache_path(relative_path: str) -> bool:
+    """
+    Return whether a path is a Python or pytest cache file, which is not
+    synced.
+    """
+    return '__pycache__' in relative_path or relative_path.endswith('.pyc')
+
+
+def _local_manifest(
+    path: Path,
+    previous_manifest: Dict[str, Dict[str, Any]],
+) -> Dict[str, Dict[str, Any]]:
     """
-    tarstream = io.BytesIO()
-    with tarfile.TarFile(fileobj=tarstream, mode='w') as tar:
-        tar.add(name=str(path), arcname='/', filter=tar_filter)
-    tarstream.seek(0)
+    Return a manifest of the files to sync in a given directory.
+
+    Hashes from ``previous_manifest`` are used for files which have the same
+    size and modification time as before, so that unchanged files are not
+    read.
 
-    return tarstream
+    Returns:
+        The size, modification time and SHA-256 hash of each file, by path
+        relative to ``path``.
+    """
+    manifest = {}  # type: Dict[str, Dict[str, Any]]
+    for file_path in sorted(path.glob('**/*')):
+        if file_path.is_dir() and not file_path.is_symlink():
+            continue
+        relative_path = str(file_path.relative_to(path))
+        if _is_cache_path(relative_path=relative_path):
+            continue
+
+        file_stat = file_path.lstat()
+        entry = {
+            'size': file_stat.st_size,
+            'mtime': file_stat.st_mtime_ns,
+        }  # type: Dict[str, Any]
+        previous_entry = previous_manifest.get(relative_path, {})
+        if all(previous_entry.get(key) == entry[key] for key in entry):
+            entry['sha256'] = previous_entry['sha256']
+        elif file_path.is_symlink():
+            link_target = os.readlink(str(file_path)).encode()
+            entry['sha256'] = hashlib.sha256(link_target).hexdigest()
+        else:
+            entry['sha256'] = hashlib.sha256(
+                file_path.read_bytes(),
+            ).hexdigest()
+        manifest[relative_path] = entry
+
+    return manifest
+
+
+def _changes(
+    manifest: Dict[str, Dict[str, Any]],
+    previous_manifest: Optional[Dict[str, Dict[str, Any]]],
+) -> Tuple[List[str], List[str]]:
+    """
+    Return what has changed since the last sync.
 
+    Args:
+        manifest: The manifest of the files to sync.
+        previous_manifest: The manifest of the last sync, or ``None`` if all
+            files are to be sent.
 
-def _cache_filter(tar_info: tarfile.TarInfo) -> Optional[tarfile.TarInfo]:
+    Returns:
+        The relative paths of files which are new or have changed, and the
+        relative paths of files which have been removed.
+    """
+    if previous_manifest is None:
+        return sorted(manifest), []
+
+    previous_hashes = {
+        relative_path: entry['sha256']
+        for relative_path, entry in previous_manifest.items()
+    }
+    changed_paths = [
+        relative_path for relative_path, entry in sorted(manifest.items())
+        if previous_hashes.get(relative_path) != entry['sha256']
+    ]
+    deleted_paths = sorted(set(previous_manifest) - set(manifest))
+    return changed_paths, deleted_paths
+
+
+def _remote_manifest(
+    cluster: Cluster,
+    remote_path: Path,
+) -> Optional[Dict[str, Dict[str, Any]]]:
     """
-    Filter for ``tarfile.TarFile.add`` which removes Python and pytest cache
-    files.
+    Return the manifest of the last sync to a remote path, if every master
+    has the same manifest.
+
+    Returns:
+        The manifest, or ``None`` if a master has no manifest or if masters
+        have different manifests.
     """
-    if '__pycache__' in tar_info.name:
+    results = cluster.run_on_nodes(
+        args=['cat', str(_manifest_path(remote_path=remote_path))],
+        roles=(Role.MASTER, ),
+    )
+    manifests = set()
+    for result in results.values():
+        if result.completed_process is None:
+            return None
+        manifests.add(result.completed_process.stdout)
+
+    if len(manifests) != 1:
         return None
-    if tar_info.name.endswith('.pyc'):
+
+    [manifest] = manifests
+    try:
+        return dict(json.loads(manifest.decode()))
+    except ValueError:
         return None
-    return tar_info
 
 
-def _send_tarstream_to_node_and_extract(
-    tarstream: io.BytesIO,
-    node: Node,
+def _run_on_masters(
+    cluster: Cluster,
+    args: List[str],
+    shell: bool = False,
+    check: bool = True,
+) -> None:
+    """
+    Run a command on all masters in a cluster at the same time.
+
+    Args:
+        cluster: The cluster to run the command on.
+        args: The command to run.
+        shell: Whether to interpret the command as a shell command.
+        check: Whether to raise an error if the command fails on any master.
+
+    Raises:
+        subprocess.CalledProcessError: ``check`` is ``True`` and the command
+            failed on a master.
+    """
+    results = cluster.run_on_nodes(
+        args=args,
+        roles=(Role.MASTER, ),
+        shell=shell,
+    )
+    if check:
+        for result in results.values():
+            result.check_returncode()
+
+
+def _send_tarfile_to_masters_and_extract(
+    tar_path: Path,
+    cluster: Cluster,
     remote_path: Path,
+    deleted_paths: Iterable[str],
 ) -> None:
     """
-    Given a tarstream, send the contents to a remote path.
+    Send a tar file to all masters at the same time, delete the given paths
+    and then extract the tar file to a remote path on each master.
+
+    Args:
+        tar_path: The tar file to send.
+        cluster: The cluster to send the tar file to.
+        remote_path: The directory to extract the tar file in.
+        deleted_paths: Paths relative to ``remote_path`` to delete.
+    """
+    remote_tar_path = Path('/tmp/dcos_e2e_tmp.tar')
+    masters = cluster.masters
+    with ThreadPoolExecutor(max_workers=len(masters)) as executor:
+        futures = [
+            executor.submit(
+                master.send_file,
+                local_path=tar_path,
+                remote_path=remote_tar_path,
+            ) for master in masters
+        ]
+    for future in futures:
+        future.result()
+
+    manifest_path = _manifest_path(remote_path=remote_path)
+    # The manifest of the last sync is removed first, so that it is not used
+    # if this sync is interrupted.
+    args = [
+        'rm',
+        '-f',
+        str(manifest_path),
+        '&&',
+        'mkdir',
+        '--parents',
+        quote(str(remote_path)),
+        str(manifest_path.parent),
+    ]
+    deleted_remote_paths = [
+        quote(str(remote_path / deleted_path))
+        for deleted_path in deleted_paths
+    ]
+    if deleted_remote_paths:
+        args += ['&&', 'rm', '-f', '--', *deleted_remote_paths]
+    args += [
+        '&&',
+        'tar',
+        '-C',
+        quote(str(remote_path)),
+        '--strip-components=1',
+        '-xf',
+        str(remote_tar_path),
+        _TAR_FILES_DIR,
+        '&&',
+        'tar',
+        '-xOf',
+        str(remote_tar_path),
+        _TAR_MANIFEST_NAME,
+        '>',
+        str(manifest_path),
+        '&&',
+        'rm',
+        str(remote_tar_path),
+    ]
+    _run_on_masters(cluster=cluster, args=args, shell=True)
+
+
+def _sync_dir_to_masters(
+    cluster: Cluster,
+    local_path: Path,
+    remote_path: Path,
+    previous_manifest: Optional[Dict[str, Dict[str, Any]]],
+) -> None:
     """
-    tar_path = Path('/tmp/dcos_e2e_tmp.tar')
-    with tempfile.NamedTemporaryFile() as tmp_file:
-        tmp_file.write(tarstream.getvalue())
-        tmp_file.flush()
-
-        node.send_file(
-            local_path=Path(tmp_file.name),
-            remote_path=tar_path,
-        )
+    Sync the files in a local directory, other than cache files, to a remote
+    path on all masters.
 
-    tar_args = ['tar', '-C', str(remote_path), '-xvf', str(tar_path)]
-    node.run(args=tar_args)
-    node.run(args=['rm', str(tar_path)])
+    Args:
+        cluster: The cluster to sync files to.
+        local_path: The directory to sync files from.
+        remote_path: The directory to sync files to.
+        previous_manifest: The manifest of the last sync to ``remote_path``.
+            If this is given, only files which have changed since the last
+            sync are sent, and files which have been removed since the last
+            sync are deleted. If this is ``None``, all files are sent.
+    """
+    manifest = _local_manifest(
+        path=local_path,
+        previous_manifest=previous_manifest or {},
+    )
+    changed_paths, deleted_paths = _changes(
+        manifest=manifest,
+        previous_manifest=previous_manifest,
+    )
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tar_path = Path(tmp_dir) / 'sync.tar'
+        manifest_path = Path(tmp_dir) / _TAR_MANIFEST_NAME
+        manifest_path.write_text(json.dumps(manifest, sort_keys=True))
+        with tarfile.open(str(tar_path), mode='w') as tar:
+            # The directory is added even if no files have changed, so that
+            # there is always something to extract.
+            tar.add(name=tmp_dir, arcname=_TAR_FILES_DIR, recursive=False)
+            for relative_path in changed_paths:
+                tar.add(
+                    name=str(local_path / relative_path),
+                    arcname=_TAR_FILES_DIR + '/' + relative_path,
+                    recursive=False,
+                )
+            tar.add(name=str(manifest_path), arcname=_TAR_MANIFEST_NAME)
+
+        _send_tarfile_to_masters_and_extract(
+            tar_path=tar_path,
+            cluster=cluster,
+            remote_path=remote_path,
+            deleted_paths=deleted_paths,
+        )
 
 
 def _sync_bootstrap_to_masters(
     cluster: Cluster,
     dcos_checkout_dir: Path,
+    incremental: bool,
 ) -> None:
     """
     Sync bootstrap code to all masters in a cluster.
@@ -108,18 +357,20 @@ def _sync_bootstrap_to_masters(
     node_bootstrap_dir = (
         node_python_dir / 'site-packages' / 'dcos_internal_utils'
     )
-    bootstrap_tarstream = _tar_with_filter(
-        path=local_bootstrap_dir,
-        tar_filter=_cache_filter,
-    )
-
-    for master in cluster.masters:
-        _send_tarstream_to_node_and_extract(
-            tarstream=bootstrap_tarstream,
-            node=master,
+    previous_manifest = None
+    if incremental:
+        previous_manifest = _remote_manifest(
+            cluster=cluster,
             remote_path=node_bootstrap_dir,
         )
 
+    _sync_dir_to_masters(
+        cluster=cluster,
+        local_path=local_bootstrap_dir,
+        remote_path=node_bootstrap_dir,
+        previous_manifest=previous_manifest,
+    )
+
 
 def _dcos_checkout_dir_variant(dcos_checkout_dir: Path) -> DCOSVariant:
     """
@@ -137,6 +388,7 @@ def sync_code_to_masters(
     cluster: Cluster,
     dcos_checkout_dir: Path,
     dcos_variant: DCOSVariant,
+    incremental: bool = False,
 ) -> None:
     """
     Sync files from a DC/OS checkout to master nodes.
@@ -191,6 +443,9 @@ def sync_code_to_masters(
         dcos_checkout_dir: The path to a DC/OS (Enterprise) checkout to sync
             code from.
         dcos_variant: The DC/OS variant of the cluster.
+        incremental: Whether to send only files which have changed since the
+            last sync. This is ignored when syncing DC/OS OSS tests to a DC/OS
+            Enterprise cluster.
     """
     local_packages = dcos_checkout_dir / 'packages'
     local_test_dir = local_packages / 'dcos-integration-test' / 'extra'
@@ -206,13 +461,6 @@ def sync_code_to_masters(
         dcos_checkout_dir=dcos_checkout_dir,
     )
 
-    node_test_dir = Path('/opt/mesosphere/active/dcos-integration-test')
-
-    test_tarstream = _tar_with_filter(
-        path=local_test_dir,
-        tar_filter=_cache_filter,
-    )
-
     syncing_oss_to_ee = bool(
         dcos_variant == DCOSVariant.ENTERPRISE
         and dcos_checkout_dir_variant == DCOSVariant.OSS,
@@ -222,95 +470,133 @@ def sync_code_to_masters(
     node_test_dir = node_active_dir / 'dcos-integration-test'
 
     if syncing_oss_to_ee:
+        # Files in the test directory are replaced, so the manifest of the
+        # last sync to the test directory no longer describes it.
+        _run_on_masters(
+            cluster=cluster,
+            args=[
+                'rm',
+                '-f',
+                str(_manifest_path(remote_path=node_test_dir)),
+            ],
+        )
+
         # This matches part of
         # https://github.com/mesosphere/dcos-enterprise/blob/master/packages/dcos-integration-test/ee.build
-        for master in cluster.masters:
-            master.run(args=['rm', '-rf', str(node_test_dir / 'util')])
-
-            # This makes an assumption that all tests are at the top level.
-            master.run(
-                args=[
-                    'rm',
-                    '-rf',
-                    str(node_test_dir / 'open_source_tests' / '*.py'),
-                ],
-                # We use a wildcard character, `*`, so we need shell expansion.
-                shell=True,
-            )
+        _run_on_masters(
+            cluster=cluster,
+            args=['rm', '-rf', str(node_test_dir / 'util')],
+        )
 
-            master.run(
-                args=[
-                    'mkdir',
-                    '--parents',
-                    str(node_test_dir / 'open_source_tests'),
-                ],
-            )
+        # This makes an assumption that all tests are at the top level.
+        _run_on_masters(
+            cluster=cluster,
+            args=[
+                'rm',
+                '-rf',
+                str(node_test_dir / 'open_source_tests' / '*.py'),
+            ],
+            # We use a wildcard character, `*`, so we need shell expansion.
+            shell=True,
+        )
 
-            _send_tarstream_to_node_and_extract(
-                tarstream=test_tarstream,
-                node=master,
-                remote_path=node_test_dir / 'open_source_tests',
-            )
-            master.run(
-                args=[
-                    'rm',
-                    '-rf',
-                    str(node_test_dir / 'open_source_tests' / 'conftest.py'),
-                ],
-            )
-            master.run(
-                args=[
-                    'mv',
-                    str(node_test_dir / 'open_source_tests' / 'util'),
-                    str(node_test_dir),
-                ],
-            )
-            try:
-                master.run(
-                    args=[
-                        'mv',
-                        str(node_test_dir / 'open_source_tests' / 'common.py'),
-                        str(node_test_dir),
-                    ],
-                )
-            except subprocess.CalledProcessError:
-                # This file does not exist in DC/OS versions <1.13.
-                pass
+        _run_on_masters(
+            cluster=cluster,
+            args=[
+                'mkdir',
+                '--parents',
+                str(node_test_dir / 'open_source_tests'),
+            ],
+        )
+
+        _sync_dir_to_masters(
+            cluster=cluster,
+            local_path=local_test_dir,
+            remote_path=node_test_dir / 'open_source_tests',
+            previous_manifest=None,
+        )
+        _run_on_masters(
+            cluster=cluster,
+            args=[
+                'rm',
+                '-rf',
+                str(node_test_dir / 'open_source_tests' / 'conftest.py'),
+                str(
+                    _manifest_path(
+                        remote_path=node_test_dir / 'open_source_tests',
+                    ),
+                ),
+            ],
+        )
+        _run_on_masters(
+            cluster=cluster,
+            args=[
+                'mv',
+                str(node_test_dir / 'open_source_tests' / 'util'),
+                str(node_test_dir),
+            ],
+        )
+        _run_on_masters(
+            cluster=cluster,
+            args=[
+                'mv',
+                str(node_test_dir / 'open_source_tests' / 'common.py'),
+                str(node_test_dir),
+            ],
+            # This file does not exist in DC/OS versions <1.13.
+            check=False,
+        )
     else:
         _sync_bootstrap_to_masters(
             cluster=cluster,
             dcos_checkout_dir=dcos_checkout_dir,
+            incremental=incremental,
         )
 
-        for master in cluster.masters:
-            try:
-                master.run(
-                    args=[
-                        'mv',
-                        str(node_test_dir / 'common.py'),
-                        str(node_test_dir / 'common.bak'),
-                    ],
-                )
-            except subprocess.CalledProcessError:
-                pass
-            # This makes an assumption that all tests are at the top level.
-            master.run(
-                args=['rm', '-rf', str(node_test_dir / '*.py')],
-                # We use a wildcard character, `*`, so we need shell expansion.
-                shell=True,
+        previous_manifest = None
+        if incremental:
+            previous_manifest = _remote_manifest(
+                cluster=cluster,
+                remote_path=node_test_dir,
             )
-            try:
-                master.run(
-                    args=[
-                        'mv',
-                        str(node_test_dir / 'common.bak'),
-                        str(node_test_dir / 'common.py'),
-                    ],
-                )
-            except subprocess.CalledProcessError:
-                pass
-            _send_tarstream_to_node_and_extract(
-                tarstream=test_tarstream,
-                node=master,
+
+        if previous_manifest is not None:
+            _sync_dir_to_masters(
+                cluster=cluster,
+                local_path=local_test_dir,
                 remote_path=node_test_dir,
+                previous_manifest=previous_manifest,
             )
+            return
+
+        _run_on_masters(
+            cluster=cluster,
+            args=[
+                'mv',
+                str(node_test_dir / 'common.py'),
+                str(node_test_dir / 'common.bak'),
+            ],
+            check=False,
+        )
+        # This makes an assumption that all tests are at the top level.
+        _run_on_masters(
+            cluster=cluster,
+            args=['rm', '-rf', str(node_test_dir / '*.py')],
+            # We use a wildcard character, `*`, so we need shell expansion.
+            shell=True,
+        )
+        _run_on_masters(
+            cluster=cluster,
+            args=[
+                'mv',
+                str(node_test_dir / 'common.bak'),
+                str(node_test_dir / 'common.py'),
+            ],
+            check=False,
+        )
+        _sync_dir_to_masters(
+            cluster=cluster,
+            local_path=local_test_dir,
+            remote_path=node_test_dir,
+            previous_manifest=None,
+        )
@@ -2,10 +2,14 @@
 Common utilities for making CLIs.
 """
 
+import json
 import logging
+import os
 import stat
 import subprocess
 import sys
+import time
+import uuid
 from pathlib import Path
 from shutil import rmtree
 from typing import Any, Dict, Iterable, Optional, Set, Tuple
@@ -16,6 +20,7 @@ from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric import rsa
 
+from dcos_e2e._common import installer_cache_key
 from dcos_e2e.cluster import Cluster
 from dcos_e2e_cli._vendor.dcos_installer_tools import (
     DCOSVariant,
@@ -25,6 +30,99 @@ from dcos_e2e_cli._vendor.dcos_installer_tools import (
 DEFAULT_SUPERUSER_USERNAME = 'admin'
 DEFAULT_SUPERUSER_PASSWORD = 'admin'
 
+# The maximum number of installers to keep details of in the cache.
+_INSTALLER_DETAILS_CACHE_SIZE = 64
+
+
+def cache_dir() -> Path:
+    """
+    Return a directory for data which is kept between commands to save time.
+
+    This is ``$XDG_CACHE_HOME/minidcos``, or ``~/.cache/minidcos`` if
+    ``XDG_CACHE_HOME`` is not set.
+    """
+    default_cache_home = str(Path.home() / '.cache')
+    cache_home = Path(os.environ.get('XDG_CACHE_HOME', default_cache_home))
+    return cache_home / 'minidcos'
+
+
+def _write_installer_details_cache(
+    cache_path: Path,
+    cache: Dict[str, Dict[str, Any]],
+) -> None:
+    """
+    Write the installer details cache, keeping only the most recently used
+    entries.
+
+    The cache is only an optimization, so errors writing it are ignored.
+    """
+    recent_keys = sorted(
+        cache,
+        key=lambda key: cache[key]['last_used'],
+        reverse=True,
+    )[:_INSTALLER_DETAILS_CACHE_SIZE]
+    cache = {key: cache[key] for key in recent_keys}
+
+    # Write to a temporary file and then move it so that other commands never
+    # read a partially written cache.
+    tmp_path = cache_path.parent / '{name}.{unique}.tmp'.format(
+        name=cache_path.name,
+        unique=uuid.uuid4().hex,
+    )
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_text(json.dumps(cache))
+        os.replace(str(tmp_path), str(cache_path))
+    except OSError:
+        pass
+
+
+def _get_installer_variant(
+    installer_path: Path,
+    workspace_dir: Path,
+) -> DCOSVariant:
+    """
+    Get the variant of DC/OS which an installer installs.
+
+    Finding this requires extracting the installer, which is slow, so details
+    of installers are cached.
+
+    Args:
+        installer_path: The path to a DC/OS installer.
+        workspace_dir: A directory to work in, given that this function uses
+            large files.
+
+    Raises:
+        CalledProcessError: There was an error unpacking the installer.
+        ValueError: A space is in the installer path.
+    """
+    cache_path = cache_dir() / 'installer-details.json'
+    key = installer_cache_key(installer=installer_path)
+    try:
+        cache = json.loads(cache_path.read_text())
+    except (OSError, ValueError):
+        cache = {}
+
+    if not isinstance(cache, dict):
+        cache = {}
+
+    try:
+        variant = DCOSVariant[cache[key]['variant']]
+    except (KeyError, TypeError):
+        details = get_dcos_installer_details(
+            installer=installer_path,
+            workspace_dir=workspace_dir,
+        )
+        variant = details.variant
+        cache[key] = {
+            'variant': variant.name,
+            'version': details.version,
+        }
+
+    cache[key]['last_used'] = time.time()
+    _write_installer_details_cache(cache_path=cache_path, cache=cache)
+    return variant
+
 
 def command_path(
     sibling_ctx: click.core.Context,
@@ -79,6 +177,7 @@ def get_variant(
         given_variant: The variant string given by the user to the
             ``variant_option``. One of "auto", "enterprise" and "oss". If
             "auto" is given, use the DC/OS installer to find the variant.
+            The variant of each installer is cached.
         installer_path: The path to a DC/OS installer, if available.
         workspace_dir: A directory to work in, given that this function uses
             large files.
@@ -94,10 +193,10 @@ def get_variant(
         assert installer_path is not None
         try:
             with click_spinner.spinner():
-                return get_dcos_installer_details(
-                    installer=installer_path,
+                return _get_installer_variant(
+                    installer_path=installer_path,
                     workspace_dir=workspace_dir,
-                ).variant
+                )
         except subprocess.CalledProcessError as exc:
             rmtree(path=str(workspace_dir), ignore_errors=True)
             click.echo(doctor_message)
@@ -3,6 +3,7 @@ Common code for minidcos aws CLI modules.
 """
 
 from pathlib import Path
+from typing import Optional  # noqa: F401
 from typing import Dict, Set
 
 import boto3
@@ -76,14 +77,17 @@ class InstanceInspectView:
         self,
         instance: ServiceResource,
         aws_region: str,
+        cluster_instances: 'ClusterInstances',
     ) -> None:
         """
         Args:
             instance: The EC2 instance which represents the node.
             aws_region: The AWS region the instance is on.
+            cluster_instances: The cluster which the node is in.
         """
         self._instance = instance
         self._aws_region = aws_region
+        self._cluster_instances = cluster_instances
 
     def to_dict(self) -> Dict[str, str]:
         """
@@ -92,14 +96,10 @@ class InstanceInspectView:
         instance = self._instance
         tag_dict = _tag_dict(instance=instance)
         default_user = tag_dict[SSH_USER_TAG_KEY]
-        cluster_id = tag_dict[CLUSTER_ID_TAG_KEY]
         role = tag_dict[NODE_TYPE_TAG_KEY]
         public_ip_address = instance.public_ip_address
         private_ip_address = instance.private_ip_address
-        cluster_instances = ClusterInstances(
-            cluster_id=cluster_id,
-            aws_region=self._aws_region,
-        )
+        cluster_instances = self._cluster_instances
 
         instances = {
             NODE_TYPE_MASTER_TAG_VALUE: cluster_instances.masters,
@@ -137,6 +137,8 @@ class ClusterInstances:
         """
         self._cluster_id = cluster_id
         self._aws_region = aws_region
+        instances = None  # type: Optional[Dict[str, Set[ServiceResource]]]
+        self._instances = instances
 
     def _instances_by_role(
         self,
@@ -144,24 +146,37 @@ class ClusterInstances:
     ) -> Set[ServiceResource]:
         """
         Return all EC2 instances in this cluster of a particular node type.
+
+        The instances of the cluster are described once, when they are first
+        needed, so that the number of EC2 API calls does not grow with the
+        number of nodes.
         """
-        ec2 = boto3.resource('ec2', region_name=self._aws_region)
         node_types = {
             Role.MASTER: NODE_TYPE_MASTER_TAG_VALUE,
             Role.AGENT: NODE_TYPE_AGENT_TAG_VALUE,
             Role.PUBLIC_AGENT: NODE_TYPE_PUBLIC_AGENT_TAG_VALUE,
         }
-        cluster_id_tag_filter = {
-            'Name': 'tag:' + CLUSTER_ID_TAG_KEY,
-            'Values': [self._cluster_id],
-        }
-        node_role_filter = {
-            'Name': 'tag:' + NODE_TYPE_TAG_KEY,
-            'Values': [node_types[role]],
-        }
-        filters = [cluster_id_tag_filter, node_role_filter]
-        ec2_instances = set(ec2.instances.filter(Filters=filters))
-        return ec2_instances
+        if self._instances is None:
+            ec2 = boto3.resource('ec2', region_name=self._aws_region)
+            cluster_id_tag_filter = {
+                'Name': 'tag:' + CLUSTER_ID_TAG_KEY,
+                'Values': [self._cluster_id],
+            }
+            node_role_filter = {
+                'Name': 'tag:' + NODE_TYPE_TAG_KEY,
+                'Values': list(node_types.values()),
+            }
+            filters = [cluster_id_tag_filter, node_role_filter]
+            instances = {
+                node_type: set()
+                for node_type in node_types.values()
+            }  # type: Dict[str, Set[ServiceResource]]
+            for instance in ec2.instances.filter(Filters=filters):
+                node_type = _tag_dict(instance=instance)[NODE_TYPE_TAG_KEY]
+                instances[node_type].add(instance)
+            self._instances = instances
+
+        return set(self._instances[node_types[role]])
 
     def to_node(self, instance: ServiceResource) -> Node:
         """
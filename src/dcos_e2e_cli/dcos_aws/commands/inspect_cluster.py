@@ -51,6 +51,7 @@ def inspect_cluster(cluster_id: str, aws_region: str, verbose: int) -> None:
             InstanceInspectView(
                 instance=instance,
                 aws_region=aws_region,
+                cluster_instances=cluster_instances,
             ).to_dict() for instance in instances
         ]
         for key, instances in keys.items()
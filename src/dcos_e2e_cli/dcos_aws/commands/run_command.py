@@ -14,6 +14,7 @@ from dcos_e2e_cli.common.options import (
     dcos_login_uname_option,
     environment_variables_option,
     existing_cluster_id_option,
+    incremental_sync_option,
     sync_dir_run_option,
     test_env_run_option,
     verbosity_option,
@@ -30,12 +31,18 @@ from ._common import (
 from ._options import aws_region_option
 
 
-def _get_node(cluster_id: str, node_reference: str, aws_region: str) -> Node:
+def _get_node(
+    cluster_instances: ClusterInstances,
+    cluster_id: str,
+    node_reference: str,
+    aws_region: str,
+) -> Node:
     """
     Get a node from a "reference".
 
     Args:
-        cluster_id: The ID of a cluster.
+        cluster_instances: The instances of the cluster.
+        cluster_id: The ID of the cluster.
         node_reference: One of:
             * A node's public IP address
             * A node's private IP address
@@ -49,11 +56,6 @@ def _get_node(cluster_id: str, node_reference: str, aws_region: str) -> Node:
     Raises:
         click.BadParameter: There is no such node.
     """
-    cluster_instances = ClusterInstances(
-        cluster_id=cluster_id,
-        aws_region=aws_region,
-    )
-
     instances = {
         *cluster_instances.masters,
         *cluster_instances.agents,
@@ -64,6 +66,7 @@ def _get_node(cluster_id: str, node_reference: str, aws_region: str) -> Node:
         inspect_data = InstanceInspectView(
             instance=instance,
             aws_region=aws_region,
+            cluster_instances=cluster_instances,
         ).to_dict()
         reference = inspect_data['e2e_reference']
         instance_id = inspect_data['ec2_instance_id']
@@ -97,6 +100,7 @@ def _get_node(cluster_id: str, node_reference: str, aws_region: str) -> Node:
 @dcos_login_uname_option
 @dcos_login_pw_option
 @sync_dir_run_option
+@incremental_sync_option
 @test_env_run_option
 @environment_variables_option
 @aws_region_option
@@ -119,6 +123,7 @@ def run(
     cluster_id: str,
     node_args: Tuple[str],
     sync_dir: Tuple[Path],
+    incremental_sync: bool,
     dcos_login_uname: str,
     dcos_login_pw: str,
     test_env: bool,
@@ -144,6 +149,7 @@ def run(
     )
     cluster = cluster_instances.cluster
     host = _get_node(
+        cluster_instances=cluster_instances,
         cluster_id=cluster_id,
         node_reference=node,
         aws_region=aws_region,
@@ -154,6 +160,7 @@ def run(
             cluster=cluster,
             dcos_checkout_dir=dcos_checkout_dir,
             dcos_variant=cluster_instances.dcos_variant,
+            incremental=incremental_sync,
         )
 
     run_command(
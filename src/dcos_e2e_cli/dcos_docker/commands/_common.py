@@ -6,6 +6,7 @@ import sys
 from ipaddress import IPv4Address
 from pathlib import Path
 from shutil import rmtree
+from typing import Optional  # noqa: F401
 from typing import Dict, List, Set
 
 import click
@@ -13,6 +14,7 @@ import docker
 from docker.client import DockerClient
 from docker.models.containers import Container
 
+from dcos_e2e.backends._docker._containers import remove_containers
 from dcos_e2e.cluster import Cluster
 from dcos_e2e.distributions import Distribution
 from dcos_e2e.docker_storage_drivers import DockerStorageDriver
@@ -49,6 +51,12 @@ NODE_TYPE_MASTER_LABEL_VALUE = 'master'
 NODE_TYPE_AGENT_LABEL_VALUE = 'agent'
 NODE_TYPE_PUBLIC_AGENT_LABEL_VALUE = 'public_agent'
 NODE_TYPE_LOOPBACK_SIDECAR_LABEL_VALUE = 'loopback'
+WARM_POOL_LABEL_KEY = 'dcos_e2e.warm_pool'
+WARM_POOL_DIR_LABEL_KEY = 'dcos_e2e.warm_pool_dir'
+
+# The maximum number of containers to remove at the same time when destroying
+# a cluster.
+_MAX_PARALLEL_REMOVALS = 8
 
 
 def docker_client() -> DockerClient:
@@ -106,12 +114,18 @@ class ContainerInspectView:
     Details of a node from a container.
     """
 
-    def __init__(self, container: Container) -> None:
+    def __init__(
+        self,
+        container: Container,
+        cluster_containers: 'ClusterContainers',
+    ) -> None:
         """
         Args:
             container: The Docker container which represents the node.
+            cluster_containers: The cluster which the node is in.
         """
         self._container = container
+        self._cluster_containers = cluster_containers
 
     def to_dict(self) -> Dict[str, str]:
         """
@@ -120,10 +134,7 @@ class ContainerInspectView:
         container = self._container
         role = container.labels[NODE_TYPE_LABEL_KEY]
         container_ip = container.attrs['NetworkSettings']['IPAddress']
-        cluster_containers = ClusterContainers(
-            cluster_id=container.labels[CLUSTER_ID_LABEL_KEY],
-            transport=Transport.DOCKER_EXEC,
-        )
+        cluster_containers = self._cluster_containers
 
         containers = {
             NODE_TYPE_MASTER_LABEL_VALUE: cluster_containers.masters,
@@ -159,6 +170,7 @@ class ClusterContainers:
         """
         self._cluster_id_label = CLUSTER_ID_LABEL_KEY + '=' + cluster_id
         self._transport = transport
+        self._containers = None  # type: Optional[Dict[str, Set[Container]]]
 
     def _containers_by_role(
         self,
@@ -166,23 +178,30 @@ class ClusterContainers:
     ) -> Set[Container]:
         """
         Return all containers in this cluster of a particular node type.
+
+        The containers of the cluster are listed once, when they are first
+        needed, so that the number of Docker API calls does not grow with the
+        number of nodes.
         """
         node_types = {
             Role.MASTER: NODE_TYPE_MASTER_LABEL_VALUE,
             Role.AGENT: NODE_TYPE_AGENT_LABEL_VALUE,
             Role.PUBLIC_AGENT: NODE_TYPE_PUBLIC_AGENT_LABEL_VALUE,
         }
-        client = docker_client()
-        filters = {
-            'label': [
-                self._cluster_id_label,
-                '{key}={value}'.format(
-                    key=NODE_TYPE_LABEL_KEY,
-                    value=node_types[role],
-                ),
-            ],
-        }
-        return set(client.containers.list(filters=filters))
+        if self._containers is None:
+            client = docker_client()
+            filters = {'label': self._cluster_id_label}
+            containers = {
+                node_type: set()
+                for node_type in node_types.values()
+            }  # type: Dict[str, Set[Container]]
+            for container in client.containers.list(filters=filters):
+                node_type = container.labels.get(NODE_TYPE_LABEL_KEY)
+                if node_type in containers:
+                    containers[node_type].add(container)
+            self._containers = containers
+
+        return set(self._containers[node_types[role]])
 
     def to_node(self, container: Container) -> Node:
         """
@@ -251,16 +270,29 @@ class ClusterContainers:
         workspace_dir = container.labels[WORKSPACE_DIR_LABEL_KEY]
         return Path(workspace_dir)
 
-    def destroy(self) -> None:
+    def destroy(self, kill: bool = False) -> None:
         """
         Destroy this cluster.
+
+        The containers of the cluster are found with one listing and removed
+        at the same time.
+
+        Args:
+            kill: Whether to kill node containers rather than waiting for each
+                node to shut down.
         """
-        containers = {
-            *self.masters,
-            *self.agents,
-            *self.public_agents,
-        }
-        rmtree(path=str(self.workspace_dir), ignore_errors=True)
-        for container in containers:
-            container.stop()
-            container.remove(v=True)
+        client = docker_client()
+        filters = {'label': self._cluster_id_label}
+        containers = client.containers.list(all=True, filters=filters)
+        workspace_dirs = set(
+            container.labels[WORKSPACE_DIR_LABEL_KEY]
+            for container in containers
+        )
+        for workspace_dir in workspace_dirs:
+            rmtree(path=workspace_dir, ignore_errors=True)
+
+        remove_containers(
+            containers=containers,
+            kill=kill,
+            max_workers=_MAX_PARALLEL_REMOVALS,
+        )
@@ -38,3 +38,21 @@ def node_transport_option(command: Callable[..., None],
         ),
     )(command)  # type: Callable[..., None]
     return function
+
+
+def kill_option(command: Callable[..., None]) -> Callable[..., None]:
+    """
+    An option decorator for killing node containers rather than shutting them
+    down.
+    """
+    function = click.option(
+        '--kill',
+        is_flag=True,
+        help=(
+            'Kill node containers rather than waiting for each node to shut '
+            'down. '
+            'This is faster, and is useful for clusters which are thrown '
+            'away.'
+        ),
+    )(command)  # type: Callable[..., None]
+    return function
@@ -2,6 +2,8 @@
 Clean all Docker containers, volumes etc. from using the Docker backend.
 """
 
+from shutil import rmtree
+
 import click
 
 from dcos_e2e.backends import Docker
@@ -12,6 +14,8 @@ from dcos_e2e_cli.common.utils import set_logging
 from ._common import (
     NODE_TYPE_LABEL_KEY,
     NODE_TYPE_LOOPBACK_SIDECAR_LABEL_VALUE,
+    WARM_POOL_DIR_LABEL_KEY,
+    WARM_POOL_LABEL_KEY,
     docker_client,
 )
 
@@ -38,6 +42,19 @@ def clean(verbose: int) -> None:
     for loopback_sidecar in loopback_sidecars:
         DockerLoopbackVolume.destroy(container=loopback_sidecar)
 
+    # Containers in a warm pool have host directories which are not in a
+    # cluster's workspace.
+    # Containers which clusters took from a pool keep the label.
+    pool_filters = {'label': WARM_POOL_LABEL_KEY}
+    pooled_containers = client.containers.list(filters=pool_filters, all=True)
+    for container in pooled_containers:
+        container.stop()
+        container.remove(v=True)
+        rmtree(
+            path=container.labels[WARM_POOL_DIR_LABEL_KEY],
+            ignore_errors=True,
+        )
+
     node_filters = {'name': Docker().container_name_prefix}
     network_filters = {'name': Docker().container_name_prefix}
 
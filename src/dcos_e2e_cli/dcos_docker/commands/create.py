@@ -208,26 +208,18 @@ def _add_authorized_key(cluster: Cluster, public_key_path: Path) -> None:
     """
     Add an authorized key to all nodes in the given cluster.
     """
-    nodes = {
-        *cluster.masters,
-        *cluster.agents,
-        *cluster.public_agents,
-    }
-
-    for node in nodes:
-        node.run(
-            args=['echo', '', '>>', '/root/.ssh/authorized_keys'],
-            shell=True,
-        )
-        node.run(
-            args=[
-                'echo',
-                public_key_path.read_text(),
-                '>>',
-                '/root/.ssh/authorized_keys',
-            ],
-            shell=True,
-        )
+    for args in (
+        ['echo', '', '>>', '/root/.ssh/authorized_keys'],
+        [
+            'echo',
+            public_key_path.read_text(),
+            '>>',
+            '/root/.ssh/authorized_keys',
+        ],
+    ):
+        results = cluster.run_on_nodes(args=args, shell=True)
+        for result in results.values():
+            result.check_returncode()
 
 
 @click.command('create')
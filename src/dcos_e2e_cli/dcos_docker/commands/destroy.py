@@ -12,7 +12,24 @@ from dcos_e2e_cli.common.options import existing_cluster_id_option
 from dcos_e2e_cli.common.utils import check_cluster_id_exists
 
 from ._common import ClusterContainers, existing_cluster_ids
-from ._options import node_transport_option
+from ._options import kill_option, node_transport_option
+
+
+def _destroy_cluster(
+    cluster_id: str,
+    transport: Transport,
+    kill: bool,
+) -> None:
+    """
+    Destroy a cluster which exists and show its ID.
+    """
+    cluster_containers = ClusterContainers(
+        cluster_id=cluster_id,
+        transport=transport,
+    )
+    with click_spinner.spinner():
+        cluster_containers.destroy(kill=kill)
+    click.echo(cluster_id)
 
 
 @click.command('destroy-list')
@@ -22,11 +39,11 @@ from ._options import node_transport_option
     type=str,
 )
 @node_transport_option
-@click.pass_context
+@kill_option
 def destroy_list(
-    ctx: click.core.Context,
     cluster_ids: List[str],
     transport: Transport,
+    kill: bool,
 ) -> None:
     """
     Destroy clusters.
@@ -34,25 +51,27 @@ def destroy_list(
     To destroy all clusters, run
     ``minidcos docker destroy $(minidcos docker list)``.
     """
+    existing_ids = existing_cluster_ids()
     for cluster_id in cluster_ids:
-        if cluster_id not in existing_cluster_ids():
+        if cluster_id not in existing_ids:
             warning = 'Cluster "{cluster_id}" does not exist'.format(
                 cluster_id=cluster_id,
             )
             click.echo(warning, err=True)
             continue
 
-        ctx.invoke(
-            destroy,
+        _destroy_cluster(
             cluster_id=cluster_id,
             transport=transport,
+            kill=kill,
         )
 
 
 @click.command('destroy')
 @existing_cluster_id_option
 @node_transport_option
-def destroy(cluster_id: str, transport: Transport) -> None:
+@kill_option
+def destroy(cluster_id: str, transport: Transport, kill: bool) -> None:
     """
     Destroy a cluster.
     """
@@ -60,10 +79,4 @@ def destroy(cluster_id: str, transport: Transport) -> None:
         new_cluster_id=cluster_id,
         existing_cluster_ids=existing_cluster_ids(),
     )
-    cluster_containers = ClusterContainers(
-        cluster_id=cluster_id,
-        transport=transport,
-    )
-    with click_spinner.spinner():
-        cluster_containers.destroy()
-    click.echo(cluster_id)
+    _destroy_cluster(cluster_id=cluster_id, transport=transport, kill=kill)
@@ -2,14 +2,18 @@
 Checks for showing up common sources of errors with the Docker backend.
 """
 
+import functools
 import shutil
 import subprocess
+import threading
 from pathlib import Path
 from tempfile import gettempdir, gettempprefix
+from typing import Optional
 
 import click
 import docker
 
+from dcos_e2e import __version__ as dcos_e2e_version
 from dcos_e2e.backends import Docker
 from dcos_e2e.cluster import Cluster
 from dcos_e2e.docker_versions import DockerVersion
@@ -368,7 +372,7 @@ def _check_systemd() -> CheckLevels:
         type='bind',
     )
     try:
-        client.containers.run(
+        container = client.containers.run(
             image=tiny_image,
             mounts=[cgroup_mount],
             detach=True,
@@ -382,17 +386,64 @@ def _check_systemd() -> CheckLevels:
             error(message=message)
             return CheckLevels.ERROR
         raise
+
+    container.stop()
+    container.remove(v=True)
     return CheckLevels.NONE
 
 
-def _check_can_build() -> CheckLevels:
+class _ProbeCluster:
+    """
+    A cluster which is shared by the checks which need one.
+
+    The cluster is created when a check first needs it.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._cluster = None  # type: Optional[Cluster]
+        self._exception = None  # type: Optional[Exception]
+
+    @property
+    def cluster(self) -> Cluster:
+        """
+        Return the cluster, creating it if it does not exist.
+
+        Raises:
+            Exception: The error which was raised when creating the cluster.
+                This is raised for every check which asks for the cluster.
+        """
+        with self._lock:
+            if self._exception is not None:
+                raise self._exception
+
+            if self._cluster is None:
+                cluster_backend = Docker(docker_version=DockerVersion.v1_13_1)
+                try:
+                    self._cluster = Cluster(cluster_backend=cluster_backend)
+                except Exception as exc:
+                    self._exception = exc
+                    raise
+
+            return self._cluster
+
+    def destroy(self) -> None:
+        """
+        Destroy the cluster if it was created.
+        """
+        if self._cluster is not None:
+            self._cluster.destroy()
+
+
+def _check_can_build(probe_cluster: _ProbeCluster) -> CheckLevels:
     """
     Check that the default cluster images can be built.
+
+    Args:
+        probe_cluster: The cluster which is shared by checks.
     """
-    cluster_backend = Docker(docker_version=DockerVersion.v1_13_1)
     try:
-        with Cluster(cluster_backend=cluster_backend):
-            pass
+        probe_cluster.cluster
     except docker.errors.BuildError as exc:
         message = (
             'There was an error building a Docker image. '
@@ -408,56 +459,83 @@ def _check_can_build() -> CheckLevels:
     return CheckLevels.NONE
 
 
-def _check_can_mount_in_docker() -> CheckLevels:
+def _check_can_mount_in_docker(probe_cluster: _ProbeCluster) -> CheckLevels:
     """
     Check for an incompatibility between some systemd versions and some
     versions of Docker.
+
+    Args:
+        probe_cluster: The cluster which is shared by checks.
     """
     docker_client()
 
-    cluster_backend = Docker(docker_version=DockerVersion.v1_13_1)
     args = ['docker', 'run', '-v', '/foo', 'alpine']
 
     error_message_substring = 'no subsystem for mount'
-    with Cluster(cluster_backend=cluster_backend) as cluster:
-        (public_agent, ) = cluster.public_agents
-        try:
-            public_agent.run(args=args)
-        except subprocess.CalledProcessError as exc:
-            if error_message_substring not in exc.stderr.decode():
-                raise
+    try:
+        cluster = probe_cluster.cluster
+    except docker.errors.BuildError:
+        # This is shown by ``_check_can_build``.
+        return CheckLevels.NONE
 
-            message = (
-                'An issue has been detected which means that, for some '
-                'versions of Docker inside DC/OS nodes, it will not be '
-                'possible to create containers with mounts. '
-                'Some functionality may be affected by this, for example '
-                'extracting the DC/OS installer on a node.'
-                '\n'
-                'This issue is likely because the host\'s version of systemd '
-                'is greater than version 232, which causes the following '
-                'known issue: '
-                'https://github.com/opencontainers/runc/issues/1175.'
-                '\n'
-                'Newer versions of Docker, work well with new versions of '
-                'systemd. '
-                'To avoid issues caused by this incompatibility, do one of '
-                'the following:'
-                '\n* Set ``systemd.legacy_systemd_cgroup_controller=yes`` as '
-                'a kernel parameter on your host.'
-                '\n* Use versions of Docker newer than 1.13.1 inside the '
-                'DC/OS nodes.'
-                ' To do this in the ``minidcos docker`` CLI, use the '
-                '``--docker-version`` option on ``minidcos docker create``.'
-                ' To do this in the Python library, pass a '
-                '``docker_version`` parameter to the ``Docker`` backend class.'
-            )
-            warn(message=message)
-            return CheckLevels.WARNING
+    (public_agent, ) = cluster.public_agents
+    try:
+        public_agent.run(args=args)
+    except subprocess.CalledProcessError as exc:
+        if error_message_substring not in exc.stderr.decode():
+            raise
+
+        message = (
+            'An issue has been detected which means that, for some '
+            'versions of Docker inside DC/OS nodes, it will not be '
+            'possible to create containers with mounts. '
+            'Some functionality may be affected by this, for example '
+            'extracting the DC/OS installer on a node.'
+            '\n'
+            'This issue is likely because the host\'s version of systemd '
+            'is greater than version 232, which causes the following '
+            'known issue: '
+            'https://github.com/opencontainers/runc/issues/1175.'
+            '\n'
+            'Newer versions of Docker, work well with new versions of '
+            'systemd. '
+            'To avoid issues caused by this incompatibility, do one of '
+            'the following:'
+            '\n* Set ``systemd.legacy_systemd_cgroup_controller=yes`` as '
+            'a kernel parameter on your host.'
+            '\n* Use versions of Docker newer than 1.13.1 inside the '
+            'DC/OS nodes.'
+            ' To do this in the ``minidcos docker`` CLI, use the '
+            '``--docker-version`` option on ``minidcos docker create``.'
+            ' To do this in the Python library, pass a '
+            '``docker_version`` parameter to the ``Docker`` backend class.'
+        )
+        warn(message=message)
+        return CheckLevels.WARNING
 
     return CheckLevels.NONE
 
 
+def _cache_key() -> Optional[str]:
+    """
+    Return a value which identifies the Docker daemon and this tool, so that
+    results of checks which create clusters can be cached, or ``None`` if
+    there is no Docker daemon to connect to.
+    """
+    try:
+        client = docker.from_env(version='auto')
+        daemon_id = client.info()['ID']
+        docker_version = client.version()['Version']
+    except docker.errors.DockerException:
+        return None
+
+    return '{daemon_id}:{docker_version}:{dcos_e2e_version}'.format(
+        daemon_id=daemon_id,
+        docker_version=docker_version,
+        dcos_e2e_version=dcos_e2e_version,
+    )
+
+
 @click.command('doctor')
 @verbosity_option
 def doctor(verbose: int) -> None:
@@ -482,15 +560,24 @@ def doctor(verbose: int) -> None:
     # Ideally no checks would create ``Cluster``s.
     # Checks which do risk showing issues unrelated to what they mean to.
     # We therefore run these last.
+    # They share one cluster, which is created by whichever check needs it
+    # first.
+    probe_cluster = _ProbeCluster()
     check_functions_cluster_needed = [
-        _check_can_build,
-        # This comes last because it depends on ``_check_can_build``.
-        _check_can_mount_in_docker,
+        functools.partial(_check_can_build, probe_cluster=probe_cluster),
+        functools.partial(
+            _check_can_mount_in_docker,
+            probe_cluster=probe_cluster,
+        ),
     ]
 
-    check_functions = (
-        check_functions_no_cluster + check_functions_cluster_needed
-    )
+    try:
+        run_doctor_commands(
+            check_functions=check_functions_no_cluster,
+            slow_check_functions=check_functions_cluster_needed,
+            cache_key=_cache_key(),
+        )
+    finally:
+        probe_cluster.destroy()
 
-    run_doctor_commands(check_functions=check_functions)
     _link_to_troubleshooting()
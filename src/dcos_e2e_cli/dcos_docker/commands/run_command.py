@@ -14,6 +14,7 @@ from dcos_e2e_cli.common.options import (
     dcos_login_uname_option,
     environment_variables_option,
     existing_cluster_id_option,
+    incremental_sync_option,
     sync_dir_run_option,
     test_env_run_option,
     verbosity_option,
@@ -30,12 +31,17 @@ from ._common import (
 from ._options import node_transport_option
 
 
-def _get_node(cluster_id: str, node_reference: str) -> Node:
+def _get_node(
+    cluster_containers: ClusterContainers,
+    cluster_id: str,
+    node_reference: str,
+) -> Node:
     """
     Get a node from a "reference".
 
     Args:
-        cluster_id: The ID of a cluster.
+        cluster_containers: The containers of the cluster.
+        cluster_id: The ID of the cluster.
         node_reference: One of:
             * A node's IP address
             * A node's Docker container name
@@ -48,11 +54,6 @@ def _get_node(cluster_id: str, node_reference: str) -> Node:
     Raises:
         click.BadParameter: There is no such node.
     """
-    cluster_containers = ClusterContainers(
-        cluster_id=cluster_id,
-        transport=Transport.DOCKER_EXEC,
-    )
-
     containers = {
         *cluster_containers.masters,
         *cluster_containers.agents,
@@ -60,7 +61,10 @@ def _get_node(cluster_id: str, node_reference: str) -> Node:
     }
 
     for container in containers:
-        inspect_data = ContainerInspectView(container=container).to_dict()
+        inspect_data = ContainerInspectView(
+            container=container,
+            cluster_containers=cluster_containers,
+        ).to_dict()
         reference = inspect_data['e2e_reference']
         ip_address = inspect_data['ip_address']
         container_name = inspect_data['docker_container_name']
@@ -93,6 +97,7 @@ def _get_node(cluster_id: str, node_reference: str) -> Node:
 @dcos_login_uname_option
 @dcos_login_pw_option
 @sync_dir_run_option
+@incremental_sync_option
 @test_env_run_option
 @click.option(
     '--node',
@@ -115,6 +120,7 @@ def run(
     cluster_id: str,
     node_args: Tuple[str],
     sync_dir: Tuple[Path],
+    incremental_sync: bool,
     dcos_login_uname: str,
     dcos_login_pw: str,
     test_env: bool,
@@ -134,12 +140,15 @@ def run(
         new_cluster_id=cluster_id,
         existing_cluster_ids=existing_cluster_ids(),
     )
-    host = _get_node(cluster_id=cluster_id, node_reference=node)
-
     cluster_containers = ClusterContainers(
         cluster_id=cluster_id,
         transport=transport,
     )
+    host = _get_node(
+        cluster_containers=cluster_containers,
+        cluster_id=cluster_id,
+        node_reference=node,
+    )
     cluster = cluster_containers.cluster
 
     for dcos_checkout_dir in sync_dir:
@@ -147,6 +156,7 @@ def run(
             cluster=cluster,
             dcos_checkout_dir=dcos_checkout_dir,
             dcos_variant=cluster_containers.dcos_variant,
+            incremental=incremental_sync,
         )
 
     run_command(
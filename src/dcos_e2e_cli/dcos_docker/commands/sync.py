@@ -10,6 +10,7 @@ from dcos_e2e.node import Transport
 from dcos_e2e_cli.common.arguments import dcos_checkout_dir_argument
 from dcos_e2e_cli.common.options import (
     existing_cluster_id_option,
+    incremental_sync_option,
     verbosity_option,
 )
 from dcos_e2e_cli.common.sync import SYNC_HELP, sync_code_to_masters
@@ -22,11 +23,13 @@ from ._options import node_transport_option
 @click.command('sync', help=SYNC_HELP)
 @existing_cluster_id_option
 @dcos_checkout_dir_argument
+@incremental_sync_option
 @node_transport_option
 @verbosity_option
 def sync_code(
     cluster_id: str,
     dcos_checkout_dir: str,
+    incremental_sync: bool,
     transport: Transport,
     verbose: int,
 ) -> None:
@@ -47,4 +50,5 @@ def sync_code(
         cluster=cluster,
         dcos_checkout_dir=Path(dcos_checkout_dir),
         dcos_variant=cluster_containers.dcos_variant,
+        incremental=incremental_sync,
     )
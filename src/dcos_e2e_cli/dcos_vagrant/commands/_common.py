@@ -4,19 +4,19 @@ Common code for minidcos docker CLI modules.
 
 import json
 import os
+import subprocess
 from ipaddress import IPv4Address
 from pathlib import Path
 from shutil import rmtree
 from typing import Dict  # noqa: F401
 from typing import Any, Optional, Set
 
-import yaml
-
 from dcos_e2e.cluster import Cluster
 from dcos_e2e.node import Node
-from dcos_e2e_cli._vendor import vertigo_py
 from dcos_e2e_cli._vendor.dcos_installer_tools import DCOSVariant
 
+from ._virtualbox import clear_cache, virtualbox_vms, vm_ip_addresses
+
 CLUSTER_ID_DESCRIPTION_KEY = 'dcos_e2e.cluster_id'
 WORKSPACE_DIR_DESCRIPTION_KEY = 'dcos_e2e.workspace_dir'
 VARIANT_DESCRIPTION_KEY = 'dcos_e2e.variant'
@@ -24,51 +24,33 @@ VARIANT_ENTERPRISE_DESCRIPTION_VALUE = 'ee'
 VARIANT_OSS_DESCRIPTION_VALUE = 'oss'
 
 
-def _description_from_vm_name(vm_name: str) -> str:
-    """
-    Given the name of a VirtualBox VM, return its description.
+def _ssh_configs_by_host(ssh_config: str) -> Dict[str, str]:
     """
-    virtualbox_vm = vertigo_py.VM(name=vm_name)  # type: ignore
-    info = virtualbox_vm.parse_info()  # type: Dict[str, str]
-    escaped_description = info.get('description', '')
-    description = escaped_description.encode().decode('unicode_escape')
-    return str(description)
+    Split the output of ``vagrant ssh-config`` for many machines into the
+    configuration of each machine.
 
-
-def _ip_from_vm_name(vm_name: str) -> Optional[IPv4Address]:
-    """
-    Given the name of a VirtualBox VM, return its IP address.
+    Returns:
+        The ``Host`` section of each machine, by machine name.
     """
-    property_name = '/VirtualBox/GuestInfo/Net/1/V4/IP'
-    args = [
-        vertigo_py.constants.cmd,
-        'guestproperty',
-        'get',
-        vm_name,
-        property_name,
-    ]
-    property_result = vertigo_py.execute(args=args)  # type: ignore
-    results = yaml.load(property_result)
-    if results == 'No value set!':
-        return None
-    return IPv4Address(results['Value'])
+    sections = {}  # type: Dict[str, str]
+    host = None  # type: Optional[str]
+    for line in ssh_config.splitlines():
+        if line.startswith('Host '):
+            host = line.split(None, 1)[1].strip()
+            sections[host] = ''
+        if host is not None:
+            sections[host] += line + '\n'
+    return sections
 
 
 def existing_cluster_ids() -> Set[str]:
     """
     Return the IDs of existing clusters.
     """
-    ls_output = vertigo_py.ls()  # type: ignore
-    vm_ls_output = ls_output['vms']
-    lines = vm_ls_output.decode().strip().split('\n')
-    lines = [line for line in lines if line]
     cluster_ids = set()
-    for line in lines:
-        vm_name_in_quotes, _ = line.split(' ')
-        vm_name = vm_name_in_quotes[1:-1]
-        description = _description_from_vm_name(vm_name=vm_name)
+    for virtualbox_vm in virtualbox_vms().values():
         try:
-            data = json.loads(s=description)
+            data = json.loads(s=virtualbox_vm.description)
         except json.decoder.JSONDecodeError:
             continue
 
@@ -83,23 +65,21 @@ class VMInspectView:
     Details of a node from a VM.
     """
 
-    def __init__(self, vm_name: str) -> None:
+    def __init__(self, vm_name: str, cluster_vms: 'ClusterVMs') -> None:
         """
         Args:
             vm_name: The name of the VM which represents the node.
+            cluster_vms: The cluster which the node is in.
         """
         self._vm_name = vm_name
+        self._cluster_vms = cluster_vms
 
     def to_dict(self) -> Dict[str, str]:
         """
         Return dictionary with information to be shown to users.
         """
-        ip_address = _ip_from_vm_name(vm_name=self._vm_name)
-        description = _description_from_vm_name(vm_name=self._vm_name)
-        data = json.loads(s=description)
-        cluster_id = data[CLUSTER_ID_DESCRIPTION_KEY]
-        cluster_vms = ClusterVMs(cluster_id=cluster_id)
-        vagrant_client = cluster_vms.vagrant_client
+        cluster_vms = self._cluster_vms
+        ip_address = cluster_vms.ip_address(vm_name=self._vm_name)
 
         if self._vm_name in cluster_vms.masters:
             role = 'master'
@@ -112,7 +92,7 @@ class VMInspectView:
             role_names = cluster_vms.public_agents
 
         sorted_ips = sorted(
-            [_ip_from_vm_name(vm_name=name) for name in role_names],
+            [cluster_vms.ip_address(vm_name=name) for name in role_names],
         )
         index = sorted_ips.index(ip_address)
 
@@ -120,15 +100,19 @@ class VMInspectView:
             'e2e_reference': '{role}_{index}'.format(role=role, index=index),
             'vm_name': self._vm_name,
             'ip_address': str(ip_address),
-            'ssh_key': vagrant_client.keyfile(vm_name=self._vm_name),
-            'ssh_user': vagrant_client.user(vm_name=self._vm_name),
-            'vagrant_root': vagrant_client.root,
+            'ssh_key': cluster_vms.ssh_key(vm_name=self._vm_name),
+            'ssh_user': cluster_vms.ssh_user(vm_name=self._vm_name),
+            'vagrant_root': cluster_vms.vagrant_client.root,
         }
 
 
 class ClusterVMs:
     """
     A representation of a cluster constructed from Vagrant VMs.
+
+    Details of the VMs are looked up once, when they are first needed, so that
+    the number of ``VBoxManage`` and ``vagrant`` calls does not grow with the
+    number of times that they are used.
     """
 
     def __init__(self, cluster_id: str) -> None:
@@ -137,16 +121,65 @@ class ClusterVMs:
             cluster_id: The ID of the cluster.
         """
         self._cluster_id = cluster_id
+        self._descriptions = None  # type: Optional[Dict[str, str]]
+        self._ip_addresses = {}  # type: Dict[str, Optional[IPv4Address]]
+        self._vagrant_client = None  # type: Any
+        self._ssh_configs_loaded = False
+
+    def ip_address(self, vm_name: str) -> Optional[IPv4Address]:
+        """
+        Return the IP address of the VM with the given name.
+        """
+        if vm_name not in self._ip_addresses:
+            # The addresses of all VMs in the cluster are looked up together.
+            vm_names = self._vm_names | set([vm_name])
+            self._ip_addresses.update(vm_ip_addresses(vm_names=vm_names))
+        return self._ip_addresses[vm_name]
+
+    def _load_ssh_configs(self) -> None:
+        """
+        Read the SSH configuration of every VM with one ``vagrant ssh-config``
+        call, rather than one call for each VM.
+        """
+        if self._ssh_configs_loaded:
+            return
+
+        client = self.vagrant_client
+        try:
+            ssh_config = client.ssh_config()
+        except subprocess.CalledProcessError:
+            # Each VM's configuration is looked up when it is needed instead.
+            ssh_config = ''
+
+        vm_names = self._vm_names
+        for vm_name, host_config in _ssh_configs_by_host(ssh_config).items():
+            if vm_name in vm_names:
+                client.conf(ssh_config=host_config, vm_name=vm_name)
+
+        self._ssh_configs_loaded = True
+
+    def ssh_key(self, vm_name: str) -> str:
+        """
+        Return the path to the SSH key for the VM with the given name.
+        """
+        self._load_ssh_configs()
+        return str(self.vagrant_client.keyfile(vm_name=vm_name))
+
+    def ssh_user(self, vm_name: str) -> str:
+        """
+        Return the SSH user for the VM with the given name.
+        """
+        self._load_ssh_configs()
+        return str(self.vagrant_client.user(vm_name=vm_name))
 
     def to_node(self, vm_name: str) -> Node:
         """
         Return the ``Node`` that is represented by a given VM name.
         """
-        client = self.vagrant_client
-        address = _ip_from_vm_name(vm_name=vm_name)
+        address = self.ip_address(vm_name=vm_name)
         assert isinstance(address, IPv4Address)
-        ssh_key_path = Path(client.keyfile(vm_name=vm_name))
-        default_user = client.user(vm_name=vm_name)
+        ssh_key_path = Path(self.ssh_key(vm_name=vm_name))
+        default_user = self.ssh_user(vm_name=vm_name)
         return Node(
             public_ip_address=address,
             private_ip_address=address,
@@ -155,38 +188,41 @@ class ClusterVMs:
         )
 
     @property
-    def _vm_names(self) -> Set[str]:
+    def _vm_descriptions(self) -> Dict[str, str]:
         """
-        Return VirtualBox and Vagrant names of VMs in this cluster.
+        Return the descriptions of VMs in this cluster by VirtualBox and
+        Vagrant name.
         """
-        ls_output = vertigo_py.ls()  # type: ignore
-        vm_ls_output = ls_output['vms']
-        lines = vm_ls_output.decode().strip().split('\n')
-        lines = [line for line in lines if line]
-        vm_names = set()
-        for line in lines:
-            vm_name_in_quotes, _ = line.split(' ')
-            vm_name = vm_name_in_quotes[1:-1]
-            description = _description_from_vm_name(vm_name=vm_name)
+        if self._descriptions is not None:
+            return self._descriptions
+
+        descriptions = {}  # type: Dict[str, str]
+        for vm_name, virtualbox_vm in virtualbox_vms().items():
             try:
-                data = json.loads(s=description)
+                data = json.loads(s=virtualbox_vm.description)
             except json.decoder.JSONDecodeError:
                 continue
 
             cluster_id = data.get(CLUSTER_ID_DESCRIPTION_KEY)
             if cluster_id == self._cluster_id:
-                vm_names.add(vm_name)
+                descriptions[vm_name] = virtualbox_vm.description
 
-        return vm_names
+        self._descriptions = descriptions
+        return descriptions
+
+    @property
+    def _vm_names(self) -> Set[str]:
+        """
+        Return VirtualBox and Vagrant names of VMs in this cluster.
+        """
+        return set(self._vm_descriptions.keys())
 
     @property
     def dcos_variant(self) -> DCOSVariant:
         """
         Return the DC/OS variant of the cluster.
         """
-        vm_names = self._vm_names
-        one_vm_name = next(iter(vm_names))
-        description = _description_from_vm_name(vm_name=one_vm_name)
+        description = next(iter(self._vm_descriptions.values()))
         data = json.loads(s=description)
         vm_variant_value = data[VARIANT_DESCRIPTION_KEY]
         return {
@@ -239,9 +275,7 @@ class ClusterVMs:
         """
         The workspace directory to put temporary files in.
         """
-        vm_names = self._vm_names
-        one_vm_name = next(iter(vm_names))
-        description = _description_from_vm_name(vm_name=one_vm_name)
+        description = next(iter(self._vm_descriptions.values()))
         data = json.loads(s=description)
         workspace_dir = data[WORKSPACE_DIR_DESCRIPTION_KEY]
         return Path(workspace_dir)
@@ -253,9 +287,11 @@ class ClusterVMs:
         """
         A Vagrant client attached to this cluster.
         """
+        if self._vagrant_client is not None:
+            return self._vagrant_client
+
         vm_names = self._vm_names
-        one_vm_name = next(iter(vm_names))
-        description = _description_from_vm_name(vm_name=one_vm_name)
+        description = next(iter(self._vm_descriptions.values()))
 
         vagrant_env = {
             'PATH': os.environ['PATH'],
@@ -284,6 +320,7 @@ class ClusterVMs:
             quiet_stderr=True,
         )
 
+        self._vagrant_client = vagrant_client
         return vagrant_client
 
     def destroy(self) -> None:
@@ -292,4 +329,5 @@ class ClusterVMs:
         """
         workspace_dir = self.workspace_dir
         self.vagrant_client.destroy()
+        clear_cache()
         rmtree(path=str(workspace_dir), ignore_errors=True)
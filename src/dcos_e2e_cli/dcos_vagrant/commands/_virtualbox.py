@@ -0,0 +1,186 @@
+"""
+Details of VirtualBox VMs, read with as few ``VBoxManage`` calls as possible.
+
+All VMs are listed with one ``VBoxManage list --long vms`` call.
+IP addresses are not in that listing, so they are looked up for the VMs which
+need them, at the same time.
+
+Details are cached for the duration of a CLI invocation.
+"""
+
+import re
+from concurrent.futures import ThreadPoolExecutor
+from ipaddress import IPv4Address
+from typing import List  # noqa: F401
+from typing import Any, Dict, Iterable, Optional
+
+import click
+import yaml
+
+from dcos_e2e_cli._vendor import vertigo_py
+
+# The key in the ``meta`` of the click context which holds cached details.
+_CACHE_META_KEY = 'dcos_e2e.virtualbox'
+
+# The guest property which holds the IP address of a node.
+_IP_PROPERTY_NAME = '/VirtualBox/GuestInfo/Net/1/V4/IP'
+
+# The maximum number of ``VBoxManage`` processes to run at the same time.
+_MAX_PARALLEL_LOOKUPS = 8
+
+# Lines in the long VM listing which start a new field, such as
+# ``State:           running (since 2018-12-01T10:00:00.000000000)``.
+_FIELD_PATTERN = re.compile(r'^[A-Za-z][A-Za-z0-9 ()/_-]*:(\s|$)')
+
+
+class VirtualBoxVM:
+    """
+    Details of a VirtualBox VM.
+
+    Attributes:
+        name: The name of the VM.
+        description: The description of the VM.
+        state: The state of the VM, for example ``running`` or
+            ``powered off``.
+    """
+
+    def __init__(self, name: str, description: str, state: str) -> None:
+        """
+        Args:
+            name: The name of the VM.
+            description: The description of the VM.
+            state: The state of the VM.
+        """
+        self.name = name
+        self.description = description
+        self.state = state
+
+
+def parse_long_vm_list(output: str) -> Dict[str, VirtualBoxVM]:
+    """
+    Parse the output of ``VBoxManage list --long vms``.
+
+    Each VM starts with an unindented ``Name:`` line.
+    Shared folders also have ``Name:`` lines, but those include a host path,
+    and snapshot names are indented.
+    A description is printed on the lines after a ``Description:`` line, up to
+    the next field.
+
+    Returns:
+        Details of each VM, by VM name.
+    """
+    vms = {}  # type: Dict[str, VirtualBoxVM]
+    name = None  # type: Optional[str]
+    fields = {}  # type: Dict[str, str]
+    description_lines = []  # type: List[str]
+    in_description = False
+
+    def add_vm() -> None:
+        """
+        Add the VM which is being parsed to ``vms``.
+        """
+        if name is None:
+            return
+        state = fields.get('State', '').split(' (since ')[0]
+        vms[name] = VirtualBoxVM(
+            name=name,
+            description='\n'.join(description_lines).strip(),
+            state=state,
+        )
+
+    for line in output.splitlines():
+        if line.startswith('Name:') and ', Host path:' not in line:
+            add_vm()
+            name = line.split(':', 1)[1].strip()
+            fields = {}
+            description_lines = []
+            in_description = False
+        elif line == 'Description:':
+            in_description = True
+        elif _FIELD_PATTERN.match(line):
+            in_description = False
+            key, value = line.split(':', 1)
+            fields.setdefault(key, value.strip())
+        elif in_description:
+            description_lines.append(line)
+
+    add_vm()
+    return vms
+
+
+def _cache() -> Dict[str, Any]:
+    """
+    Return a dictionary which lasts for the current CLI invocation.
+
+    Outside of a CLI invocation, a new dictionary is returned each time, so
+    nothing is cached.
+    """
+    ctx = click.get_current_context(silent=True)
+    if ctx is None:
+        return {}
+    cache = ctx.meta.setdefault(_CACHE_META_KEY, {})  # type: Dict[str, Any]
+    return cache
+
+
+def clear_cache() -> None:
+    """
+    Forget cached details, for example after VMs are destroyed.
+    """
+    ctx = click.get_current_context(silent=True)
+    if ctx is not None:
+        ctx.meta.pop(_CACHE_META_KEY, None)
+
+
+def virtualbox_vms() -> Dict[str, VirtualBoxVM]:
+    """
+    Return details of all VirtualBox VMs, by VM name.
+    """
+    cache = _cache()
+    if 'vms' not in cache:
+        args = [vertigo_py.constants.cmd, 'list', '--long', 'vms']
+        output = vertigo_py.execute(args=args)  # type: ignore
+        cache['vms'] = parse_long_vm_list(output=output.decode())
+    vms = cache['vms']  # type: Dict[str, VirtualBoxVM]
+    return vms
+
+
+def _ip_from_vm_name(vm_name: str) -> Optional[IPv4Address]:
+    """
+    Given the name of a VirtualBox VM, return its IP address.
+    """
+    args = [
+        vertigo_py.constants.cmd,
+        'guestproperty',
+        'get',
+        vm_name,
+        _IP_PROPERTY_NAME,
+    ]
+    property_result = vertigo_py.execute(args=args)  # type: ignore
+    results = yaml.load(property_result)
+    if results == 'No value set!':
+        return None
+    return IPv4Address(results['Value'])
+
+
+def vm_ip_addresses(
+    vm_names: Iterable[str],
+) -> Dict[str, Optional[IPv4Address]]:
+    """
+    Return the IP addresses of the VMs with the given names.
+
+    Addresses which are not cached are looked up at the same time.
+
+    Returns:
+        The IP address of each VM, or ``None`` if the VM has no IP address, by
+        VM name.
+    """
+    ip_addresses = _cache().setdefault('ip_addresses', {})
+    names = list(vm_names)
+    missing = [name for name in names if name not in ip_addresses]
+    if missing:
+        max_workers = min(len(missing), _MAX_PARALLEL_LOOKUPS)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            looked_up = executor.map(_ip_from_vm_name, missing)
+            ip_addresses.update(zip(missing, looked_up))
+
+    return {name: ip_addresses[name] for name in names}
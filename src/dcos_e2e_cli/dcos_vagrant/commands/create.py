@@ -173,10 +173,10 @@ def create(
         doctor_command=doctor,
     )
 
-    nodes = {*cluster.masters, *cluster.agents, *cluster.public_agents}
-    for node in nodes:
-        if enable_selinux_enforcing:
-            node.run(args=['setenforce', '1'], sudo=True)
+    if enable_selinux_enforcing:
+        results = cluster.run_on_nodes(args=['setenforce', '1'], sudo=True)
+        for result in results.values():
+            result.check_returncode()
 
     for node in cluster.masters:
         for path_pair in copy_to_master:
@@ -14,6 +14,7 @@ from dcos_e2e_cli.common.options import (
     dcos_login_uname_option,
     environment_variables_option,
     existing_cluster_id_option,
+    incremental_sync_option,
     sync_dir_run_option,
     test_env_run_option,
     verbosity_option,
@@ -25,12 +26,17 @@ from dcos_e2e_cli.common.utils import check_cluster_id_exists, set_logging
 from ._common import ClusterVMs, VMInspectView, existing_cluster_ids
 
 
-def _get_node(cluster_id: str, node_reference: str) -> Node:
+def _get_node(
+    cluster_vms: ClusterVMs,
+    cluster_id: str,
+    node_reference: str,
+) -> Node:
     """
     Get a node from a "reference".
 
     Args:
-        cluster_id: The ID of a cluster.
+        cluster_vms: The VMs of the cluster.
+        cluster_id: The ID of the cluster.
         node_reference: One of:
             * A node's IP address
             * A node's VM name
@@ -42,8 +48,6 @@ def _get_node(cluster_id: str, node_reference: str) -> Node:
     Raises:
         click.BadParameter: There is no such node.
     """
-    cluster_vms = ClusterVMs(cluster_id=cluster_id)
-
     vm_names = {
         *cluster_vms.masters,
         *cluster_vms.agents,
@@ -51,7 +55,10 @@ def _get_node(cluster_id: str, node_reference: str) -> Node:
     }
 
     for vm_name in vm_names:
-        inspect_data = VMInspectView(vm_name=vm_name).to_dict()
+        inspect_data = VMInspectView(
+            vm_name=vm_name,
+            cluster_vms=cluster_vms,
+        ).to_dict()
         reference = inspect_data['e2e_reference']
         ip_address = inspect_data['ip_address']
         accepted = (
@@ -81,6 +88,7 @@ def _get_node(cluster_id: str, node_reference: str) -> Node:
 @dcos_login_uname_option
 @dcos_login_pw_option
 @sync_dir_run_option
+@incremental_sync_option
 @test_env_run_option
 @environment_variables_option
 @click.option(
@@ -101,6 +109,7 @@ def run(
     cluster_id: str,
     node_args: Tuple[str],
     sync_dir: Tuple[Path],
+    incremental_sync: bool,
     dcos_login_uname: str,
     dcos_login_pw: str,
     test_env: bool,
@@ -119,14 +128,19 @@ def run(
         new_cluster_id=cluster_id,
         existing_cluster_ids=existing_cluster_ids(),
     )
-    host = _get_node(cluster_id=cluster_id, node_reference=node)
     cluster_vms = ClusterVMs(cluster_id=cluster_id)
+    host = _get_node(
+        cluster_vms=cluster_vms,
+        cluster_id=cluster_id,
+        node_reference=node,
+    )
     cluster = cluster_vms.cluster
     for dcos_checkout_dir in sync_dir:
         sync_code_to_masters(
             cluster=cluster,
             dcos_checkout_dir=dcos_checkout_dir,
             dcos_variant=cluster_vms.dcos_variant,
+            incremental=incremental_sync,
         )
 
     run_command(
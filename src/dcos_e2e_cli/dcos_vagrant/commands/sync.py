@@ -9,6 +9,7 @@ import click
 from dcos_e2e_cli.common.arguments import dcos_checkout_dir_argument
 from dcos_e2e_cli.common.options import (
     existing_cluster_id_option,
+    incremental_sync_option,
     verbosity_option,
 )
 from dcos_e2e_cli.common.sync import SYNC_HELP, sync_code_to_masters
@@ -20,10 +21,12 @@ from ._common import ClusterVMs, existing_cluster_ids
 @click.command('sync', help=SYNC_HELP)
 @existing_cluster_id_option
 @dcos_checkout_dir_argument
+@incremental_sync_option
 @verbosity_option
 def sync_code(
     cluster_id: str,
     dcos_checkout_dir: str,
+    incremental_sync: bool,
     verbose: int,
 ) -> None:
     """
@@ -40,4 +43,5 @@ def sync_code(
         cluster=cluster,
         dcos_checkout_dir=Path(dcos_checkout_dir),
         dcos_variant=cluster_vms.dcos_variant,
+        incremental=incremental_sync,
     )
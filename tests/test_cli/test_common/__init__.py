@@ -0,0 +1,3 @@
+"""
+Tests for utilities which are common across CLI tools.
+"""
@@ -0,0 +1,256 @@
+"""
+Tests for ``dcos_e2e_cli.common.download``.
+"""
+
+import hashlib
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from socketserver import ThreadingMixIn
+from typing import Iterator, List, Set  # noqa: F401
+
+import click
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+from py.path import local  # pylint: disable=no-name-in-module, import-error
+
+from dcos_e2e_cli.common import download
+from dcos_e2e_cli.common.download import download_file
+
+# We ignore this error because it conflicts with `pytest` standard usage.
+# pylint: disable=redefined-outer-name
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    """
+    An HTTP server which serves one file, records requests and can be told to
+    fail range requests.
+    """
+
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(('127.0.0.1', 0), _Handler)
+        self.content = os.urandom(10 * 1024 + 17)
+        self.etag = '"1"'
+        self.accept_ranges = True
+        self.requests = []  # type: List[str]
+        self.failing_offsets = set()  # type: Set[int]
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        """
+        The URL of the served file.
+        """
+        host, port = self.server_address
+        return 'http://{host}:{port}/installer'.format(host=host, port=port)
+
+    @property
+    def range_requests(self) -> List[str]:
+        """
+        The ``Range`` headers of ``GET`` requests.
+        """
+        return [request for request in self.requests if request != 'HEAD']
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """
+    A handler for ``_Server``.
+    """
+
+    server = None  # type: _Server
+
+    def log_message(self, *args: str) -> None:
+        """
+        Do not log requests.
+        """
+
+    def _send_headers(self, status: int, length: int) -> None:
+        """
+        Send a status and headers.
+        """
+        self.send_response(status)
+        self.send_header('Content-Length', str(length))
+        self.send_header('ETag', self.server.etag)
+        if self.server.accept_ranges:
+            self.send_header('Accept-Ranges', 'bytes')
+        self.end_headers()
+
+    def do_HEAD(self) -> None:  # pylint: disable=invalid-name
+        """
+        Send headers for the file.
+        """
+        with self.server.lock:
+            self.server.requests.append('HEAD')
+        self._send_headers(status=200, length=len(self.server.content))
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """
+        Send the file, or the requested range of it.
+        """
+        content = self.server.content
+        range_header = self.headers.get('Range')
+        with self.server.lock:
+            self.server.requests.append(range_header or 'GET')
+
+        if range_header is None or not self.server.accept_ranges:
+            self._send_headers(status=200, length=len(content))
+            self.wfile.write(content)
+            return
+
+        start, end = range_header[len('bytes='):].split('-')
+        if int(start) in self.server.failing_offsets:
+            self.send_error(500)
+            return
+
+        data = content[int(start):int(end) + 1]
+        self._send_headers(status=206, length=len(data))
+        self.wfile.write(data)
+
+
+@pytest.fixture()
+def server() -> Iterator[_Server]:
+    """
+    Serve a file over HTTP.
+    """
+    http_server = _Server()
+    thread = threading.Thread(target=http_server.serve_forever)
+    thread.start()
+    yield http_server
+    http_server.shutdown()
+    http_server.server_close()
+    thread.join()
+
+
+@pytest.fixture(autouse=True)
+def small_parts(tmpdir: local, monkeypatch: MonkeyPatch) -> None:
+    """
+    Use small parts so that small files are downloaded in many parts, and use
+    a cache directory for this test only.
+    """
+    monkeypatch.setattr(download, '_PART_SIZE', 1024)
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmpdir.mkdir('cache')))
+
+
+class TestDownloadFile:
+    """
+    Tests for ``download_file``.
+    """
+
+    def test_parts(self, server: _Server, tmpdir: local) -> None:
+        """
+        A file is downloaded in parts with range requests.
+        """
+        path = Path(str(tmpdir.join('installer')))
+        download_file(url=server.url, path=path, connections=4)
+        assert path.read_bytes() == server.content
+        assert len(server.range_requests) == 11
+        assert 'bytes=10240-10256' in server.range_requests
+        assert not list(path.parent.glob('installer.part*'))
+
+    def test_no_range_support(self, server: _Server, tmpdir: local) -> None:
+        """
+        A file is downloaded in one request if the server does not accept
+        range requests.
+        """
+        server.accept_ranges = False
+        path = Path(str(tmpdir.join('installer')))
+        download_file(url=server.url, path=path, connections=4)
+        assert path.read_bytes() == server.content
+        assert server.range_requests == ['GET']
+
+    def test_resume(self, server: _Server, tmpdir: local) -> None:
+        """
+        An interrupted download is resumed, and parts which were downloaded
+        are not downloaded again.
+        """
+        server.failing_offsets = {2048, 5120}
+        path = Path(str(tmpdir.join('installer')))
+        with pytest.raises(click.ClickException):
+            download_file(
+                url=server.url,
+                path=path,
+                connections=1,
+                use_cache=False,
+            )
+
+        assert not path.exists()
+        server.failing_offsets = set()
+        server.requests = []
+        download_file(
+            url=server.url,
+            path=path,
+            connections=1,
+            use_cache=False,
+        )
+        assert path.read_bytes() == server.content
+        # The first two parts were downloaded before the failure.
+        assert 'bytes=0-1023' not in server.range_requests
+        assert 'bytes=1024-2047' not in server.range_requests
+        assert 'bytes=2048-3071' in server.range_requests
+
+    def test_changed_file_not_resumed(
+        self,
+        server: _Server,
+        tmpdir: local,
+    ) -> None:
+        """
+        A download is started again if the file has changed since it was
+        interrupted.
+        """
+        server.failing_offsets = {5120}
+        path = Path(str(tmpdir.join('installer')))
+        with pytest.raises(click.ClickException):
+            download_file(url=server.url, path=path, connections=1)
+
+        server.failing_offsets = set()
+        server.content = os.urandom(len(server.content))
+        server.etag = '"2"'
+        server.requests = []
+        download_file(url=server.url, path=path, connections=1)
+        assert path.read_bytes() == server.content
+        assert 'bytes=0-1023' in server.range_requests
+
+    def test_sha256_mismatch(self, server: _Server, tmpdir: local) -> None:
+        """
+        An error is raised if the downloaded file does not have the given
+        hash, and the download is removed.
+        """
+        path = Path(str(tmpdir.join('installer')))
+        with pytest.raises(click.ClickException) as excinfo:
+            download_file(
+                url=server.url,
+                path=path,
+                connections=4,
+                sha256='0' * 64,
+            )
+
+        assert 'Expected ' + '0' * 64 in str(excinfo.value.message)
+        assert not list(path.parent.glob('installer*'))
+
+    def test_cache(self, server: _Server, tmpdir: local) -> None:
+        """
+        A file is not downloaded again if the server reports that it has not
+        changed, or if a file with the given hash is cached.
+        """
+        first_path = Path(str(tmpdir.join('first')))
+        second_path = Path(str(tmpdir.join('second')))
+        third_path = Path(str(tmpdir.join('third')))
+        download_file(url=server.url, path=first_path, connections=4)
+
+        server.requests = []
+        download_file(url=server.url, path=second_path, connections=4)
+        assert second_path.read_bytes() == server.content
+        assert server.requests == ['HEAD']
+
+        server.requests = []
+        download_file(
+            url=server.url,
+            path=third_path,
+            connections=4,
+            sha256=hashlib.sha256(server.content).hexdigest(),
+        )
+        assert third_path.read_bytes() == server.content
+        assert server.requests == []
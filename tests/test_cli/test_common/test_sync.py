@@ -0,0 +1,214 @@
+"""
+Tests for ``dcos_e2e_cli.common.sync``.
+"""
+
+import json
+import tarfile
+from pathlib import Path
+from typing import Any, Dict, Iterable
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+from py.path import local  # pylint: disable=no-name-in-module, import-error
+
+from dcos_e2e.cluster import Cluster
+from dcos_e2e_cli.common import sync
+from dcos_e2e_cli.common.sync import (
+    _local_manifest,
+    _manifest_path,
+    _sync_dir_to_masters,
+)
+
+
+class TestLocalManifest:
+    """
+    Tests for ``_local_manifest``.
+    """
+
+    def test_unchanged_files_not_read(self, tmpdir: local) -> None:
+        """
+        The hash of a file with the same size and modification time as in the
+        previous manifest is taken from the previous manifest.
+        """
+        local_dir = Path(str(tmpdir))
+        (local_dir / 'unchanged.py').write_text('unchanged')
+        (local_dir / 'changed.py').write_text('changed')
+        manifest = _local_manifest(path=local_dir, previous_manifest={})
+
+        previous_manifest = {
+            'unchanged.py': {
+                **manifest['unchanged.py'],
+                'sha256': 'previous',
+            },
+            'changed.py': {
+                **manifest['changed.py'],
+                'size': 0,
+                'sha256': 'previous',
+            },
+        }
+        new_manifest = _local_manifest(
+            path=local_dir,
+            previous_manifest=previous_manifest,
+        )
+
+        assert new_manifest['unchanged.py']['sha256'] == 'previous'
+        assert new_manifest['changed.py'] == manifest['changed.py']
+
+    def test_cache_files_ignored(self, tmpdir: local) -> None:
+        """
+        Python cache files are not in the manifest.
+        """
+        local_dir = Path(str(tmpdir))
+        (local_dir / '__pycache__').mkdir()
+        (local_dir / '__pycache__' / 'test.cpython-36.pyc').write_text('')
+        (local_dir / 'test.pyc').write_text('')
+        (local_dir / 'test.py').write_text('')
+
+        manifest = _local_manifest(path=local_dir, previous_manifest={})
+
+        assert list(manifest) == ['test.py']
+
+
+class TestSyncDirToMasters:
+    """
+    Tests for the files which ``_sync_dir_to_masters`` sends and deletes.
+    """
+
+    @pytest.fixture()
+    def sent(self, monkeypatch: MonkeyPatch) -> Dict[str, Any]:
+        """
+        Return a record of what is sent to masters instead of sending it.
+        """
+        record = {}  # type: Dict[str, Any]
+
+        def send(
+            tar_path: Path,
+            cluster: Cluster,
+            remote_path: Path,
+            deleted_paths: Iterable[str],
+        ) -> None:
+            """
+            Record the files in the ``tar`` file and the deleted paths.
+            """
+            # pylint: disable=unused-argument
+            with tarfile.open(str(tar_path)) as tar:
+                record['files'] = sorted(
+                    member.name[len('files/'):] for member in tar.getmembers()
+                    if member.name.startswith('files/')
+                )
+                manifest_file = tar.extractfile('manifest.json')
+                assert manifest_file is not None
+                record['manifest'] = json.loads(manifest_file.read().decode())
+            record['deleted'] = list(deleted_paths)
+
+        monkeypatch.setattr(sync, '_send_tarfile_to_masters_and_extract', send)
+        return record
+
+    def test_full_sync(self, tmpdir: local, sent: Dict[str, Any]) -> None:
+        """
+        Without a previous manifest, all files are sent and none are deleted.
+        """
+        local_dir = Path(str(tmpdir))
+        (local_dir / 'util').mkdir()
+        (local_dir / 'test_a.py').write_text('a')
+        (local_dir / 'util' / 'helpers.py').write_text('helpers')
+
+        _sync_dir_to_masters(
+            cluster=None,  # type: ignore
+            local_path=local_dir,
+            remote_path=Path('/remote'),
+            previous_manifest=None,
+        )
+
+        assert sent['files'] == ['test_a.py', 'util/helpers.py']
+        assert sent['deleted'] == []
+        assert sorted(sent['manifest']) == ['test_a.py', 'util/helpers.py']
+
+    def test_incremental_sync(
+        self,
+        tmpdir: local,
+        sent: Dict[str, Any],
+    ) -> None:
+        """
+        With a previous manifest, changed and new files are sent, removed
+        files are deleted and unchanged files are not sent.
+        """
+        local_dir = Path(str(tmpdir))
+        (local_dir / 'unchanged.py').write_text('unchanged')
+        (local_dir / 'changed.py').write_text('changed')
+        (local_dir / 'deleted.py').write_text('deleted')
+        previous_manifest = _local_manifest(
+            path=local_dir,
+            previous_manifest={},
+        )
+
+        (local_dir / 'changed.py').write_text('changed again')
+        (local_dir / 'deleted.py').unlink()
+        (local_dir / 'new.py').write_text('new')
+
+        _sync_dir_to_masters(
+            cluster=None,  # type: ignore
+            local_path=local_dir,
+            remote_path=Path('/remote'),
+            previous_manifest=previous_manifest,
+        )
+
+        assert sent['files'] == ['changed.py', 'new.py']
+        assert sent['deleted'] == ['deleted.py']
+        assert sorted(sent['manifest']) == [
+            'changed.py',
+            'new.py',
+            'unchanged.py',
+        ]
+        assert sent['manifest']['unchanged.py'] == (
+            previous_manifest['unchanged.py']
+        )
+
+    def test_nothing_changed(
+        self,
+        tmpdir: local,
+        sent: Dict[str, Any],
+    ) -> None:
+        """
+        When nothing has changed, no files are sent or deleted.
+        """
+        local_dir = Path(str(tmpdir))
+        (local_dir / 'unchanged.py').write_text('unchanged')
+        previous_manifest = _local_manifest(
+            path=local_dir,
+            previous_manifest={},
+        )
+
+        _sync_dir_to_masters(
+            cluster=None,  # type: ignore
+            local_path=local_dir,
+            remote_path=Path('/remote'),
+            previous_manifest=previous_manifest,
+        )
+
+        assert sent['files'] == []
+        assert sent['deleted'] == []
+        assert sent['manifest'] == previous_manifest
+
+
+class TestManifestPath:
+    """
+    Tests for where manifests are kept on masters.
+    """
+
+    def test_not_in_synced_directory(self) -> None:
+        """
+        Manifests are kept outside the synced directories, with one manifest
+        for each synced directory.
+        """
+        test_dir = Path('/opt/mesosphere/active/dcos-integration-test')
+        open_source_test_dir = test_dir / 'open_source_tests'
+
+        test_manifest = _manifest_path(remote_path=test_dir)
+        open_source_test_manifest = _manifest_path(
+            remote_path=open_source_test_dir,
+        )
+
+        assert test_manifest != open_source_test_manifest
+        for manifest_path in (test_manifest, open_source_test_manifest):
+            assert test_dir not in manifest_path.parents
@@ -0,0 +1,80 @@
+"""
+Tests for ``dcos_e2e_cli.common.utils``.
+"""
+
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+from py.path import local  # pylint: disable=no-name-in-module, import-error
+
+from dcos_e2e_cli._vendor.dcos_installer_tools import DCOSVariant
+from dcos_e2e_cli.common.utils import get_variant
+
+
+class TestGetVariant:
+    """
+    Tests for ``get_variant``.
+    """
+
+    @pytest.fixture()
+    def installer(self, tmpdir: local, monkeypatch: MonkeyPatch) -> Path:
+        """
+        Return a fake installer which records each time it is run, with a
+        cache directory for this test only.
+        """
+        monkeypatch.setenv('XDG_CACHE_HOME', str(tmpdir.mkdir('cache')))
+        installer = Path(str(tmpdir.join('dcos_generate_config.sh')))
+        runs = Path(str(tmpdir.join('runs')))
+        installer.write_text(
+            dedent(
+                """\
+                echo run >> {runs}
+                echo '{{"variant": "ee", "version": "1.12.0"}}'
+                """,
+            ).format(runs=runs),
+        )
+        return installer
+
+    def test_cached(self, installer: Path, tmpdir: local) -> None:
+        """
+        The installer is only run the first time that the variant of an
+        installer is found.
+        """
+        runs = Path(str(tmpdir.join('runs')))
+        for _ in range(2):
+            variant = get_variant(
+                given_variant='auto',
+                installer_path=installer,
+                doctor_message='',
+                workspace_dir=Path(str(tmpdir)),
+            )
+            assert variant == DCOSVariant.ENTERPRISE
+
+        # ``dcos_generate_config.sh --version`` is run twice to get the
+        # variant.
+        assert runs.read_text().splitlines() == ['run', 'run']
+
+    def test_changed_installer(self, installer: Path, tmpdir: local) -> None:
+        """
+        The installer is run again if it has changed.
+        """
+        runs = Path(str(tmpdir.join('runs')))
+        get_variant(
+            given_variant='auto',
+            installer_path=installer,
+            doctor_message='',
+            workspace_dir=Path(str(tmpdir)),
+        )
+        installer.write_text(
+            installer.read_text().replace('"ee"', '""'),
+        )
+        variant = get_variant(
+            given_variant='auto',
+            installer_path=installer,
+            doctor_message='',
+            workspace_dir=Path(str(tmpdir)),
+        )
+        assert variant == DCOSVariant.OSS
+        assert len(runs.read_text().splitlines()) == 4
@@ -0,0 +1,82 @@
+"""
+Tests for reading details of VirtualBox VMs.
+"""
+
+import json
+from textwrap import dedent
+
+from dcos_e2e_cli.dcos_vagrant.commands._virtualbox import (
+    parse_long_vm_list,
+)
+
+
+class TestParseLongVMList:
+    """
+    Tests for parsing the output of ``VBoxManage list --long vms``.
+    """
+
+    def test_vms(self) -> None:
+        """
+        The name, state and description of each VM are parsed.
+        Shared folder and snapshot names are not mistaken for VM names.
+        """
+        description = json.dumps({'dcos_e2e.cluster_id': 'abc'})
+        output = dedent(
+            """\
+            Name:            dcos-e2e-1-master-0
+            Groups:          /
+            Guest OS:        Red Hat (64-bit)
+            State:           running (since 2018-12-01T10:00:00.000000000)
+            Description:
+            {description}
+            Guest:
+
+            Shared folders:
+
+            Name: 'vagrant', Host path: '/tmp/vagrant' (machine mapping)
+
+            Snapshots:
+
+               Name: base (UUID: 00000000-0000-0000-0000-000000000000) *
+
+            Name:            other-vm
+            Groups:          /
+            State:           powered off (since 2018-12-01T09:00:00.000000000)
+
+            """,
+        ).format(description=description)
+
+        vms = parse_long_vm_list(output=output)
+
+        assert set(vms.keys()) == {'dcos-e2e-1-master-0', 'other-vm'}
+        master = vms['dcos-e2e-1-master-0']
+        assert master.name == 'dcos-e2e-1-master-0'
+        assert master.state == 'running'
+        assert master.description == description
+        other = vms['other-vm']
+        assert other.state == 'powered off'
+        assert other.description == ''
+
+    def test_multi_line_description(self) -> None:
+        """
+        A description over many lines is parsed up to the next field.
+        """
+        output = dedent(
+            """\
+            Name:            vm
+            Description:
+            first line
+            second line
+            Guest:
+            """,
+        )
+
+        vms = parse_long_vm_list(output=output)
+
+        assert vms['vm'].description == 'first line\nsecond line'
+
+    def test_empty(self) -> None:
+        """
+        There are no VMs in an empty listing.
+        """
+        assert parse_long_vm_list(output='') == {}
@@ -5,8 +5,10 @@ This module contains tests for Docker backend features which are not covered by
 sibling modules.
 """
 
+import json
 import subprocess
 import uuid
+from ipaddress import IPv4Network
 from pathlib import Path
 from typing import Iterator
 
@@ -14,6 +16,7 @@ from typing import Iterator
 # are disabled.
 import docker
 import pytest
+from _pytest.fixtures import SubRequest
 from docker.models.networks import Network
 from docker.types import Mount
 from py.path import local  # pylint: disable=no-name-in-module, import-error
@@ -26,6 +29,9 @@ from dcos_e2e.docker_storage_drivers import DockerStorageDriver
 from dcos_e2e.docker_versions import DockerVersion
 from dcos_e2e.node import Node, Transport
 
+# We ignore this error because it conflicts with `pytest` standard usage.
+# pylint: disable=redefined-outer-name
+
 
 @retry(
     exceptions=(subprocess.CalledProcessError),
@@ -57,6 +63,39 @@ def _get_container_from_node(node: Node) -> docker.models.containers.Container:
     return matching_containers[0]
 
 
+@pytest.fixture()
+def docker_network(request: SubRequest) -> Iterator[Network]:
+    """
+    Return a Docker network with a user configured subnet.
+
+    The subnet is ``172.28.0.0/16`` unless a ``/16`` subnet is given by
+    indirect parametrization.
+    """
+    subnet = getattr(request, 'param', '172.28.0.0/16')
+    network_address = IPv4Network(subnet).network_address
+    client = docker.from_env(version='auto')
+    ipam_pool = docker.types.IPAMPool(
+        subnet=subnet,
+        iprange=str(IPv4Network((network_address, 24))),
+        gateway=str(network_address + 254),
+    )
+    # We use the default container prefix so that the
+    # ``minidcos docker clean`` command cleans this up.
+    prefix = Docker().container_name_prefix
+    random = uuid.uuid4()
+    name = '{prefix}-network-{random}'.format(prefix=prefix, random=random)
+    network = client.networks.create(
+        name=name,
+        driver='bridge',
+        ipam=docker.types.IPAMConfig(pool_configs=[ipam_pool]),
+        attachable=False,
+    )
+    try:
+        yield network
+    finally:
+        network.remove()
+
+
 class TestDockerBackend:
     """
     Tests for functionality specific to the Docker backend.
@@ -220,6 +259,21 @@ class TestDockerVersion:
 
         assert docker_version == node_docker_version
 
+    def test_docker_tarball_dir(self, tmpdir: local) -> None:
+        """
+        It is possible to install Docker from a directory of Docker tarballs.
+        """
+        with Cluster(
+            cluster_backend=Docker(docker_tarball_dir=Path(str(tmpdir))),
+            masters=1,
+            agents=0,
+            public_agents=0,
+        ) as cluster:
+            (master, ) = cluster.masters
+            docker_version = self._get_docker_version(node=master)
+
+        assert docker_version == DockerVersion.v1_13_1
+
 
 class TestDockerStorageDriver:
     """
@@ -398,33 +452,6 @@ class TestNetworks:
     with nodes.
     """
 
-    @pytest.fixture()
-    def docker_network(self) -> Iterator[Network]:
-        """
-        Return a Docker network.
-        """
-        client = docker.from_env(version='auto')
-        ipam_pool = docker.types.IPAMPool(
-            subnet='172.28.0.0/16',
-            iprange='172.28.0.0/24',
-            gateway='172.28.0.254',
-        )
-        # We use the default container prefix so that the
-        # ``minidcos docker clean`` command cleans this up.
-        prefix = Docker().container_name_prefix
-        random = uuid.uuid4()
-        name = '{prefix}-network-{random}'.format(prefix=prefix, random=random)
-        network = client.networks.create(
-            name=name,
-            driver='bridge',
-            ipam=docker.types.IPAMConfig(pool_configs=[ipam_pool]),
-            attachable=False,
-        )
-        try:
-            yield network
-        finally:
-            network.remove()
-
     def test_custom_docker_network(
         self,
         docker_network: Network,
@@ -560,3 +587,309 @@ class TestOneMasterHostPortMap:
                 }],
             }
             assert master_port_settings == expected_master_port_settings
+
+
+class TestMaxParallelNodes:
+    """
+    Tests for limiting the number of nodes which are started concurrently.
+    """
+
+    @pytest.mark.parametrize('max_parallel_nodes', [1, 2])
+    def test_all_nodes_started(self, max_parallel_nodes: int) -> None:
+        """
+        All requested nodes are started, whatever the concurrency limit.
+        """
+        backend = Docker(max_parallel_nodes=max_parallel_nodes)
+        with Cluster(
+            cluster_backend=backend,
+            masters=2,
+            agents=2,
+            public_agents=1,
+        ) as cluster:
+            assert len(cluster.masters) == 2
+            assert len(cluster.agents) == 2
+            assert len(cluster.public_agents) == 1
+            for node in {*cluster.masters, *cluster.agents}:
+                _wait_for_docker(node=node)
+
+
+class TestOverlapInstallRoles:
+    """
+    Tests for installing DC/OS on masters and agents at the same time.
+    """
+
+    def test_install(self, oss_installer: Path) -> None:
+        """
+        DC/OS can be installed on masters and agents at the same time.
+        """
+        cluster_backend = Docker(overlap_install_roles=True)
+        with Cluster(
+            cluster_backend=cluster_backend,
+            agents=2,
+            public_agents=1,
+        ) as cluster:
+            cluster.install_dcos_from_path(
+                dcos_installer=oss_installer,
+                dcos_config=cluster.base_config,
+                ip_detect_path=cluster_backend.ip_detect_path,
+            )
+            cluster.wait_for_dcos_oss()
+
+
+class TestSharedPackageStore:
+    """
+    Tests for sharing extracted DC/OS packages between nodes.
+    """
+
+    def test_install(self, oss_installer: Path, tmpdir: local) -> None:
+        """
+        DC/OS can be installed on clusters which share a package store, and
+        the bootstrap tarball of an installer is extracted once for clusters
+        with different configurations.
+        """
+        workspace_dir = Path(str(tmpdir))
+        cluster_backend = Docker(
+            shared_package_store=True,
+            workspace_dir=workspace_dir,
+        )
+        for _ in range(2):
+            with Cluster(
+                cluster_backend=cluster_backend,
+                agents=1,
+                public_agents=0,
+            ) as cluster:
+                cluster.install_dcos_from_path(
+                    dcos_installer=oss_installer,
+                    dcos_config=cluster.base_config,
+                    ip_detect_path=cluster_backend.ip_detect_path,
+                )
+                cluster.wait_for_dcos_oss()
+                for node in {*cluster.masters, *cluster.agents}:
+                    node.run(args=['findmnt', '/opt/mesosphere'])
+
+            bootstrap_dir = workspace_dir / 'package-store' / 'bootstrap'
+            store_entries = [
+                path for path in bootstrap_dir.iterdir()
+                if not path.name.startswith('.')
+            ]
+            assert len(store_entries) == 1
+
+    def test_no_snapshot(self, tmpdir: local) -> None:
+        """
+        Snapshots cannot be taken of clusters which use the shared package
+        store.
+        """
+        cluster_backend = Docker(shared_package_store=True)
+        with Cluster(
+            cluster_backend=cluster_backend,
+            agents=0,
+            public_agents=0,
+        ) as cluster:
+            with pytest.raises(ValueError):
+                cluster.snapshot(snapshot_dir=Path(str(tmpdir)) / 'snapshot')
+
+
+class TestWarmPool:
+    """
+    Tests for taking node containers from a pool of started containers.
+    """
+
+    def test_pooled_containers_used(self, tmpdir: local) -> None:
+        """
+        After a cluster is created with a warm pool, the pool is refilled and
+        containers from it are used by the next cluster.
+        """
+        client = docker.from_env(version='auto')
+        pool_filters = {'label': 'dcos_e2e.warm_pool'}
+        backend = Docker(
+            warm_pool_size=1,
+            workspace_dir=Path(str(tmpdir)),
+        )
+        try:
+            with Cluster(
+                cluster_backend=backend,
+                masters=1,
+                agents=1,
+                public_agents=0,
+            ):
+                pass
+
+            pooled_ids = set()
+
+            @retry(exceptions=AssertionError, tries=60, delay=5)
+            def _wait_for_pool() -> None:
+                containers = client.containers.list(
+                    filters={**pool_filters, 'name': 'dcos-e2e-pool-ready-'},
+                )
+                assert len(containers) == 2
+                pooled_ids.update(container.id for container in containers)
+
+            _wait_for_pool()
+
+            with Cluster(
+                cluster_backend=backend,
+                masters=1,
+                agents=1,
+                public_agents=0,
+            ) as cluster:
+                (master, ) = cluster.masters
+                (agent, ) = cluster.agents
+                for node in (master, agent):
+                    result = node.run(args=['echo', '1'])
+                    assert result.stdout.decode().strip() == '1'
+                node_ids = {
+                    container.id
+                    for container in client.containers.list()
+                    if container.attrs['NetworkSettings']['IPAddress'] in {
+                        str(master.public_ip_address),
+                        str(agent.public_ip_address),
+                    }
+                }
+                assert node_ids == pooled_ids
+        finally:
+            for container in client.containers.list(
+                all=True,
+                filters=pool_filters,
+            ):
+                container.remove(v=True, force=True)
+
+
+class TestSnapshot:
+    """
+    Tests for taking snapshots of clusters and creating clusters from them.
+    """
+
+    # A subnet which is not used by other tests, so that the snapshot's IP
+    # addresses are not taken when the cluster is restored.
+    @pytest.mark.parametrize(
+        'docker_network',
+        ['172.29.0.0/16'],
+        indirect=True,
+    )
+    def test_restore(
+        self,
+        docker_network: Network,
+        oss_installer: Path,
+        tmpdir: local,
+    ) -> None:
+        """
+        A cluster created from a snapshot has the installed state and the IP
+        addresses of the cluster which the snapshot was taken of.
+        """
+        snapshot_dir = Path(str(tmpdir)) / 'snapshot'
+        marker = Path('/opt/dcos-e2e-snapshot-marker')
+        cluster_backend = Docker(network=docker_network)
+        try:
+            with Cluster(
+                cluster_backend=cluster_backend,
+                agents=1,
+                public_agents=0,
+            ) as cluster:
+                cluster.install_dcos_from_path(
+                    dcos_installer=oss_installer,
+                    dcos_config=cluster.base_config,
+                    ip_detect_path=cluster_backend.ip_detect_path,
+                )
+                cluster.wait_for_dcos_oss()
+                (master, ) = cluster.masters
+                master.run(args=['touch', str(marker)])
+                original_ips = {
+                    node.public_ip_address
+                    for node in {*cluster.masters, *cluster.agents}
+                }
+                cluster.snapshot(snapshot_dir=snapshot_dir)
+
+            with Cluster(
+                cluster_backend=Docker(snapshot_dir=snapshot_dir),
+                agents=1,
+                public_agents=0,
+            ) as cluster:
+                restored_ips = {
+                    node.public_ip_address
+                    for node in {*cluster.masters, *cluster.agents}
+                }
+                assert restored_ips == original_ips
+                (master, ) = cluster.masters
+                master.run(args=['test', '-f', str(marker)])
+                cluster.wait_for_dcos_oss()
+        finally:
+            client = docker.from_env(version='auto')
+            for image in client.images.list(name='dcos-e2e-snapshot'):
+                client.images.remove(image=image.id, force=True)
+
+    def test_default_network(self, tmpdir: local) -> None:
+        """
+        Snapshots cannot be taken of clusters on the default bridge network.
+        """
+        snapshot_dir = Path(str(tmpdir)) / 'snapshot'
+        with Cluster(
+            cluster_backend=Docker(),
+            agents=0,
+            public_agents=0,
+        ) as cluster:
+            with pytest.raises(ValueError):
+                cluster.snapshot(snapshot_dir=snapshot_dir)
+
+    def test_node_counts(self, tmpdir: local) -> None:
+        """
+        A cluster created from a snapshot must have the same number of each
+        kind of node as the snapshot.
+        """
+        snapshot_dir = Path(str(tmpdir))
+        (snapshot_dir / 'manifest.json').write_text(
+            json.dumps(
+                {
+                    'version': 1,
+                    'network': 'example',
+                    'nodes': [
+                        {
+                            'role': 'master',
+                            'image': 'dcos-e2e-snapshot:example',
+                            'ip_address': '172.29.0.2',
+                            'volumes': {},
+                        },
+                    ],
+                },
+            ),
+        )
+        with pytest.raises(ValueError):
+            Cluster(
+                cluster_backend=Docker(snapshot_dir=snapshot_dir),
+                masters=1,
+                agents=1,
+                public_agents=0,
+            )
+
+
+class TestDestroy:
+    """
+    Tests for destroying clusters.
+    """
+
+    @pytest.mark.parametrize('kill_on_destroy', [True, False])
+    def test_all_containers_removed(self, kill_on_destroy: bool) -> None:
+        """
+        Destroying a cluster removes all of its node containers, whether
+        they are killed or stopped.
+        """
+        client = docker.from_env(version='auto')
+        cluster = Cluster(
+            cluster_backend=Docker(kill_on_destroy=kill_on_destroy),
+            masters=1,
+            agents=2,
+            public_agents=1,
+        )
+        ip_addresses = {
+            str(node.public_ip_address)
+            for node in {
+                *cluster.masters,
+                *cluster.agents,
+                *cluster.public_agents,
+            }
+        }
+        cluster.destroy()
+
+        for container in client.containers.list(all=True):
+            networks = container.attrs['NetworkSettings']['Networks']
+            for network in networks.values():
+                assert network['IPAddress'] not in ip_addresses
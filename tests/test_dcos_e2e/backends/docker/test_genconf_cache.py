@@ -0,0 +1,149 @@
+"""
+Tests for the cache of ``genconf`` output.
+"""
+
+import os
+from pathlib import Path
+
+from py.path import local  # pylint: disable=no-name-in-module, import-error
+
+from dcos_e2e.backends._docker._genconf_cache import (
+    genconf_cache_key,
+    restore_genconf_output,
+    store_genconf_output,
+)
+
+
+def _write_genconf_output(genconf_dir: Path, content: str) -> Path:
+    """
+    Write fake ``genconf`` output to the ``serve`` directory in the given
+    ``genconf`` directory.
+
+    Returns:
+        The ``serve`` directory.
+    """
+    serve_dir = genconf_dir / 'serve'
+    (serve_dir / 'bootstrap').mkdir(parents=True)
+    (serve_dir / 'dcos_install.sh').write_text(content)
+    (serve_dir / 'bootstrap' / 'id.bootstrap.tar.xz').write_text(content)
+    return serve_dir
+
+
+class TestGenconfCacheKey:
+    """
+    Tests for ``genconf_cache_key``.
+    """
+
+    def test_key(self, tmpdir: local) -> None:
+        """
+        The key changes when the installer or the ``genconf`` configuration
+        changes, but not when the output changes.
+        """
+        installer = Path(str(tmpdir.join('dcos_generate_config.sh')))
+        installer.write_text('installer')
+        genconf_dir = Path(str(tmpdir.mkdir('genconf')))
+        (genconf_dir / 'config.yaml').write_text('cluster_name: a')
+        key = genconf_cache_key(installer=installer, genconf_dir=genconf_dir)
+
+        _write_genconf_output(genconf_dir=genconf_dir, content='output')
+        assert genconf_cache_key(
+            installer=installer,
+            genconf_dir=genconf_dir,
+        ) == key
+
+        (genconf_dir / 'config.yaml').write_text('cluster_name: b')
+        config_key = genconf_cache_key(
+            installer=installer,
+            genconf_dir=genconf_dir,
+        )
+        assert config_key != key
+
+        installer.write_text('new installer')
+        assert genconf_cache_key(
+            installer=installer,
+            genconf_dir=genconf_dir,
+        ) not in (key, config_key)
+
+
+class TestGenconfCache:
+    """
+    Tests for storing and restoring ``genconf`` output.
+    """
+
+    def test_miss(self, tmpdir: local) -> None:
+        """
+        Nothing is restored for a key which is not in the cache.
+        """
+        cache_dir = Path(str(tmpdir.mkdir('cache')))
+        serve_dir = Path(str(tmpdir.mkdir('serve')))
+
+        restored = restore_genconf_output(
+            cache_dir=cache_dir,
+            key='missing',
+            serve_dir=serve_dir,
+        )
+
+        assert not restored
+        assert list(serve_dir.iterdir()) == []
+
+    def test_store_and_restore(self, tmpdir: local) -> None:
+        """
+        Stored output is restored into another ``serve`` directory.
+        """
+        cache_dir = Path(str(tmpdir.join('cache')))
+        serve_dir = _write_genconf_output(
+            genconf_dir=Path(str(tmpdir.mkdir('genconf'))),
+            content='output',
+        )
+        store_genconf_output(
+            cache_dir=cache_dir,
+            key='key',
+            serve_dir=serve_dir,
+            max_entries=2,
+        )
+
+        new_serve_dir = Path(str(tmpdir.mkdir('new_serve')))
+        restored = restore_genconf_output(
+            cache_dir=cache_dir,
+            key='key',
+            serve_dir=new_serve_dir,
+        )
+
+        assert restored
+        restored_install_script = new_serve_dir / 'dcos_install.sh'
+        restored_bootstrap = (
+            new_serve_dir / 'bootstrap' / 'id.bootstrap.tar.xz'
+        )
+        assert restored_install_script.read_text() == 'output'
+        assert restored_bootstrap.read_text() == 'output'
+
+    def test_eviction(self, tmpdir: local) -> None:
+        """
+        The least recently used entries are removed so that there are at most
+        ``max_entries`` entries, and restoring an entry counts as using it.
+        """
+        cache_dir = Path(str(tmpdir.join('cache')))
+        for index, key in enumerate(['first', 'second', 'third']):
+            serve_dir = _write_genconf_output(
+                genconf_dir=Path(str(tmpdir.mkdir(key))),
+                content=key,
+            )
+            store_genconf_output(
+                cache_dir=cache_dir,
+                key=key,
+                serve_dir=serve_dir,
+                max_entries=2,
+            )
+            # Modification times are set explicitly so that the order does
+            # not depend on the resolution of the file system's timestamps.
+            os.utime(str(cache_dir / key), (index, index))
+
+            if key == 'second':
+                restore_genconf_output(
+                    cache_dir=cache_dir,
+                    key='first',
+                    serve_dir=Path(str(tmpdir.mkdir('restored'))),
+                )
+
+        entries = sorted(path.name for path in cache_dir.iterdir())
+        assert entries == ['first', 'third']
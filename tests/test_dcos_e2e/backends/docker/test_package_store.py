@@ -0,0 +1,193 @@
+"""
+Tests for the store of extracted DC/OS packages.
+"""
+
+import tarfile
+from pathlib import Path
+from typing import Tuple
+
+from py.path import local  # pylint: disable=no-name-in-module, import-error
+
+from dcos_e2e.backends._docker._package_store import (
+    PACKAGE_STORE_INSTALL_SCRIPT,
+    prepare_package_store,
+)
+
+_INSTALL_SCRIPT = """
+function check_preexisting_dcos() {
+    [[ -d /opt/mesosphere ]] && exit 1
+}
+
+function check_all() {
+    check_preexisting_dcos
+    check_selinux
+}
+"""
+
+
+def _write_tarball(path: Path, name: str, content: str) -> None:
+    """
+    Write a tarball which holds one file.
+    """
+    source = path.parent / (path.name + '.source')
+    source.write_text(content)
+    with tarfile.open(str(path), 'w:xz') as tar:
+        tar.add(str(source), arcname=name)
+
+
+def _write_genconf_output(
+    serve_dir: Path,
+    install_script: str,
+    bootstrap_id: str = 'id',
+    package_ids: Tuple[str, ...] = ('dcos-example--1', ),
+) -> None:
+    """
+    Write fake ``genconf`` output to the given ``serve`` directory.
+    """
+    (serve_dir / 'bootstrap').mkdir(parents=True)
+    (serve_dir / 'dcos_install.sh').write_text(install_script)
+    _write_tarball(
+        path=serve_dir / 'bootstrap' / (bootstrap_id + '.bootstrap.tar.xz'),
+        name='bin/pkgpanda',
+        content=bootstrap_id,
+    )
+    for package_id in package_ids:
+        package_name = package_id.split('--')[0]
+        package_dir = serve_dir / 'packages' / package_name
+        package_dir.mkdir(parents=True, exist_ok=True)
+        _write_tarball(
+            path=package_dir / (package_id + '.tar.xz'),
+            name='buildinfo.full.json',
+            content=package_id,
+        )
+
+
+class TestPreparePackageStore:
+    """
+    Tests for ``prepare_package_store``.
+    """
+
+    def test_prepare(self, tmpdir: local) -> None:
+        """
+        Packages are extracted into the destination, and a copy of
+        ``dcos_install.sh`` which skips only the preflight check for an
+        existing installation is written.
+        """
+        serve_dir = Path(str(tmpdir.join('serve')))
+        _write_genconf_output(
+            serve_dir=serve_dir,
+            install_script=_INSTALL_SCRIPT,
+        )
+        destination = Path(str(tmpdir.mkdir('destination')))
+
+        prepared = prepare_package_store(
+            serve_dir=serve_dir,
+            store_dir=Path(str(tmpdir.join('store'))),
+            destination=destination,
+            max_entries=2,
+        )
+
+        assert prepared
+        assert (destination / 'bin' / 'pkgpanda').read_text() == 'id'
+        package_dir = destination / 'packages' / 'dcos-example--1'
+        buildinfo = package_dir / 'buildinfo.full.json'
+        assert buildinfo.read_text() == 'dcos-example--1'
+        install_script = (serve_dir / PACKAGE_STORE_INSTALL_SCRIPT).read_text()
+        assert 'function check_preexisting_dcos() {' in install_script
+        assert '    check_preexisting_dcos\n' not in install_script
+        assert '    check_selinux\n' in install_script
+
+    def test_check_not_found(self, tmpdir: local) -> None:
+        """
+        The package store is not used if ``dcos_install.sh`` does not run the
+        preflight check for an existing installation as expected.
+        """
+        serve_dir = Path(str(tmpdir.join('serve')))
+        _write_genconf_output(
+            serve_dir=serve_dir,
+            install_script='check_all\n',
+        )
+        destination = Path(str(tmpdir.mkdir('destination')))
+
+        prepared = prepare_package_store(
+            serve_dir=serve_dir,
+            store_dir=Path(str(tmpdir.join('store'))),
+            destination=destination,
+            max_entries=2,
+        )
+
+        assert not prepared
+        assert not (serve_dir / PACKAGE_STORE_INSTALL_SCRIPT).exists()
+        assert list(destination.iterdir()) == []
+
+    def test_shared_between_configurations(self, tmpdir: local) -> None:
+        """
+        Clusters with different configurations share the packages which they
+        have in common, and only the packages which differ are extracted for
+        each configuration.
+        """
+        store_dir = Path(str(tmpdir.join('store')))
+        destinations = []
+        for configuration in ('first', 'second'):
+            serve_dir = Path(str(tmpdir.join(configuration, 'serve')))
+            _write_genconf_output(
+                serve_dir=serve_dir,
+                install_script=_INSTALL_SCRIPT,
+                package_ids=(
+                    'dcos-example--1',
+                    'dcos-config--' + configuration,
+                ),
+            )
+            destination = Path(str(tmpdir.mkdir(configuration + '-dest')))
+            assert prepare_package_store(
+                serve_dir=serve_dir,
+                store_dir=store_dir,
+                destination=destination,
+                max_entries=2,
+            )
+            destinations.append(destination)
+
+        buildinfo = Path('packages', 'dcos-example--1', 'buildinfo.full.json')
+        shared = [destination / buildinfo for destination in destinations]
+        assert shared[0].stat().st_ino == shared[1].stat().st_ino
+        second_packages = destinations[1] / 'packages'
+        assert (second_packages / 'dcos-config--second').is_dir()
+        assert not (second_packages / 'dcos-config--first').exists()
+        assert len(list((store_dir / 'bootstrap').iterdir())) == 1
+        assert len(list((store_dir / 'packages').iterdir())) == 3
+
+    def test_eviction(self, tmpdir: local) -> None:
+        """
+        Only the bootstrap tarballs and packages which the most recent
+        preparations used are kept.
+        Removing entries from the store does not change destinations.
+        """
+        store_dir = Path(str(tmpdir.join('store')))
+        destinations = []
+        for bootstrap_id in ('old', 'new'):
+            serve_dir = Path(str(tmpdir.join(bootstrap_id, 'serve')))
+            _write_genconf_output(
+                serve_dir=serve_dir,
+                install_script=_INSTALL_SCRIPT,
+                bootstrap_id=bootstrap_id,
+                package_ids=('dcos-example--' + bootstrap_id, ),
+            )
+            destination = Path(str(tmpdir.mkdir(bootstrap_id + '-dest')))
+            assert prepare_package_store(
+                serve_dir=serve_dir,
+                store_dir=store_dir,
+                destination=destination,
+                max_entries=1,
+            )
+            destinations.append(destination)
+
+        assert [path.name for path in (store_dir / 'bootstrap').iterdir()] == [
+            'new',
+        ]
+        assert [path.name for path in (store_dir / 'packages').iterdir()] == [
+            'dcos-example--new',
+        ]
+        old_package = destinations[0] / 'packages' / 'dcos-example--old'
+        assert (old_package / 'buildinfo.full.json').read_text() == (
+            'dcos-example--old'
+        )
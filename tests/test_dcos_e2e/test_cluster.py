@@ -6,19 +6,27 @@ long time to run.
 """
 
 import logging
+import threading
+import time
 from pathlib import Path
-from subprocess import CalledProcessError
+from subprocess import CalledProcessError, TimeoutExpired
 from textwrap import dedent
-from typing import Iterator, List
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import pytest
 from _pytest.logging import LogCaptureFixture
+from _pytest.monkeypatch import MonkeyPatch
 from kazoo.client import KazooClient
 from py.path import local  # pylint: disable=no-name-in-module, import-error
 
+from dcos_e2e import cluster as cluster_module
 from dcos_e2e.backends import ClusterBackend
-from dcos_e2e.cluster import Cluster
-from dcos_e2e.node import Output
+from dcos_e2e.cluster import (
+    _SSH_WAIT_CONCURRENCY,
+    Cluster,
+    _wait_for_ssh_on_nodes,
+)
+from dcos_e2e.node import Output, Role
 
 
 class TestIntegrationTests:
@@ -461,6 +469,79 @@ class TestClusterFromNodes:
 
             cluster.wait_for_dcos_oss()
 
+    def test_install_dcos_error(
+        self,
+        cluster_backend: ClusterBackend,
+        tmpdir: local,
+    ) -> None:
+        """
+        When DC/OS is installed on the nodes of an existing cluster
+        concurrently, an error on any node is raised.
+        """
+        broken_installer = tmpdir.join('dcos_generate_config.sh')
+        broken_installer.write('exit 1')
+
+        with Cluster(
+            cluster_backend=cluster_backend,
+            masters=1,
+            agents=2,
+            public_agents=0,
+        ) as original_cluster:
+            cluster = Cluster.from_nodes(
+                masters=original_cluster.masters,
+                agents=original_cluster.agents,
+                public_agents=original_cluster.public_agents,
+            )
+
+            with pytest.raises(CalledProcessError):
+                cluster.install_dcos_from_path(
+                    dcos_installer=Path(str(broken_installer)),
+                    dcos_config=original_cluster.base_config,
+                    ip_detect_path=cluster_backend.ip_detect_path,
+                    concurrency=2,
+                )
+
+
+class TestRunOnNodes:
+    """
+    Tests for running a command on many nodes.
+    """
+
+    def test_run_on_nodes(self, cluster_backend: ClusterBackend) -> None:
+        """
+        A command is run on each node with the given roles, and failures are
+        returned rather than raised.
+        """
+        with Cluster(
+            cluster_backend=cluster_backend,
+            masters=1,
+            agents=2,
+            public_agents=1,
+        ) as cluster:
+            results = cluster.run_on_nodes(
+                args=['echo', '$HOSTNAME'],
+                roles=(Role.AGENT, Role.PUBLIC_AGENT),
+                shell=True,
+            )
+            assert set(results.keys()) == {
+                *cluster.agents,
+                *cluster.public_agents,
+            }
+            for result in results.values():
+                assert result.exception is None
+                assert result.completed_process is not None
+                assert result.completed_process.stdout.strip()
+                assert result.seconds > 0
+
+            (master, ) = cluster.masters
+            results = cluster.run_on_nodes(
+                args=['false'],
+                roles=(Role.MASTER, ),
+            )
+            assert set(results.keys()) == {master}
+            with pytest.raises(CalledProcessError):
+                results[master].check_returncode()
+
 
 class TestDestroyNode:
     """
@@ -475,3 +556,114 @@ class TestDestroyNode:
             (agent, ) = cluster.agents
             cluster.destroy_node(node=agent)
             assert not cluster.agents
+
+
+_FAKE_NODE_LOCK = threading.Lock()
+
+
+class _FakeProcess:
+    """
+    A process which records how many checks run on nodes at the same time.
+    """
+
+    def __init__(self, state: Dict[str, int], seconds: float) -> None:
+        """
+        Args:
+            state: Counts shared by all fake nodes.
+            seconds: How long the process takes.
+        """
+        self._state = state
+        self._seconds = seconds
+        self.returncode = None  # type: Optional[int]
+
+    def communicate(
+        self,
+        timeout: Optional[float] = None,
+    ) -> Tuple[bytes, bytes]:
+        """
+        Take ``seconds`` to finish, or raise ``TimeoutExpired`` after
+        ``timeout`` seconds if that is sooner.
+        """
+        if self.returncode is not None:
+            return b'', b''
+
+        with _FAKE_NODE_LOCK:
+            self._state['running'] += 1
+            self._state['max_running'] = max(
+                self._state['max_running'],
+                self._state['running'],
+            )
+        try:
+            if timeout is not None and timeout < self._seconds:
+                time.sleep(timeout)
+                raise TimeoutExpired(cmd=['fake'], timeout=timeout)
+            time.sleep(self._seconds)
+        finally:
+            with _FAKE_NODE_LOCK:
+                self._state['running'] -= 1
+
+        self.returncode = 0
+        return b'', b''
+
+    def kill(self) -> None:
+        """
+        Stop the process.
+        """
+        self.returncode = -9
+
+
+class _FakeNode:
+    """
+    A node which records how many checks run on nodes at the same time.
+    """
+
+    def __init__(self, state: Dict[str, int], seconds: float) -> None:
+        """
+        Args:
+            state: Counts shared by all fake nodes.
+            seconds: How long each command takes.
+        """
+        self._state = state
+        self._seconds = seconds
+
+    def popen(self, **kwargs: Any) -> _FakeProcess:
+        """
+        Start a command which takes ``seconds`` to run.
+        """
+        # pylint: disable=unused-argument
+        return _FakeProcess(state=self._state, seconds=self._seconds)
+
+
+class TestWaitForSSH:
+    """
+    Tests for waiting for SSH on the nodes of a new cluster.
+    """
+
+    def test_concurrency_limited(self) -> None:
+        """
+        SSH is waited for on a limited number of nodes at a time.
+        """
+        state = {'running': 0, 'max_running': 0}
+        nodes = {
+            _FakeNode(state=state, seconds=0.05)
+            for _ in range(_SSH_WAIT_CONCURRENCY * 2)
+        }
+        _wait_for_ssh_on_nodes(nodes=nodes)  # type: ignore
+        assert state['max_running'] == _SSH_WAIT_CONCURRENCY
+
+    def test_hung_node(self, monkeypatch: MonkeyPatch) -> None:
+        """
+        A node on which checking for SSH hangs does not make waiting outlast
+        the deadline.
+        """
+        monkeypatch.setattr(cluster_module, '_SSH_WAIT_TIMEOUT_SECONDS', 0.1)
+        monkeypatch.setattr(cluster_module, '_SSH_PROBE_TIMEOUT_SECONDS', 0.1)
+        state = {'running': 0, 'max_running': 0}
+        nodes = {
+            _FakeNode(state=state, seconds=0),
+            _FakeNode(state=state, seconds=2),
+        }
+        start_time = time.monotonic()
+        with pytest.raises(TimeoutExpired):
+            _wait_for_ssh_on_nodes(nodes=nodes)  # type: ignore
+        assert time.monotonic() - start_time < 1
@@ -0,0 +1,159 @@
+"""
+Tests for common utilities.
+"""
+
+import asyncio
+import io
+import subprocess
+import time
+from typing import List  # noqa: F401
+
+import pytest
+
+from dcos_e2e._common import run_subprocess, run_subprocess_async
+
+
+class TestRunSubprocess:
+    """
+    Tests for ``run_subprocess``.
+    """
+
+    def test_log_output_live(self) -> None:
+        """
+        When logging output live, each line is given to the line callback and
+        all output is in ``stdout``.
+        """
+        lines = []  # type: List[bytes]
+        result = run_subprocess(
+            args=['sh', '-c', 'echo one; echo two >&2; echo three'],
+            log_output_live=True,
+            line_callback=lines.append,
+        )
+        assert lines == [b'one\n', b'two\n', b'three\n']
+        assert result.stdout == b'one\ntwo\nthree\n'
+        assert result.stderr == b''
+
+    def test_output_limit(self) -> None:
+        """
+        When there is more output than the limit, the start and the end of the
+        output are kept.
+        """
+        result = run_subprocess(
+            args=['sh', '-c', 'for i in $(seq 1 1000); do echo $i; done'],
+            log_output_live=True,
+            output_limit=20,
+            line_callback=lambda line: None,
+        )
+        # The first 10 bytes and the last 10 bytes are kept.
+        head, tail = result.stdout.split(b'\n[... ')
+        assert head == b'1\n2\n3\n4\n5\n'
+        assert tail == b'3873 bytes omitted ...]\n\n999\n1000\n'
+
+    def test_output_limit_one_byte(self) -> None:
+        """
+        When the limit is one byte, only the last byte of output is kept.
+        """
+        result = run_subprocess(
+            args=['sh', '-c', 'echo one; echo two'],
+            log_output_live=True,
+            output_limit=1,
+            line_callback=lambda line: None,
+        )
+        assert result.stdout == b'\n[... 7 bytes omitted ...]\n\n'
+
+    @pytest.mark.parametrize('output_limit', [0, -1])
+    def test_output_limit_too_small(self, output_limit: int) -> None:
+        """
+        A limit of less than one byte is rejected before the command is run.
+        """
+        with pytest.raises(ValueError):
+            run_subprocess(
+                args=['sh', '-c', 'echo output'],
+                log_output_live=True,
+                output_limit=output_limit,
+            )
+
+    def test_spool_output(self) -> None:
+        """
+        When output is spooled, all output is written to ``stdout_file``.
+        """
+        result = run_subprocess(
+            args=['sh', '-c', 'for i in $(seq 1 1000); do echo $i; done'],
+            log_output_live=True,
+            output_limit=20,
+            spool_output=True,
+            line_callback=lambda line: None,
+        )
+        result.stdout_file.seek(0)
+        expected = b''.join(
+            '{number}\n'.format(number=number).encode()
+            for number in range(1, 1001)
+        )
+        assert result.stdout_file.read() == expected
+
+    def test_error(self) -> None:
+        """
+        When the command fails, the output is in the raised error.
+        """
+        with pytest.raises(subprocess.CalledProcessError) as excinfo:
+            run_subprocess(
+                args=['sh', '-c', 'echo output; exit 1'],
+                log_output_live=True,
+            )
+        assert excinfo.value.output == b'output\n'
+
+
+class TestRunSubprocessAsync:
+    """
+    Tests for ``run_subprocess_async``.
+    """
+
+    def test_concurrent(self) -> None:
+        """
+        Many commands can run at the same time from one event loop.
+        """
+        loop = asyncio.get_event_loop()
+        start_time = time.monotonic()
+        results = loop.run_until_complete(
+            asyncio.gather(
+                *[
+                    run_subprocess_async(
+                        args=['sh', '-c', 'sleep 0.5; echo done'],
+                        log_output_live=False,
+                    ) for _ in range(10)
+                ],
+            ),
+        )
+        assert time.monotonic() - start_time < 2.5
+        assert [result.stdout for result in results] == [b'done\n'] * 10
+
+    @pytest.mark.parametrize('log_output_live', [True, False])
+    def test_stdin(self, log_output_live: bool) -> None:
+        """
+        A file can be sent to the standard input of a command.
+        """
+        content = b'x' * 1024 * 1024
+        loop = asyncio.get_event_loop()
+        result = loop.run_until_complete(
+            run_subprocess_async(
+                args=['wc', '-c'],
+                log_output_live=log_output_live,
+                stdin=io.BytesIO(content),
+            ),
+        )
+        assert int(result.stdout) == len(content)
+
+    def test_error(self) -> None:
+        """
+        When the command fails, the output is in the raised error.
+        """
+        loop = asyncio.get_event_loop()
+        with pytest.raises(subprocess.CalledProcessError) as excinfo:
+            loop.run_until_complete(
+                run_subprocess_async(
+                    args=['sh', '-c', 'echo output; echo error >&2; exit 1'],
+                    log_output_live=False,
+                ),
+            )
+        assert excinfo.value.output == b'output\n'
+        assert excinfo.value.stderr == b'error\n'
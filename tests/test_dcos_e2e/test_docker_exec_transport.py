@@ -0,0 +1,120 @@
+"""
+Tests for the index of containers used by the Docker exec transport.
+"""
+
+from ipaddress import IPv4Address
+from typing import Any, Dict, List  # noqa: F401
+
+import docker
+import pytest
+
+from dcos_e2e._node_transports._docker_exec_transport import _ContainerIndex
+
+
+class _FakeContainer:
+    """
+    A container with an ID and an IP address, as listed by Docker.
+    """
+
+    def __init__(self, container_id: str, ip_address: str) -> None:
+        self.id = container_id  # pylint: disable=invalid-name
+        self.attrs = {
+            'NetworkSettings': {
+                'Networks': {
+                    'bridge': {
+                        'IPAddress': ip_address,
+                    },
+                },
+            },
+            'State': {
+                'Running': True,
+            },
+        }
+
+
+class _FakeClient:
+    """
+    A Docker client with only the methods which ``_ContainerIndex`` uses.
+    """
+
+    def __init__(self) -> None:
+        self.running = []  # type: List[_FakeContainer]
+        self.list_count = 0
+        self.containers = self
+        self.api = self
+
+    def list(self, sparse: bool) -> List[_FakeContainer]:
+        """
+        List running containers.
+        """
+        assert sparse
+        self.list_count += 1
+        return list(self.running)
+
+    def inspect_container(self, container: str) -> Dict[str, Any]:
+        """
+        Return the details of a running container.
+        """
+        for running in self.running:
+            if running.id == container:
+                return running.attrs
+        raise docker.errors.NotFound(message=container)
+
+
+@pytest.fixture()
+def fake_client() -> _FakeClient:
+    """
+    Return a fake Docker client.
+    """
+    return _FakeClient()
+
+
+class TestContainerIndex:
+    """
+    Tests for ``_ContainerIndex``.
+    """
+
+    def test_hit(self, fake_client: _FakeClient) -> None:
+        """
+        Containers in the index are looked up without listing containers.
+        """
+        fake_client.running = [_FakeContainer('a', '172.17.0.2')]
+        index = _ContainerIndex(ttl_seconds=60)
+        index._client = fake_client  # pylint: disable=protected-access
+        ip_address = IPv4Address('172.17.0.2')
+
+        assert index.container_id(ip_address=ip_address) == 'a'
+        assert index.container_id(ip_address=ip_address) == 'a'
+        assert fake_client.list_count == 1
+
+    def test_reused_ip_address(self, fake_client: _FakeClient) -> None:
+        """
+        If a container in the index has been removed and its IP address has
+        been given to a new container, the new container is found.
+        """
+        fake_client.running = [_FakeContainer('old', '172.17.0.2')]
+        index = _ContainerIndex(ttl_seconds=60)
+        index._client = fake_client  # pylint: disable=protected-access
+        ip_address = IPv4Address('172.17.0.2')
+        assert index.container_id(ip_address=ip_address) == 'old'
+
+        fake_client.running = [_FakeContainer('new', '172.17.0.2')]
+
+        assert index.container_id(ip_address=ip_address) == 'new'
+
+    def test_no_container(self, fake_client: _FakeClient) -> None:
+        """
+        An error which names the IP address is raised if there is no running
+        container with the IP address.
+        """
+        index = _ContainerIndex(ttl_seconds=60)
+        index._client = fake_client  # pylint: disable=protected-access
+
+        with pytest.raises(ValueError) as excinfo:
+            index.container_id(ip_address=IPv4Address('172.17.0.2'))
+
+        expected = (
+            'Expected one running container with the IP address 172.17.0.2, '
+            'found 0.'
+        )
+        assert str(excinfo.value) == expected
@@ -0,0 +1,325 @@
+"""
+Tests for the cache of downloaded files.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from socketserver import ThreadingMixIn
+from typing import Dict, Iterator, List, Tuple  # noqa: F401
+
+import pytest
+import requests
+from py.path import local  # pylint: disable=no-name-in-module, import-error
+
+from dcos_e2e._download_cache import fetch_file
+
+# We ignore this error because it conflicts with `pytest` standard usage.
+# pylint: disable=redefined-outer-name
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    """
+    An HTTP server which serves files and records requests.
+    """
+
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(('127.0.0.1', 0), _Handler)
+        # Contents and ``ETag`` values of files by path.
+        self.files = {}  # type: Dict[str, Tuple[bytes, str]]
+        self.requests = []  # type: List[Tuple[str, str]]
+        self.lock = threading.Lock()
+        # ``Content-Length`` values which differ from the size of files.
+        self.lengths = {}  # type: Dict[str, int]
+        # Downloads of these paths wait until the event is set.
+        self.blocked = {}  # type: Dict[str, threading.Event]
+
+    def serve(self, path: str, content: bytes, etag: str) -> str:
+        """
+        Serve a file.
+
+        Returns:
+            The URL of the file.
+        """
+        self.files[path] = (content, etag)
+        host, port = self.server_address
+        return 'http://{host}:{port}{path}'.format(
+            host=host,
+            port=port,
+            path=path,
+        )
+
+    @property
+    def downloads(self) -> List[str]:
+        """
+        The paths of files which have been downloaded.
+        """
+        return [path for method, path in self.requests if method == 'GET']
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """
+    A handler for ``_Server``.
+    """
+
+    server = None  # type: _Server
+
+    def log_message(self, *args: str) -> None:
+        """
+        Do not log requests.
+        """
+
+    def _send_headers(self) -> bytes:
+        """
+        Send a status and headers for the requested file.
+
+        Returns:
+            The contents of the file.
+        """
+        with self.server.lock:
+            self.server.requests.append((self.command, self.path))
+        content, etag = self.server.files[self.path]
+        self.send_response(200)
+        length = self.server.lengths.get(self.path, len(content))
+        self.send_header('Content-Length', str(length))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        return content
+
+    def do_HEAD(self) -> None:  # pylint: disable=invalid-name
+        """
+        Send headers for a file.
+        """
+        self._send_headers()
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """
+        Send a file.
+        """
+        content = self._send_headers()
+        if self.path in self.server.blocked:
+            self.server.blocked[self.path].wait(timeout=10)
+        self.wfile.write(content)
+
+
+@pytest.fixture()
+def server() -> Iterator[_Server]:
+    """
+    Serve files over HTTP.
+    """
+    http_server = _Server()
+    thread = threading.Thread(target=http_server.serve_forever)
+    thread.start()
+    yield http_server
+    http_server.shutdown()
+    http_server.server_close()
+    thread.join()
+
+
+class TestFetchFile:
+    """
+    Tests for ``fetch_file``.
+    """
+
+    def test_cache_hit(self, server: _Server, tmpdir: local) -> None:
+        """
+        A file is not downloaded again if the server reports that it has not
+        changed.
+        """
+        content = os.urandom(1024)
+        url = server.serve(path='/installer', content=content, etag='"1"')
+        cache_dir = Path(str(tmpdir.join('cache')))
+        first = Path(str(tmpdir.join('first')))
+        second = Path(str(tmpdir.join('second')))
+
+        fetch_file(
+            url=url,
+            destination=first,
+            cache_dir=cache_dir,
+            max_entries=2,
+        )
+        fetch_file(
+            url=url,
+            destination=second,
+            cache_dir=cache_dir,
+            max_entries=2,
+        )
+
+        assert first.read_bytes() == content
+        assert second.read_bytes() == content
+        assert server.downloads == ['/installer']
+
+    def test_changed_validator(self, server: _Server, tmpdir: local) -> None:
+        """
+        A file is downloaded again if the server reports a different
+        validator for it.
+        """
+        url = server.serve(path='/installer', content=b'old', etag='"1"')
+        cache_dir = Path(str(tmpdir.join('cache')))
+        destination = Path(str(tmpdir.join('installer')))
+        fetch_file(
+            url=url,
+            destination=destination,
+            cache_dir=cache_dir,
+            max_entries=2,
+        )
+
+        server.serve(path='/installer', content=b'new', etag='"2"')
+        fetch_file(
+            url=url,
+            destination=destination,
+            cache_dir=cache_dir,
+            max_entries=2,
+        )
+
+        assert destination.read_bytes() == b'new'
+        assert server.downloads == ['/installer', '/installer']
+
+    def test_eviction(self, server: _Server, tmpdir: local) -> None:
+        """
+        The least recently used files are removed so that there are at most
+        ``max_entries``, and using a file counts as using it.
+        """
+        cache_dir = Path(str(tmpdir.join('cache')))
+        urls = {
+            name: server.serve(
+                path='/' + name,
+                content=name.encode(),
+                etag='"1"',
+            )
+            for name in ('first', 'second', 'third')
+        }
+        destination = Path(str(tmpdir.join('installer')))
+
+        names = ['first', 'second', 'first', 'third', 'first', 'second']
+        for index, name in enumerate(names):
+            fetch_file(
+                url=urls[name],
+                destination=destination,
+                cache_dir=cache_dir,
+                max_entries=2,
+            )
+            assert destination.read_bytes() == name.encode()
+            # Modification times are set explicitly so that the order does
+            # not depend on the resolution of the file system's timestamps.
+            sha256 = hashlib.sha256(name.encode()).hexdigest()
+            os.utime(str(cache_dir / 'entries' / sha256), (index, index))
+
+        # "second" was evicted when "third" was added.
+        assert server.downloads == ['/first', '/second', '/third', '/second']
+        assert len(list((cache_dir / 'entries').iterdir())) == 2
+        assert len(list((cache_dir / 'urls').iterdir())) == 2
+
+    def test_unreachable_server(self, server: _Server, tmpdir: local) -> None:
+        """
+        If the server cannot be reached, the file which was last downloaded
+        from the URL is used.
+        """
+        url = server.serve(path='/installer', content=b'cached', etag='"1"')
+        cache_dir = Path(str(tmpdir.join('cache')))
+        first = Path(str(tmpdir.join('first')))
+        second = Path(str(tmpdir.join('second')))
+        fetch_file(
+            url=url,
+            destination=first,
+            cache_dir=cache_dir,
+            max_entries=2,
+        )
+
+        server.shutdown()
+        server.server_close()
+        fetch_file(
+            url=url,
+            destination=second,
+            cache_dir=cache_dir,
+            max_entries=2,
+        )
+
+        assert second.read_bytes() == b'cached'
+
+    def test_unreachable_server_not_cached(
+        self,
+        server: _Server,
+        tmpdir: local,
+    ) -> None:
+        """
+        An error is raised if the server cannot be reached and the file is
+        not in the cache.
+        """
+        url = server.serve(path='/installer', content=b'', etag='"1"')
+        server.shutdown()
+        server.server_close()
+
+        with pytest.raises(requests.ConnectionError):
+            fetch_file(
+                url=url,
+                destination=Path(str(tmpdir.join('installer'))),
+                cache_dir=Path(str(tmpdir.join('cache'))),
+                max_entries=2,
+            )
+
+    def test_truncated(self, server: _Server, tmpdir: local) -> None:
+        """
+        An error is raised and nothing is cached if fewer bytes are received
+        than the server said it would send.
+        """
+        url = server.serve(path='/installer', content=b'short', etag='"1"')
+        server.lengths['/installer'] = 1024
+        cache_dir = Path(str(tmpdir.join('cache')))
+        destination = Path(str(tmpdir.join('installer')))
+
+        with pytest.raises(requests.RequestException):
+            fetch_file(
+                url=url,
+                destination=destination,
+                cache_dir=cache_dir,
+                max_entries=2,
+            )
+
+        assert not destination.exists()
+        assert not (cache_dir / 'entries').exists()
+        assert [path.name for path in cache_dir.iterdir()] == ['lock']
+
+    def test_concurrent(self, server: _Server, tmpdir: local) -> None:
+        """
+        A slow download does not hold up fetching a different URL.
+        """
+        cache_dir = Path(str(tmpdir.join('cache')))
+        slow_url = server.serve(path='/slow', content=b'slow', etag='"1"')
+        fast_url = server.serve(path='/fast', content=b'fast', etag='"1"')
+        release = threading.Event()
+        server.blocked['/slow'] = release
+        slow_destination = Path(str(tmpdir.join('slow')))
+        fast_destination = Path(str(tmpdir.join('fast')))
+        slow_fetch = threading.Thread(
+            target=fetch_file,
+            kwargs={
+                'url': slow_url,
+                'destination': slow_destination,
+                'cache_dir': cache_dir,
+                'max_entries': 2,
+            },
+        )
+        slow_fetch.start()
+        while server.downloads != ['/slow']:
+            time.sleep(0.01)
+
+        try:
+            fetch_file(
+                url=fast_url,
+                destination=fast_destination,
+                cache_dir=cache_dir,
+                max_entries=2,
+            )
+            assert slow_fetch.is_alive()
+        finally:
+            release.set()
+            slow_fetch.join()
+
+        assert fast_destination.read_bytes() == b'fast'
+        assert slow_destination.read_bytes() == b'slow'
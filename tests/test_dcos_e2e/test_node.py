@@ -4,6 +4,7 @@ Tests for managing DC/OS cluster nodes.
 See ``test_node_install.py`` for more, related tests.
 """
 
+import asyncio
 import logging
 import os
 import subprocess
@@ -219,7 +220,8 @@ class TestSendFile:
         """
         It is possible to send a file to a cluster node to a directory that
         is mounted as tmpfs.
-        See ``DockerExecTransport.send_file`` for details.
+        Copying files to tmpfs mounts with the Docker API fails silently, so
+        files are extracted by a command on the node instead.
         """
         content = str(uuid.uuid4())
         file_name = 'example_file.txt'
@@ -246,7 +248,8 @@ class TestSendFile:
         """
         It is possible to send a file to a cluster node to a directory that
         is mounted as tmpfs.
-        See ``DockerExecTransport.send_file`` for details.
+        Copying files to tmpfs mounts with the Docker API fails silently, so
+        files are extracted by a command on the node instead.
         """
         content = str(uuid.uuid4())
         local_file = tmpdir.join('example_file.txt')
@@ -368,6 +371,61 @@ class TestSendFile:
         assert result.stdout.decode() == random
 
 
+class TestAsync:
+    """
+    Tests for ``Node.run_async`` and ``Node.send_file_async``.
+    """
+
+    def test_run_async(self, dcos_node: Node) -> None:
+        """
+        Commands can be run concurrently from one event loop.
+        """
+        loop = asyncio.get_event_loop()
+        results = loop.run_until_complete(
+            asyncio.gather(
+                *[
+                    dcos_node.run_async(args=['echo', str(index)])
+                    for index in range(5)
+                ],
+            ),
+        )
+        assert [result.stdout.strip() for result in results] == [
+            str(index).encode() for index in range(5)
+        ]
+
+    def test_run_async_error(self, dcos_node: Node) -> None:
+        """
+        An error is raised when a command exits with a non-zero code.
+        """
+        loop = asyncio.get_event_loop()
+        with pytest.raises(CalledProcessError):
+            loop.run_until_complete(dcos_node.run_async(args=['false']))
+
+    def test_send_file_async(
+        self,
+        dcos_node: Node,
+        tmpdir: local,
+    ) -> None:
+        """
+        It is possible to send a file to a cluster node from an event loop.
+        """
+        content = str(uuid.uuid4())
+        local_file = tmpdir.join('example_file.txt')
+        local_file.write(content)
+        random = uuid.uuid4().hex
+        master_destination_path = Path('/etc') / random / 'file.txt'
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(
+            dcos_node.send_file_async(
+                local_path=Path(str(local_file)),
+                remote_path=master_destination_path,
+            ),
+        )
+        args = ['cat', str(master_destination_path)]
+        result = dcos_node.run(args=args)
+        assert result.stdout.decode() == content
+
+
 class TestPopen:
     """
     Tests for ``Node.popen``.
@@ -807,6 +865,31 @@ class TestOutput:
         messages = set([first_log.message, second_log.message])
         assert messages == expected_messages
 
+    def test_log_and_capture_limit_and_spool(
+        self,
+        dcos_node: Node,
+    ) -> None:
+        """
+        When given ``Output.LOG_AND_CAPTURE``, the output kept in memory can be
+        limited, and all output can be written to a temporary file.
+        """
+        args = ['seq', '1', '1000']
+        result = dcos_node.run(
+            args=args,
+            output=Output.LOG_AND_CAPTURE,
+            output_limit=20,
+            spool_output=True,
+        )
+
+        assert result.stdout.startswith(b'1\n2\n3\n4\n5\n')
+        assert result.stdout.endswith(b'\n999\n1000\n')
+        assert b'bytes omitted' in result.stdout
+        result.stdout_file.seek(0)
+        expected = ''.join(
+            '{number}\n'.format(number=number) for number in range(1, 1001)
+        )
+        assert result.stdout_file.read().decode() == expected
+
     def test_not_utf_8_log_and_capture(
         self,
         caplog: LogCaptureFixture,
@@ -0,0 +1,182 @@
+"""
+Tests for waiting until parts of a cluster are ready.
+"""
+
+import json
+import subprocess
+import time
+from typing import List  # noqa: F401
+
+import pytest
+
+from dcos_e2e._readiness import (
+    _asserting_session_check,
+    sequence,
+    wait_for_checks,
+)
+
+
+class TestWaitForChecks:
+    """
+    Tests for ``wait_for_checks``.
+    """
+
+    def test_concurrent(self) -> None:
+        """
+        Checks are waited for at the same time, so waiting takes about as long
+        as the slowest check.
+        """
+        start_time = time.monotonic()
+
+        def ready_after(seconds: float) -> bool:
+            """
+            Return whether ``seconds`` have passed since the test started.
+            """
+            return time.monotonic() - start_time > seconds
+
+        wait_for_checks(
+            checks={
+                str(index): lambda: ready_after(seconds=0.5)
+                for index in range(5)
+            },
+            initial_delay=0.1,
+            max_delay=0.1,
+        )
+        assert time.monotonic() - start_time < 1.5
+
+    @pytest.mark.parametrize(
+        'exception',
+        [
+            subprocess.CalledProcessError(returncode=1, cmd='check'),
+            json.JSONDecodeError(msg='Expecting value', doc='', pos=0),
+        ],
+    )
+    def test_exceptions_retried(self, exception: Exception) -> None:
+        """
+        A check which raises an exception which means that a part of the
+        cluster is not ready is retried.
+        """
+        attempts = []  # type: List[int]
+
+        def check() -> None:
+            """
+            Raise an exception on the first two attempts.
+            """
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise exception
+
+        wait_for_checks(
+            checks={'check': check},
+            initial_delay=0.01,
+            max_delay=0.01,
+        )
+        assert len(attempts) == 3
+
+    @pytest.mark.parametrize(
+        'exception_type',
+        [TypeError, ValueError, AssertionError],
+    )
+    def test_unexpected_exception_raised(
+        self,
+        exception_type: type,
+    ) -> None:
+        """
+        A check which raises an unexpected exception is not retried, and the
+        exception is raised without waiting for other checks to pass.
+        """
+        attempts = []  # type: List[int]
+
+        def check() -> None:
+            """
+            Raise an exception which does not mean that the cluster is not
+            ready.
+            """
+            attempts.append(1)
+            raise exception_type()
+
+        start_time = time.monotonic()
+        with pytest.raises(exception_type):
+            wait_for_checks(
+                checks={
+                    'never ready': lambda: False,
+                    'check': check,
+                },
+                initial_delay=0.01,
+                max_delay=0.01,
+            )
+
+        assert len(attempts) == 1
+        assert time.monotonic() - start_time < 1
+
+
+class TestSequence:
+    """
+    Tests for ``sequence``.
+    """
+
+    def test_passed_checks_not_repeated(self) -> None:
+        """
+        Checks in a sequence which have passed are not run again when a later
+        check fails.
+        """
+        calls = []  # type: List[str]
+
+        def first() -> None:
+            """
+            Always pass.
+            """
+            calls.append('first')
+
+        def second() -> bool:
+            """
+            Pass on the second attempt.
+            """
+            calls.append('second')
+            return calls.count('second') > 1
+
+        check = sequence(first, second)
+        assert check() is False
+        assert check() is True
+        assert calls == ['first', 'second', 'second']
+
+
+class _FakeSession:
+    """
+    A DC/OS Test Utils API session with a waiting method which asserts on
+    responses until ZooKeeper has formed a quorum.
+    """
+
+    def __init__(self) -> None:
+        self.attempts = 0
+
+    def _wait_for_zk_quorum(self) -> None:
+        """
+        Fail an assertion on the first two attempts.
+        """
+        self.attempts += 1
+        assert self.attempts > 2, 'ZooKeeper has not formed a quorum'
+
+
+class TestAssertingSessionCheck:
+    """
+    Tests for ``_asserting_session_check``.
+    """
+
+    def test_assertion_not_ready(self) -> None:
+        """
+        An assertion failure in a waiting method which asserts on responses
+        means that the check has not passed.
+        """
+        session = _FakeSession()
+        check = _asserting_session_check(
+            session,  # type: ignore
+            '_wait_for_zk_quorum',
+        )
+
+        wait_for_checks(
+            checks={'ZooKeeper quorum': check},
+            initial_delay=0.01,
+            max_delay=0.01,
+        )
+        assert session.attempts == 3